@@ -0,0 +1,3 @@
+"""
+clever 基准测试套件 - 合成知识库生成器与延迟/内存基线对比
+"""
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+合成知识库生成器 - 按给定规模生成符合知识库结构的中英文命令数据
+"""
+
+import os
+import json
+import random
+import argparse
+from typing import Dict, List, Any
+
+# 中英文词表: 生成的描述由这些词组合而成，保证搜索/分词有真实的词频分布
+ZH_WORDS = [
+    '文件', '目录', '进程', '网络', '压缩', '解压', '查看', '显示', '创建', '删除', '复制', '移动',
+    '权限', '用户', '系统', '磁盘', '内存', '日志', '服务', '容器', '镜像', '版本', '远程', '连接',
+    '下载', '上传', '传输', '同步', '搜索', '查找', '过滤', '排序', '统计', '监控', '管理', '配置',
+    '编辑', '文本', '内容', '输出', '输入', '格式', '归档', '备份', '恢复', '端口', '地址', '路由',
+]
+EN_WORDS = [
+    'file', 'directory', 'process', 'network', 'compress', 'extract', 'view', 'show', 'create',
+    'delete', 'copy', 'move', 'permission', 'user', 'system', 'disk', 'memory', 'log', 'service',
+    'container', 'image', 'version', 'remote', 'connection', 'download', 'upload', 'transfer',
+    'sync', 'search', 'find', 'filter', 'sort', 'count', 'monitor', 'manage', 'config', 'edit',
+    'text', 'content', 'output', 'input', 'format', 'archive', 'backup', 'restore', 'port',
+    'address', 'route',
+]
+SYLLABLES = ['ba', 'ko', 'ri', 'tu', 'ne', 'xa', 'mo', 'li', 'qu', 'ze', 'fi', 'do', 'sy', 'pa', 'gr', 'ct']
+
+# 与真实知识库相近的选项/示例数量分布
+OPTIONS_RANGE = (2, 10)
+EXAMPLES_RANGE = (2, 8)
+TAGS_RANGE = (3, 6)
+
+
+def _command_names(count: int, rng: random.Random) -> List[str]:
+    """生成 count 个互不相同、形似Unix命令的名字"""
+    names = set()
+    while len(names) < count:
+        name = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+        if len(names) > len(SYLLABLES) ** 3 // 2:
+            name += str(rng.randint(0, count))
+        names.add(name)
+    return sorted(names)
+
+
+def _phrase(words: List[str], rng: random.Random, low: int, high: int, sep: str) -> str:
+    return sep.join(rng.choice(words) for _ in range(rng.randint(low, high)))
+
+
+def _make_command(name: str, category: str, lang: str, names: List[str], rng: random.Random) -> Dict[str, Any]:
+    words, sep = (ZH_WORDS, '') if lang == 'zh' else (EN_WORDS, ' ')
+    options = [
+        {'option': f"-{chr(97 + i)}", 'description': _phrase(words, rng, 2, 6, sep)}
+        for i in range(rng.randint(*OPTIONS_RANGE))
+    ]
+    examples = [
+        {'command': f"{name} -{chr(97 + i)} {rng.choice(EN_WORDS)}", 'description': _phrase(words, rng, 2, 5, sep)}
+        for i in range(rng.randint(*EXAMPLES_RANGE))
+    ]
+    return {
+        'command': name,
+        'description': _phrase(words, rng, 3, 8, sep),
+        'syntax': f"{name} [options] [{rng.choice(EN_WORDS)}]",
+        'category': category,
+        'options': options,
+        'examples': examples,
+        'related_commands': rng.sample(names, min(4, len(names))),
+        'tags': rng.sample(words, rng.randint(*TAGS_RANGE)),
+    }
+
+
+def generate_knowledge_base(output_dir: str, num_commands: int, num_categories: int = None,
+                            languages: List[str] = ('zh', 'en'), seed: int = 0) -> Dict[str, Any]:
+    """生成合成知识库到 output_dir，返回规模信息 (同一种子生成的数据完全相同)"""
+    rng = random.Random(seed)
+    num_categories = num_categories or max(12, min(400, num_commands // 250))
+    names = _command_names(num_commands, rng)
+    categories = [f"category_{i:03d}" for i in range(num_categories)]
+
+    os.makedirs(output_dir, exist_ok=True)
+    for lang in languages:
+        words = ZH_WORDS if lang == 'zh' else EN_WORDS
+        lang_rng = random.Random(f"{seed}-{lang}")
+        commands_dir = os.path.join(output_dir, f'commands_{lang}')
+        os.makedirs(commands_dir, exist_ok=True)
+
+        # 逐个分类生成并写出，大规模数据不需要整体驻留内存
+        category_meta = {}
+        for index, category in enumerate(categories):
+            commands = {
+                name: _make_command(name, category, lang, names, lang_rng)
+                for name in names[index::num_categories]
+            }
+            title = _phrase(words, lang_rng, 1, 2, '' if lang == 'zh' else ' ')
+            _write_json(os.path.join(commands_dir, f'{category}.json'), {
+                'category': category,
+                'category_name': title,
+                'description': f"{category} commands",
+                'commands': commands,
+            })
+            category_meta[category] = {
+                'name': title,
+                'description': _phrase(words, lang_rng, 2, 4, '' if lang == 'zh' else ' '),
+                'commands': list(commands),
+                'color': 'blue',
+            }
+        _write_json(os.path.join(output_dir, f'categories_{lang}.json'), category_meta)
+
+        mappings = {}
+        for word in words:
+            mappings[word] = lang_rng.sample(names, min(8, len(names)))
+        _write_json(os.path.join(output_dir, f'search_mappings_{lang}.json'), mappings)
+        _write_json(os.path.join(output_dir, f'meta_{lang}.json'), {
+            'version': 'bench',
+            'name': 'Clever Synthetic Knowledge Base',
+            'description': f"synthetic knowledge base with {num_commands} commands",
+            'last_updated': '1970-01-01',
+            'total_commands': num_commands,
+            'categories_count': num_categories,
+        })
+
+    _write_json(os.path.join(output_dir, 'i18n_config.json'),
+                {'language': languages[0], 'supported_languages': ['zh', 'en']})
+    return {'commands': num_commands, 'categories': num_categories, 'languages': list(languages)}
+
+
+def _write_json(path: str, data: Any):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic clever knowledge base")
+    parser.add_argument('output_dir')
+    parser.add_argument('-n', '--commands', type=int, default=1000)
+    parser.add_argument('--categories', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    info = generate_knowledge_base(args.output_dir, args.commands, args.categories, seed=args.seed)
+    print(json.dumps(info))
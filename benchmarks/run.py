@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+基准测试 - 在合成知识库上测量启动、建索引和各类查询的延迟分位数与峰值内存，
+结果保存为JSON基线，并可与之前的基线对比标记性能回退
+
+用法:
+  python -m benchmarks.run run --sizes 1000,10000 --output baseline.json
+  python -m benchmarks.run compare baseline.json current.json --threshold 0.2
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.generate_kb import generate_knowledge_base, ZH_WORDS, EN_WORDS  # noqa: E402
+
+# 每个场景中参与比较的延迟指标
+LATENCY_KEYS = ('p50_ms', 'p95_ms', 'p99_ms')
+# 小于该绝对差值(毫秒)的变化视为噪声，不算回退
+NOISE_FLOOR_MS = 0.05
+
+_COLD_START_CODE = """
+import sys
+sys.path.insert(0, {repo!r})
+from src.utils.i18n import I18nManager
+from src.core.query_processor import QueryProcessor
+i18n = I18nManager({kb!r})
+i18n.current_language = {lang!r}
+QueryProcessor(i18n, data_dir={kb!r}).query_command({name!r})
+"""
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """计算延迟分位数 (最近秩法)，输入单位为秒，输出单位为毫秒"""
+    if not samples:
+        return {'n': 0}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        index = max(0, min(len(ordered) - 1, int(round(p * len(ordered) + 0.5)) - 1))
+        return ordered[index] * 1000
+
+    return {
+        'n': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': rank(0.50),
+        'p95_ms': rank(0.95),
+        'p99_ms': rank(0.99),
+    }
+
+
+def measure(func: Callable, args_list: List[Any]) -> Dict[str, float]:
+    """对每组参数调用一次 func，返回延迟分位数"""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存 (MB)"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以KB为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _misspell(name: str, rng: random.Random) -> str:
+    if len(name) < 2:
+        return name + 'x'
+    i = rng.randrange(len(name) - 1)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def run_scenario(kb_dir: str, lang: str, iterations: int, seed: int = 0) -> Dict[str, Any]:
+    """在当前进程中测量一个 (知识库, 语言) 场景 (应在独立子进程中调用以隔离峰值内存)"""
+    from src.utils.i18n import I18nManager
+    from src.core.query_processor import QueryProcessor
+    from src.cli.interface import CleverCLI
+    from src.cli.formatter import OutputFormatter
+
+    rng = random.Random(seed)
+    i18n = I18nManager(kb_dir)
+    i18n.current_language = lang
+    results = {}
+
+    start = time.perf_counter()
+    processor = QueryProcessor(i18n, data_dir=kb_dir)
+    results['load_snapshot'] = percentiles([time.perf_counter() - start])
+
+    names = processor.get_command_list()
+    categories = list(processor.get_all_categories())
+    words = ZH_WORDS if lang == 'zh' else EN_WORDS
+
+    search_engine = processor.search_engine
+    results['index_build'] = measure(search_engine.rebuild_index, [()] * 3)
+
+    lookups = [(rng.choice(names),) for _ in range(iterations)]
+    results['query_command'] = measure(processor.query_command, lookups)
+
+    queries = [(rng.choice(words) if rng.random() < 0.5 else f"{rng.choice(words)} {rng.choice(words)}",)
+               for _ in range(max(1, iterations // 4))]
+    results['enhanced_search'] = measure(processor.search_commands, queries)
+
+    typos = [(_misspell(rng.choice(names), rng),) for _ in range(max(1, iterations // 4))]
+    results['find_similar_commands'] = measure(processor.find_similar_commands, typos)
+
+    browses = [(rng.choice(categories),) for _ in range(max(1, iterations // 10))]
+    results['category_browse'] = measure(processor.get_category_commands, browses)
+
+    cli = CleverCLI()
+    cli.i18n = i18n
+    cli.formatter = OutputFormatter(i18n, use_color=True)
+    cli._processor = processor
+
+    def render_list():
+        with redirect_stdout(io.StringIO()):
+            cli.handle_list_all()
+
+    results['list_render'] = measure(render_list, [()] * 3)
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+
+def measure_start(kb_dir: str, lang: str, name: str, cache_dir: str, repeat: int, clear_cache: bool) -> Dict[str, float]:
+    """测量新进程从启动到完成一次查询的耗时 (clear_cache 时每次都从空缓存目录冷启动)"""
+    code = _COLD_START_CODE.format(repo=REPO_DIR, kb=kb_dir, lang=lang, name=name)
+    env = dict(os.environ, CLEVER_CACHE_DIR=cache_dir, CLEVER_NO_DAEMON='1')
+    samples = []
+    for _ in range(repeat):
+        if clear_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], env=env, check=True)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def run_benchmarks(sizes: List[int], langs: List[str], iterations: int, kb_root: str,
+                   start_repeat: int = 5) -> Dict[str, Any]:
+    """对每个规模和语言运行全部场景"""
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'iterations': iterations,
+        },
+        'results': {},
+    }
+    for size in sizes:
+        kb_dir = os.path.join(kb_root, f'kb-{size}')
+        if not os.path.exists(os.path.join(kb_dir, 'i18n_config.json')):
+            print(f"generating {size} commands -> {kb_dir}", file=sys.stderr)
+            generate_knowledge_base(kb_dir, size)
+
+        for lang in langs:
+            key = f"{lang}-{size}"
+            print(f"running {key}", file=sys.stderr)
+            cache_dir = tempfile.mkdtemp(prefix='clever-bench-')
+            try:
+                sample_name = _first_command(kb_dir, lang)
+                scenario = {
+                    'cold_start': measure_start(kb_dir, lang, sample_name, cache_dir, start_repeat, True),
+                    'warm_start': measure_start(kb_dir, lang, sample_name, cache_dir, start_repeat, False),
+                }
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.run', '_scenario', kb_dir, lang, str(iterations)],
+                    cwd=REPO_DIR, env=dict(os.environ, CLEVER_CACHE_DIR=cache_dir, CLEVER_NO_DAEMON='1'),
+                    check=True, stdout=subprocess.PIPE,
+                ).stdout
+                scenario.update(json.loads(output))
+            finally:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            report['results'][key] = scenario
+    return report
+
+
+def _first_command(kb_dir: str, lang: str) -> str:
+    with open(os.path.join(kb_dir, f'categories_{lang}.json'), encoding='utf-8') as f:
+        categories = json.load(f)
+    return next(iter(categories.values()))['commands'][0]
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """对比两份报告，返回每个指标的变化 (ratio > 1 + threshold 记为回退)"""
+    rows = []
+    for key, base_scenario in baseline.get('results', {}).items():
+        cur_scenario = current.get('results', {}).get(key)
+        if cur_scenario is None:
+            continue
+        for metric, base_value in base_scenario.items():
+            cur_value = cur_scenario.get(metric)
+            if cur_value is None:
+                continue
+            if isinstance(base_value, dict):
+                pairs = [(f"{metric}.{stat}", base_value.get(stat), cur_value.get(stat)) for stat in LATENCY_KEYS]
+                floor = NOISE_FLOOR_MS
+            else:
+                pairs = [(metric, base_value, cur_value)]
+                floor = 0.0
+            for name, base, cur in pairs:
+                if not base or cur is None:
+                    continue
+                ratio = cur / base
+                rows.append({
+                    'scenario': key, 'metric': name, 'baseline': base, 'current': cur, 'ratio': ratio,
+                    'regression': ratio > 1 + threshold and cur - base > floor,
+                })
+    return rows
+
+
+def _print_comparison(rows: List[Dict[str, Any]], threshold: float):
+    print(f"{'scenario':<12} {'metric':<34} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['scenario']:<12} {row['metric']:<34} {row['baseline']:>12.3f} "
+              f"{row['current']:>12.3f} {row['ratio']:>8.2f}{flag}")
+    regressions = sum(1 for row in rows if row['regression'])
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="clever benchmark suite")
+    sub = parser.add_subparsers(dest='action', required=True)
+
+    run_parser = sub.add_parser('run', help='run benchmarks and write a JSON report')
+    run_parser.add_argument('--sizes', default='1000,10000', help='comma-separated command counts (1000 .. 1000000)')
+    run_parser.add_argument('--langs', default='zh,en')
+    run_parser.add_argument('--iterations', type=int, default=400, help='lookups per scenario')
+    run_parser.add_argument('--kb-root', default=os.path.join(tempfile.gettempdir(), 'clever-bench-kb'),
+                            help='where generated knowledge bases are kept and reused')
+    run_parser.add_argument('--output', help='write the report here instead of stdout')
+
+    compare_parser = sub.add_parser('compare', help='compare a report against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown ratio (default 0.2)')
+
+    scenario_parser = sub.add_parser('_scenario')
+    scenario_parser.add_argument('kb_dir')
+    scenario_parser.add_argument('lang')
+    scenario_parser.add_argument('iterations', type=int)
+
+    args = parser.parse_args(argv)
+    if args.action == 'run':
+        sizes = [int(size) for size in args.sizes.split(',') if size]
+        langs = [lang for lang in args.langs.split(',') if lang]
+        report = run_benchmarks(sizes, langs, args.iterations, args.kb_root)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        else:
+            print(text)
+        return 0
+
+    if args.action == 'compare':
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, encoding='utf-8') as f:
+            current = json.load(f)
+        rows = compare_reports(baseline, current, args.threshold)
+        _print_comparison(rows, args.threshold)
+        return 1 if any(row['regression'] for row in rows) else 0
+
+    print(json.dumps(run_scenario(args.kb_dir, args.lang, args.iterations)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,35 +12,48 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
-from src.cli import create_parser, CleverCLI
-
 
 def main():
     """主函数"""
-    parser = create_parser()
-    args = parser.parse_args()
+    argv = sys.argv[1:]
+    if '--profile' not in argv and '--profile-memory' not in argv:
+        _run()
+        return
+
+    # 性能分析: 在导入CLI之前开始计时，结束时(包括 sys.exit)把各阶段耗时写到标准错误
+    from src.utils.profiler import enable_profiling, finish_profiling
+    enable_profiling(trace_memory='--profile-memory' in argv)
+    try:
+        _run()
+    finally:
+        finish_profiling()
+
+
+def _run():
+    """解析参数并执行"""
+    # 优先交给常驻守护进程处理，未运行时回退到进程内执行
+    from src.daemon.client import run_via_daemon
+    exit_code = run_via_daemon(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
     
+    from src.cli.interface import CleverCLI
     cli = CleverCLI()
     
     try:
-        if args.lang:
-            cli.handle_language_change(args.lang)
-        elif args.refresh:
-            cli.handle_refresh()
-        elif args.stats:
-            cli.handle_stats()
-        elif args.list:
-            cli.handle_list_all()
-        elif args.categories:
-            cli.handle_list_categories()
-        elif args.search:
-            cli.handle_search(args.search)
-        elif args.category:
-            cli.handle_category(args.category)
-        elif args.command:
-            cli.handle_command_query(args.command)
-        else:
-            parser.print_help()
+        # 快速路径: `clever <命令名>` 精确命中时跳过参数解析器
+        argv = sys.argv[1:]
+        if len(argv) == 1 and not argv[0].startswith('-') and cli.handle_fast_lookup(argv[0]):
+            return
+        # 快速路径: shell补全每次按键都会调用
+        if len(argv) == 2 and argv[0] == '--complete':
+            cli.handle_complete(argv[1])
+            return
+        
+        from src.cli.parser import create_parser
+        parser = create_parser(cli.i18n)
+        args = parser.parse_args()
+        cli.run(args, parser)
     
     except KeyboardInterrupt:
         cli_lang = cli.i18n.get_language()
@@ -53,4 +66,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,8 +3,22 @@
 CLI模块初始化
 """
 
-from .parser import create_parser
-from .formatter import OutputFormatter
-from .interface import CleverCLI
+import importlib
+
+# 按需导入，快速查询路径无需加载 argparse
+_EXPORTS = {
+    'create_parser': 'parser',
+    'OutputFormatter': 'formatter',
+    'CleverCLI': 'interface',
+}
 
 __all__ = ['create_parser', 'OutputFormatter', 'CleverCLI']
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
@@ -3,16 +3,21 @@
 输出格式化器 - 负责美化终端输出
 """
 
+import os
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, List
 from ..utils.i18n import I18nManager
 
 
 class OutputFormatter:
     """输出格式化器"""
     
-    def __init__(self, i18n_manager: I18nManager = None):
+    def __init__(self, i18n_manager: I18nManager = None, use_color: bool = None):
         self.i18n = i18n_manager or I18nManager()
+        # 输出不是终端 (管道/重定向) 或设置了 NO_COLOR 时不输出颜色
+        if use_color is None:
+            use_color = sys.stdout.isatty() and 'NO_COLOR' not in os.environ
+        self.use_color = use_color
         self.colors = {
             'red': '\033[91m',
             'green': '\033[92m',
@@ -27,63 +32,74 @@ class OutputFormatter:
     
     def colorize(self, text: str, color: str) -> str:
         """为文本添加颜色"""
+        if not self.use_color:
+            return text
         return f"{self.colors.get(color, '')}{text}{self.colors['end']}"
     
+    def _emit(self, lines: List[str]):
+        """一次性写出整屏内容"""
+        sys.stdout.write('\n'.join(lines) + '\n')
+    
     def display_command_info(self, command_data: Dict[str, Any]):
         """显示命令的详细信息"""
+        ui = self.i18n.get_ui_text
         command_name = command_data.get('command', command_data.get('name', 'Unknown'))
-        print(f"{self.colorize(self.i18n.get_ui_text('command') + ':', 'bold')} {self.colorize(command_name, 'cyan')}")
-        print(f"{self.colorize(self.i18n.get_ui_text('description') + ':', 'bold')} {command_data['description']}")
-        print(f"{self.colorize(self.i18n.get_ui_text('category') + ':', 'bold')} {self.colorize(command_data['category'], 'magenta')}")
+        lines = [
+            f"{self.colorize(ui('command') + ':', 'bold')} {self.colorize(command_name, 'cyan')}",
+            f"{self.colorize(ui('description') + ':', 'bold')} {command_data['description']}",
+            f"{self.colorize(ui('category') + ':', 'bold')} {self.colorize(command_data['category'], 'magenta')}",
+        ]
         
         # 显示语法/用法
         syntax = command_data.get('syntax', command_data.get('usage', ''))
         if syntax:
-            print(f"{self.colorize(self.i18n.get_ui_text('usage') + ':', 'bold')} {syntax}")
+            lines.append(f"{self.colorize(ui('usage') + ':', 'bold')} {syntax}")
         
         # 显示选项
         if 'options' in command_data and command_data['options']:
-            print(f"\n{self.colorize(self.i18n.get_ui_text('options') + ':', 'bold')}")
+            lines.append(f"\n{self.colorize(ui('options') + ':', 'bold')}")
             for option in command_data['options']:
                 option_text = option.get('option', '')
                 desc = option.get('description', '')
-                print(f"  {self.colorize(option_text, 'green')}: {desc}")
+                lines.append(f"  {self.colorize(option_text, 'green')}: {desc}")
         
         # 显示示例
         if 'examples' in command_data and command_data['examples']:
-            print(f"\n{self.colorize(self.i18n.get_ui_text('examples') + ':', 'bold')}")
+            lines.append(f"\n{self.colorize(ui('examples') + ':', 'bold')}")
             for example in command_data['examples']:
                 cmd = example.get('command', '')
                 desc = example.get('description', '')
-                print(f"  {self.colorize(cmd, 'yellow')}")
+                lines.append(f"  {self.colorize(cmd, 'yellow')}")
                 if desc:
-                    print(f"    {desc}")
+                    lines.append(f"    {desc}")
         
         # 显示相关命令
         if 'related_commands' in command_data and command_data['related_commands']:
-            print(f"\n{self.colorize(self.i18n.get_ui_text('related_commands') + ':', 'bold')}")
+            lines.append(f"\n{self.colorize(ui('related_commands') + ':', 'bold')}")
             related = ', '.join([self.colorize(cmd, 'cyan') for cmd in command_data['related_commands']])
-            print(f"  {related}")
+            lines.append(f"  {related}")
+        
+        self._emit(lines)
     
-    def display_search_results(self, query: str, results: Dict[str, Any], processor):
-        """显示搜索结果"""
+    def display_search_results(self, query: str, results: Dict[str, Any], summaries: Dict[str, Dict[str, str]]):
+        """显示搜索结果 (summaries: 命令名 -> 描述/分类摘要，由调用方批量获取)"""
         total_results = sum(len(cmds) for cmds in results.values())
         
         if total_results == 0:
-            print(f"{self.colorize(self.i18n.get_ui_text('no_results'), 'red')}")
+            self._emit([self.colorize(self.i18n.get_ui_text('no_results'), 'red')])
             return
         
         lang = self.i18n.get_language()
         if lang == 'zh':
-            print(f"{self.colorize('搜索结果', 'bold')} (查询: '{query}', 共找到 {total_results} 个命令):")
+            lines = [f"{self.colorize('搜索结果', 'bold')} (查询: '{query}', 共找到 {total_results} 个命令):"]
         else:
-            print(f"{self.colorize('Search Results', 'bold')} (Query: '{query}', Found {total_results} commands):")
-        print("=" * 60)
+            lines = [f"{self.colorize('Search Results', 'bold')} (Query: '{query}', Found {total_results} commands):"]
+        lines.append("=" * 60)
         
         # 显示各类结果
-        result_types = {}
         if lang == 'zh':
             result_types = {
+                'query_matches': ('🧩 条件匹配', 'green'),
                 'exact_matches': ('🎯 精确匹配', 'green'),
                 'name_matches': ('📝 名称匹配', 'cyan'),
                 'keyword_matches': ('🔍 关键词匹配', 'yellow'),
@@ -92,6 +108,7 @@ class OutputFormatter:
             }
         else:
             result_types = {
+                'query_matches': ('🧩 Query Matches', 'green'),
                 'exact_matches': ('🎯 Exact Matches', 'green'),
                 'name_matches': ('📝 Name Matches', 'cyan'),
                 'keyword_matches': ('🔍 Keyword Matches', 'yellow'),
@@ -101,69 +118,73 @@ class OutputFormatter:
         
         for result_type, (title, color) in result_types.items():
             if result_type in results and results[result_type]:
-                print(f"\n{self.colorize(title, color)}:")
+                lines.append(f"\n{self.colorize(title, color)}:")
                 for cmd in results[result_type]:
-                    cmd_data = processor.query_command(cmd)
-                    if cmd_data:
-                        print(f"  {self.colorize(cmd, 'cyan'):<12} - {cmd_data['description']}")
+                    summary = summaries.get(cmd)
+                    if summary:
+                        lines.append(f"  {self.colorize(cmd, 'cyan'):<12} - {summary['description']}")
         
-        print("\n" + "=" * 60)
-        tip_text = self.i18n.get_ui_text('tip_use_help')
+        lines.append("\n" + "=" * 60)
         if lang == 'zh':
-            print(f"{self.colorize('提示:', 'bold')} 使用 'clever 命令名' 查看具体命令的详细用法")
+            lines.append(f"{self.colorize('提示:', 'bold')} 使用 'clever 命令名' 查看具体命令的详细用法")
         else:
-            print(f"{self.colorize('Tip:', 'bold')} Use 'clever command_name' to view detailed usage")
+            lines.append(f"{self.colorize('Tip:', 'bold')} Use 'clever command_name' to view detailed usage")
+        self._emit(lines)
     
     def display_category_commands(self, category: str, category_data: Dict[str, Any]):
         """显示分类中的所有命令"""
+        lang = self.i18n.get_language()
         if not category_data['commands']:
-            lang = self.i18n.get_language()
             if lang == 'zh':
-                print(f"{self.colorize('分类', 'red')} '{category}' {self.colorize('未找到', 'red')}")
+                self._emit([f"{self.colorize('分类', 'red')} '{category}' {self.colorize('未找到', 'red')}"])
             else:
-                print(f"{self.colorize('Category', 'red')} '{category}' {self.colorize('not found', 'red')}")
+                self._emit([f"{self.colorize('Category', 'red')} '{category}' {self.colorize('not found', 'red')}"])
             return
         
-        lang = self.i18n.get_language()
         if lang == 'zh':
-            print(f"{self.colorize(category, 'bold')} 类命令 (共 {category_data['total_count']} 个):")
+            lines = [f"{self.colorize(category, 'bold')} 类命令 (共 {category_data['total_count']} 个):"]
         else:
-            print(f"{self.colorize(category, 'bold')} Commands ({category_data['total_count']} total):")
-        print("-" * 50)
+            lines = [f"{self.colorize(category, 'bold')} Commands ({category_data['total_count']} total):"]
+        lines.append("-" * 50)
         
         for cmd_name, cmd_data in category_data['commands'].items():
-            print(f"  {self.colorize(cmd_name, 'cyan'):<12} - {cmd_data['description']}")
+            lines.append(f"  {self.colorize(cmd_name, 'cyan'):<12} - {cmd_data['description']}")
+        self._emit(lines)
     
-    def display_all_commands(self, categories: Dict[str, Any], processor):
-        """显示所有命令"""
-        print(f"{self.colorize(self.i18n.get_ui_text('available_commands') + ':', 'bold')}")
-        print("=" * 60)
+    def display_all_commands(self, categories: Dict[str, Any], summaries: Dict[str, Dict[str, str]]):
+        """显示所有命令 (summaries: 命令名 -> 描述/分类摘要)"""
+        lines = [
+            f"{self.colorize(self.i18n.get_ui_text('available_commands') + ':', 'bold')}",
+            "=" * 60,
+        ]
         
         for category, category_info in categories.items():
-            print(f"\n{self.colorize(category, 'magenta')}:")
+            lines.append(f"\n{self.colorize(category, 'magenta')}:")
             if isinstance(category_info, dict) and 'commands' in category_info:
                 for cmd_name in category_info['commands']:
-                    cmd_data = processor.query_command(cmd_name)
-                    if cmd_data:
-                        print(f"  {self.colorize(cmd_name, 'cyan'):<12} - {cmd_data['description']}")
+                    summary = summaries.get(cmd_name)
+                    if summary:
+                        lines.append(f"  {self.colorize(cmd_name, 'cyan'):<12} - {summary['description']}")
+        self._emit(lines)
     
     def display_categories(self, categories: Dict[str, Any]):
         """显示所有分类"""
         lang = self.i18n.get_language()
         if lang == 'zh':
-            print(f"{self.colorize('可用的命令分类:', 'bold')}")
+            lines = [f"{self.colorize('可用的命令分类:', 'bold')}"]
         else:
-            print(f"{self.colorize('Available Command Categories:', 'bold')}")
-        print("-" * 30)
+            lines = [f"{self.colorize('Available Command Categories:', 'bold')}"]
+        lines.append("-" * 30)
         
         for category, category_info in categories.items():
             if isinstance(category_info, dict):
                 desc = category_info.get('description', '')
                 count = len(category_info.get('commands', []))
                 if lang == 'zh':
-                    print(f"  {self.colorize(category, 'magenta'):<15} - {desc} ({count}个命令)")
+                    lines.append(f"  {self.colorize(category, 'magenta'):<15} - {desc} ({count}个命令)")
                 else:
-                    print(f"  {self.colorize(category, 'magenta'):<15} - {desc} ({count} commands)")
+                    lines.append(f"  {self.colorize(category, 'magenta'):<15} - {desc} ({count} commands)")
+        self._emit(lines)
     
     def display_stats(self, stats: Dict[str, Any]):
         """显示系统统计信息"""
@@ -4,8 +4,10 @@
 """
 
 import sys
+import json
 from ..core.query_processor import QueryProcessor
 from .formatter import OutputFormatter
+from .structured import StructuredWriter, flatten
 from ..utils.i18n import I18nManager
 
 
@@ -14,11 +16,84 @@ class CleverCLI:
     
     def __init__(self):
         self.i18n = I18nManager()
-        self.processor = QueryProcessor()
+        self._processor = None
         self.formatter = OutputFormatter(self.i18n)
+        # 结构化输出格式 (json/jsonl/tsv)，None 表示彩色文本
+        self.output_format = None
+        # 本次查询使用的知识库语言 (与查询一起给出的 --lang)，None 表示使用界面语言
+        self.query_language = None
+    
+    @property
+    def processor(self) -> QueryProcessor:
+        """查询处理器 (仅在处理函数需要数据时创建)"""
+        if self._processor is None:
+            self._processor = QueryProcessor(self.i18n)
+        if self.query_language:
+            # 另一种语言的处理器常驻在同一进程中，按查询切换无需重新加载
+            return self._processor.for_language(self.query_language)
+        return self._processor
+    
+    @staticmethod
+    def _has_query(args) -> bool:
+        """参数中是否包含查询类操作"""
+        return bool(args.complete is not None or getattr(args, 'batch', None) or args.refresh
+                    or getattr(args, 'watch', None) or args.stats or args.list
+                    or args.categories or args.search or args.category or args.command)
+    
+    def _is_interactive(self) -> bool:
+        """是否可以与用户交互"""
+        return sys.stdin.isatty()
+    
+    def _prompt(self, text: str) -> str:
+        """读取用户输入"""
+        return input(text)
+    
+    def run(self, args, parser):
+        """根据解析后的参数分派到对应的处理函数"""
+        self.output_format = getattr(args, 'format', None)
+        # 与查询一起使用时 --lang 只对本次查询生效，单独使用时才切换并保存语言配置
+        self.query_language = args.lang if args.lang and self._has_query(args) else None
+        if args.complete is not None:
+            self.handle_complete(args.complete)
+        elif args.daemon:
+            self.handle_daemon(args.daemon, args.idle_timeout)
+        elif getattr(args, 'batch', None):
+            self.handle_batch(args.batch, args.workers)
+        elif args.lang and not self.query_language:
+            self.handle_language_change(args.lang)
+        elif args.refresh:
+            self.handle_refresh()
+        elif getattr(args, 'watch', None):
+            self.handle_watch(args.watch)
+        elif args.stats:
+            self.handle_stats()
+        elif args.list:
+            self.handle_list_all()
+        elif args.categories:
+            self.handle_list_categories()
+        elif args.search:
+            self.handle_search(args.search, getattr(args, 'top', None))
+        elif args.category:
+            self.handle_category(args.category)
+        elif args.command:
+            self.handle_command_query(args.command)
+        else:
+            parser.print_help()
+    
+    def handle_fast_lookup(self, command_name: str) -> bool:
+        """快速路径: 精确查询命令，未找到时返回False交由完整流程处理"""
+        command_data = self.processor.query_command(command_name)
+        if not command_data:
+            return False
+        self.formatter.display_command_info(command_data)
+        return True
     
     def handle_command_query(self, command_name: str):
         """处理命令查询"""
+        if self.output_format:
+            self.write_command(command_name)
+            return
+        
         command_data = self.processor.query_command(command_name)
         
         if not command_data:
@@ -28,13 +103,13 @@ class CleverCLI:
                 self.formatter.display_similar_commands(command_name, similar_commands)
                 
                 # 在交互模式下询问用户
-                if sys.stdin.isatty():
+                if self._is_interactive():
                     try:
                         lang = self.i18n.get_language()
                         if lang == 'zh':
-                            choice = input(f"\n请输入序号(1-{len(similar_commands[:5])})，或直接输入命令名: ").strip()
+                            choice = self._prompt(f"\n请输入序号(1-{len(similar_commands[:5])})，或直接输入命令名: ").strip()
                         else:
-                            choice = input(f"\nEnter number (1-{len(similar_commands[:5])}) or command name directly: ").strip()
+                            choice = self._prompt(f"\nEnter number (1-{len(similar_commands[:5])}) or command name directly: ").strip()
                             
                         if choice.isdigit():
                             choice_idx = int(choice) - 1
@@ -64,13 +139,111 @@ class CleverCLI:
         
         self.formatter.display_command_info(command_data)
     
-    def handle_search(self, query: str):
+    def handle_batch(self, source: str, workers: int = 1):
+        """批量模式: 逐行读取请求，每个请求输出一行JSON"""
+        from ..core.batch import BatchProcessor
+        
+        stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+        try:
+            for line in BatchProcessor(self.processor).run(stream, workers=max(1, workers)):
+                sys.stdout.write(line + '\n')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        sys.stdout.flush()
+    
+    def _summary_record(self, command_name: str, command_data: dict, **extra) -> dict:
+        """结构化输出中的命令摘要记录"""
+        record = dict(extra)
+        record.update({
+            'name': command_name,
+            'category': command_data.get('category', ''),
+            'description': command_data.get('description', ''),
+        })
+        return record
+    
+    def write_command(self, command_name: str):
+        """以结构化格式输出单个命令；未找到时输出带相似命令建议的记录"""
+        writer = StructuredWriter(self.output_format)
+        command_data = self.processor.query_command(command_name)
+        if command_data is None:
+            suggestions = [item['command'] for item in self.processor.find_similar_commands(command_name)]
+            if self.output_format == 'tsv':
+                lang = self.i18n.get_language()
+                message = f"命令 '{command_name}' 未找到" if lang == 'zh' else f"Command '{command_name}' not found"
+                sys.stderr.write(message + '\n')
+            else:
+                writer.write_record({'name': command_name, 'found': False, 'suggestions': suggestions})
+        elif self.output_format == 'json':
+            writer.write_document(self.processor.export_command_data(command_name, 'json'))
+        elif self.output_format == 'jsonl':
+            writer.write_document(json.dumps(command_data, ensure_ascii=False))
+        else:
+            record = self._summary_record(command_name, command_data)
+            record['usage'] = command_data.get('syntax', command_data.get('usage', ''))
+            writer.write_record(record, ['name', 'category', 'description', 'usage'])
+        writer.close()
+    
+    def write_search_results(self, results: dict):
+        """以结构化格式输出搜索结果，每个匹配一条记录"""
+        writer = StructuredWriter(self.output_format)
+        names = [name for group in results.values() for name in group]
+        summaries = self.processor.get_command_summaries(names)
+        for group, group_names in results.items():
+            for command_name in group_names:
+                command_data = summaries.get(command_name)
+                if command_data:
+                    writer.write_record(self._summary_record(command_name, command_data, match=group))
+        writer.close()
+    
+    def write_category(self, category: str):
+        """以结构化格式输出分类下的命令 (精确分类不存在时使用最相似的分类)"""
+        writer = StructuredWriter(self.output_format)
+        category_data = self.processor.get_category_commands(category)
+        if not category_data.get('commands'):
+            similar_categories = self.processor.find_similar_categories(category)
+            if similar_categories:
+                category = similar_categories[0][0]
+                category_data = self.processor.get_category_commands(category)
+        for command_name, command_data in category_data.get('commands', {}).items():
+            writer.write_record(self._summary_record(command_name, command_data))
+        writer.close()
+    
+    def write_all_commands(self, categories: dict):
+        """以结构化格式输出所有命令，按分类逐批加载并流式写出"""
+        writer = StructuredWriter(self.output_format)
+        for category, category_info in categories.items():
+            if not isinstance(category_info, dict):
+                continue
+            command_names = category_info.get('commands', [])
+            summaries = self.processor.get_command_summaries(command_names)
+            for command_name in command_names:
+                command_data = summaries.get(command_name)
+                if command_data:
+                    writer.write_record(self._summary_record(command_name, command_data, group=category))
+        writer.close()
+    
+    def handle_complete(self, prefix: str):
+        """输出补全候选，每行一个，无颜色 (供shell补全脚本调用)"""
+        candidates = self.processor.complete(prefix)
+        if candidates:
+            sys.stdout.write('\n'.join(candidates) + '\n')
+    
+    def handle_search(self, query: str, top_k: int = None):
         """处理搜索请求"""
-        results = self.processor.search_commands(query)
-        self.formatter.display_search_results(query, results, self.processor)
+        results = self.processor.search_commands(query, top_k=top_k)
+        if self.output_format:
+            self.write_search_results(results)
+            return
+        names = [name for group in results.values() for name in group]
+        self.formatter.display_search_results(query, results, self.processor.get_command_summaries(names))
     
     def handle_category(self, category: str):
         """处理分类查询，支持模糊搜索"""
+        if self.output_format:
+            self.write_category(category)
+            return
+        
         # 首先尝试精确匹配
         category_data = self.processor.get_category_commands(category)
         
@@ -97,12 +270,12 @@ class CleverCLI:
                 print(f"  {i}. {self.formatter.colorize(cat_name, 'cyan')} (相似度: {similarity:.2f})")
             
             # 在交互模式下询问用户选择
-            if sys.stdin.isatty():
+            if self._is_interactive():
                 try:
                     if lang == 'zh':
-                        choice = input(f"\n请输入序号(1-{len(similar_categories[:5])})，或直接输入分类名: ").strip()
+                        choice = self._prompt(f"\n请输入序号(1-{len(similar_categories[:5])})，或直接输入分类名: ").strip()
                     else:
-                        choice = input(f"\nEnter number (1-{len(similar_categories[:5])}) or category name directly: ").strip()
+                        choice = self._prompt(f"\nEnter number (1-{len(similar_categories[:5])}) or category name directly: ").strip()
                         
                     if choice.isdigit():
                         choice_idx = int(choice) - 1
@@ -137,16 +310,44 @@ class CleverCLI:
     def handle_list_all(self):
         """处理列出所有命令"""
         categories = self.processor.get_all_categories()
-        self.formatter.display_all_commands(categories, self.processor)
+        if self.output_format:
+            self.write_all_commands(categories)
+            return
+        names = [name for info in categories.values() if isinstance(info, dict) for name in info.get('commands', [])]
+        self.formatter.display_all_commands(categories, self.processor.get_command_summaries(names))
     
     def handle_list_categories(self):
         """处理列出所有分类"""
         categories = self.processor.get_all_categories()
+        if self.output_format:
+            writer = StructuredWriter(self.output_format)
+            for category, info in categories.items():
+                writer.write_record({
+                    'category': category,
+                    'name': info.get('name', ''),
+                    'description': info.get('description', ''),
+                    'count': len(info.get('commands', [])),
+                })
+            writer.close()
+            return
         self.formatter.display_categories(categories)
     
     def handle_stats(self):
         """处理统计信息显示"""
         stats = self.processor.get_system_stats()
+        if self.output_format:
+            writer = StructuredWriter(self.output_format)
+            if self.output_format == 'json':
+                writer.write_document(json.dumps(stats, indent=2, ensure_ascii=False, default=str))
+            elif self.output_format == 'jsonl':
+                writer.write_document(json.dumps(stats, ensure_ascii=False, default=str))
+            else:
+                writer.write_records(
+                    ({'key': key, 'value': value} for key, value in flatten(stats).items()),
+                    ['key', 'value']
+                )
+            writer.close()
+            return
         self.formatter.display_stats(stats)
     
     def handle_refresh(self):
@@ -161,6 +362,40 @@ class CleverCLI:
             self.processor.refresh_data()
             self.formatter.display_info("Data cache refresh completed")
     
+    def handle_watch(self, interval: float):
+        """监视知识库源文件，修改后立即增量更新快照、索引与缓存 (Ctrl-C 退出)"""
+        import time
+        lang = self.i18n.get_language()
+        processor = self.processor
+        processor.update_data()
+        processor.search_engine.warm_up()
+        kb_dir = processor.data_manager.data_dir
+        if lang == 'zh':
+            self.formatter.display_info(f"正在监视 {kb_dir} (每 {interval:g} 秒检查一次，Ctrl-C 退出)")
+        else:
+            self.formatter.display_info(f"Watching {kb_dir} (polling every {interval:g}s, Ctrl-C to stop)")
+        
+        try:
+            while True:
+                time.sleep(interval)
+                start = time.perf_counter()
+                result = processor.update_data()
+                if result is None:
+                    continue
+                if not result['incremental']:
+                    # 无法增量更新时立即重建索引，保证后续查询不用等待
+                    processor.search_engine.warm_up()
+                elapsed = (time.perf_counter() - start) * 1000
+                names = ', '.join(result['commands'])
+                if lang == 'zh':
+                    detail = f"更新 {len(result['commands'])} 个命令: {names}" if result['incremental'] else "重新加载知识库"
+                else:
+                    detail = (f"updated {len(result['commands'])} command(s): {names}" if result['incremental']
+                              else "reloaded knowledge base")
+                self.formatter.display_info(f"{detail} ({elapsed:.1f} ms)")
+        except KeyboardInterrupt:
+            return
+    
     def handle_language_change(self, new_language: str):
         """处理语言切换"""
         current_lang = self.i18n.get_language()
@@ -175,17 +410,59 @@ class CleverCLI:
         # 切换语言
         if self.i18n.set_language(new_language):
             # 重新初始化formatter以使用新语言
-            self.formatter = OutputFormatter(self.i18n)
+            self.formatter = OutputFormatter(self.i18n, self.formatter.use_color)
             
             if new_language == 'zh':
                 self.formatter.display_info("语言已切换为中文")
             else:
                 self.formatter.display_info("Language switched to English")
                 
-            # 刷新数据管理器以加载新语言的数据
-            self.processor.data_manager.set_language(new_language)
+            # 切换到新语言的常驻处理器 (尚未创建时将直接按新语言创建)
+            if self._processor is not None:
+                self._processor = self._processor.for_language(new_language)
         else:
             if current_lang == 'zh':
                 self.formatter.display_error(f"不支持的语言: {new_language}")
             else:
-                self.formatter.display_error(f"Unsupported language: {new_language}")
\ No newline at end of file
+                self.formatter.display_error(f"Unsupported language: {new_language}")
+    
+    def handle_daemon(self, action: str, idle_timeout: int):
+        """处理守护进程的启动、停止和状态查询"""
+        from ..daemon.server import DaemonCLI, start_daemon, is_daemon_running
+        from ..daemon.client import request_daemon
+        lang = self.i18n.get_language()
+        
+        if action == 'status':
+            status = request_daemon('status') if is_daemon_running() else None
+            if status:
+                if lang == 'zh':
+                    self.formatter.display_info(f"守护进程运行中 (pid {status['pid']}, 已处理 {status['requests']} 个请求): {status['socket']}")
+                else:
+                    self.formatter.display_info(f"Daemon running (pid {status['pid']}, {status['requests']} requests served): {status['socket']}")
+            else:
+                self.formatter.display_info("守护进程未运行" if lang == 'zh' else "Daemon is not running")
+            return
+        
+        if action == 'stop':
+            stopped = is_daemon_running() and request_daemon('shutdown') is not None
+            if lang == 'zh':
+                self.formatter.display_info("守护进程已停止" if stopped else "守护进程未运行")
+            else:
+                self.formatter.display_info("Daemon stopped" if stopped else "Daemon is not running")
+            return
+        
+        if is_daemon_running():
+            self.formatter.display_info("守护进程已在运行" if lang == 'zh' else "Daemon is already running")
+            return
+        
+        foreground = action == 'foreground'
+        pid = start_daemon(idle_timeout, DaemonCLI(), foreground=foreground)
+        if foreground:
+            return
+        if pid:
+            if lang == 'zh':
+                self.formatter.display_info(f"守护进程已启动 (pid {pid})，空闲 {idle_timeout} 秒后自动退出")
+            else:
+                self.formatter.display_info(f"Daemon started (pid {pid}), exits after {idle_timeout}s idle")
+        else:
+            self.formatter.display_error("守护进程启动失败" if lang == 'zh' else "Failed to start daemon")
@@ -7,9 +7,9 @@ import argparse
 from ..utils.i18n import I18nManager
 
 
-def create_parser():
+def create_parser(i18n: I18nManager = None):
     """创建命令行参数解析器"""
-    i18n = I18nManager()
+    i18n = i18n or I18nManager()
     lang = i18n.get_language()
     
     if lang == 'zh':
@@ -18,9 +18,16 @@ def create_parser():
 示例:
   clever ls                    # 查询ls命令
   clever -s file              # 搜索包含'file'的命令
+  clever -s 'tag:网络 AND (下载 OR 传输) NOT category:容器'   # 结构化查询
   clever -c 文件管理          # 显示文件管理类命令
   clever -l                   # 列出所有命令
   clever --stats              # 显示系统统计
+  clever --daemon             # 启动常驻守护进程加速查询
+  clever --batch names.txt    # 批量查询，每行输出一个JSON结果
+  clever -l --format tsv      # 以TSV格式列出所有命令
+  clever -s 压缩 --profile     # 在标准错误输出各阶段耗时
+  clever --watch              # 编辑知识库时增量更新索引
+  clever -s archive --lang en # 只对本次查询使用英文知识库，不切换界面语言
         """
         help_command = '要查询的命令名'
         help_search = '搜索包含关键词的命令'
@@ -29,15 +36,32 @@ def create_parser():
         help_categories = '列出所有命令分类'
         help_stats = '显示系统统计信息'
         help_refresh = '刷新数据缓存'
+        help_daemon = '管理常驻守护进程 (start/stop/status/foreground)，加速后续查询'
+        help_idle_timeout = '守护进程空闲多少秒后自动退出 (默认900)'
+        help_complete = '输出以指定前缀开头的命令名/分类/标签补全候选 (供shell补全使用)'
+        help_top = '搜索时每类结果最多显示N条 (按相关度排序)'
+        help_batch = '批量模式: 从文件(默认标准输入)逐行读取 lookup/search/category/similar 请求，每行输出一个JSON结果'
+        help_workers = '批量模式使用的进程数 (默认1)'
+        help_format = '以 json/jsonl/tsv 结构化格式输出查询、搜索、分类、列表和统计结果 (不带颜色)'
+        help_watch = '监视知识库源文件，修改后立即增量更新索引与缓存 (可指定检查间隔秒数，默认0.2)'
+        help_profile = '执行结束后在标准错误输出各阶段耗时、调用次数、读取文件数与解析字节数'
+        help_profile_memory = '同 --profile，并用 tracemalloc 统计各阶段内存峰值 (较慢)'
     else:
         description = "Linux Command Query Tool (Refactored Version)"
         epilog = """
 Examples:
   clever ls                    # Query ls command
   clever -s file              # Search commands containing 'file'
+  clever -s 'tag:network AND (download OR transfer) NOT category:container'   # Structured query
   clever -c file_management   # Show file management commands
   clever -l                   # List all commands
   clever --stats              # Show system statistics
+  clever --daemon             # Start the resident daemon for faster queries
+  clever --batch names.txt    # Batch queries, one JSON result per line
+  clever -l --format tsv      # List all commands as TSV
+  clever -s compress --profile  # Print per-phase timings to stderr
+  clever --watch              # Apply knowledge-base edits incrementally
+  clever -s 压缩 --lang zh     # Query the Chinese knowledge base once, keep the UI language
         """
         help_command = 'Command name to query'
         help_search = 'Search commands containing keyword'
@@ -46,6 +70,27 @@ Examples:
         help_categories = 'List all command categories'
         help_stats = 'Show system statistics'
         help_refresh = 'Refresh data cache'
+        help_daemon = 'Manage the resident daemon (start/stop/status/foreground) for faster queries'
+        help_idle_timeout = 'Seconds of inactivity before the daemon exits (default 900)'
+        help_complete = 'Print ranked command/category/tag completions for a prefix (for shell completion)'
+        help_top = 'Show at most N results per match group when searching (ranked by relevance)'
+        help_batch = 'Batch mode: read lookup/search/category/similar requests line by line from FILE (default stdin) and print one JSON result per line'
+        help_workers = 'Number of worker processes for batch mode (default 1)'
+        help_format = 'Emit lookup/search/category/list/stats results as json, jsonl or tsv (no colors)'
+        help_watch = 'Watch knowledge-base files and apply edits incrementally (optional poll interval in seconds, default 0.2)'
+        help_profile = 'Print per-phase timings, call counts, file reads and bytes parsed to stderr'
+        help_profile_memory = 'Like --profile, plus tracemalloc peak memory per phase (slower)'
+    
+    def positive_int(value: str) -> int:
+        """正整数参数 (如 --top)"""
+        try:
+            number = int(value)
+        except ValueError:
+            number = 0
+        if number <= 0:
+            message = f"必须是正整数: '{value}'" if lang == 'zh' else f"must be a positive integer: '{value}'"
+            raise argparse.ArgumentTypeError(message)
+        return number
     
     parser = argparse.ArgumentParser(
         description=description,
@@ -55,11 +100,22 @@ Examples:
     
     parser.add_argument('command', nargs='?', help=help_command)
     parser.add_argument('-s', '--search', help=help_search)
+    parser.add_argument('--top', type=positive_int, metavar='N', help=help_top)
     parser.add_argument('-c', '--category', help=help_category)
     parser.add_argument('-l', '--list', action='store_true', help=help_list)
     parser.add_argument('--categories', action='store_true', help=help_categories)
     parser.add_argument('--stats', action='store_true', help=help_stats)
     parser.add_argument('--refresh', action='store_true', help=help_refresh)
-    parser.add_argument('--lang', choices=['zh', 'en'], help='Set language / 设置语言')
+    parser.add_argument('--lang', choices=['zh', 'en'], help='Set language; with a query, applies to that query only / 设置语言；与查询一起使用时只对本次查询生效')
+    parser.add_argument('--daemon', nargs='?', const='start',
+                        choices=['start', 'stop', 'status', 'foreground'], help=help_daemon)
+    parser.add_argument('--idle-timeout', type=int, default=900, help=help_idle_timeout)
+    parser.add_argument('--complete', metavar='PREFIX', help=help_complete)
+    parser.add_argument('--batch', nargs='?', const='-', metavar='FILE', help=help_batch)
+    parser.add_argument('--workers', type=int, default=1, metavar='N', help=help_workers)
+    parser.add_argument('--format', choices=['json', 'jsonl', 'tsv'], help=help_format)
+    parser.add_argument('--watch', nargs='?', const=0.2, type=float, metavar='SECONDS', help=help_watch)
+    parser.add_argument('--profile', action='store_true', help=help_profile)
+    parser.add_argument('--profile-memory', action='store_true', help=help_profile_memory)
     
     return parser
\ No newline at end of file
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+结构化输出 - json/jsonl/tsv 记录通过同一个缓冲写入器输出，不经过彩色格式化
+"""
+
+import sys
+import json
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+OUTPUT_FORMATS = ('json', 'jsonl', 'tsv')
+# 缓冲区达到该大小时写出一次
+_FLUSH_THRESHOLD = 64 * 1024
+
+
+def _tsv_field(value: Any) -> str:
+    """TSV字段转义: 反斜杠、制表符与换行"""
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        value = ','.join(str(item) for item in value)
+    text = str(value)
+    if '\\' in text or '\t' in text or '\n' in text or '\r' in text:
+        text = text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return text
+
+
+class StructuredWriter:
+    """结构化记录写入器 - json 输出为一个数组，jsonl 每行一条记录，tsv 首行为表头"""
+
+    def __init__(self, output_format: str, stream: TextIO = None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"unsupported output format: {output_format}")
+        self.format = output_format
+        self.stream = stream or sys.stdout
+        self._buffer: List[str] = []
+        self._size = 0
+        self._count = 0
+        self._columns: Optional[List[str]] = None
+        self._array = False
+
+    def _write(self, text: str):
+        self._buffer.append(text)
+        self._size += len(text)
+        if self._size >= _FLUSH_THRESHOLD:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self.stream.write(''.join(self._buffer))
+            self._buffer = []
+            self._size = 0
+        self.stream.flush()
+
+    def write_record(self, record: Dict[str, Any], columns: List[str] = None):
+        """写入一条记录；tsv 按 columns 选列 (首条记录决定表头)"""
+        if self.format == 'jsonl':
+            self._write(json.dumps(record, ensure_ascii=False) + '\n')
+        elif self.format == 'json':
+            prefix = ',\n  ' if self._array else '[\n  '
+            self._array = True
+            self._write(prefix + json.dumps(record, ensure_ascii=False))
+        else:
+            if self._columns is None:
+                self._columns = columns or list(record)
+                self._write('\t'.join(self._columns) + '\n')
+            self._write('\t'.join(_tsv_field(record.get(column)) for column in self._columns) + '\n')
+        self._count += 1
+
+    def write_records(self, records: Iterable[Dict[str, Any]], columns: List[str] = None):
+        for record in records:
+            self.write_record(record, columns)
+
+    def write_document(self, document: str):
+        """原样写入一个完整文档 (如 export_command_data 的结果)"""
+        self._write(document if document.endswith('\n') else document + '\n')
+        self._count += 1
+
+    def close(self):
+        """结束输出: json 补全数组括号并写出缓冲区"""
+        if self.format == 'json':
+            if self._array:
+                self._write('\n]\n')
+            elif not self._count:
+                self._write('[]\n')
+        self.flush()
+
+
+def flatten(data: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """把嵌套字典展开为以点分隔键的单层字典 (用于tsv输出统计信息)"""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        else:
+            flat[name] = value
+    return flat
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+文本分析器 - 按语言把文本切分为索引词项；中文按单字+二元组(bigram)切分
+"""
+
+import re
+from typing import Dict, List
+
+# CJK统一表意文字 (含扩展A与兼容区)
+_CJK_RANGES = '㐀-䶿一-鿿豈-﫿'
+_CJK_RUN = re.compile(f'[{_CJK_RANGES}]+')
+_MIXED_RUN = re.compile(f'[{_CJK_RANGES}]+|[^\\W{_CJK_RANGES}]+')
+
+
+class Analyzer:
+    """默认分析器 - 按 \\w+ 切词并丢弃单字符词"""
+
+    name = 'word'
+
+    def analyze(self, text: str) -> List[str]:
+        """索引时的词项序列 (保留重复，用于词频统计)"""
+        words = re.findall(r'\w+', text.lower())
+        return [word for word in words if len(word) > 1]
+
+    def query_groups(self, text: str) -> List[List[str]]:
+        """查询切分: 每组内的词项须同时命中同一字段 (组间为或关系)"""
+        return [[word] for word in self.analyze(text)]
+
+
+class CJKAnalyzer(Analyzer):
+    """中文分析器 - 中文片段索引为单字与相邻二元组，查询按二元组切分后求交集"""
+
+    name = 'cjk'
+
+    def analyze(self, text: str) -> List[str]:
+        tokens = []
+        for run in _MIXED_RUN.findall(text.lower()):
+            if _CJK_RUN.fullmatch(run):
+                tokens.extend(run)
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            elif len(run) > 1:
+                tokens.append(run)
+        return tokens
+
+    def query_groups(self, text: str) -> List[List[str]]:
+        groups = []
+        for run in _MIXED_RUN.findall(text.lower()):
+            if _CJK_RUN.fullmatch(run):
+                if len(run) == 1:
+                    groups.append([run])
+                else:
+                    groups.append(list(dict.fromkeys(run[i:i + 2] for i in range(len(run) - 1))))
+            elif len(run) > 1:
+                groups.append([run])
+        return groups
+
+
+_ANALYZERS: Dict[str, Analyzer] = {
+    'zh': CJKAnalyzer(),
+    'en': Analyzer(),
+}
+
+
+def get_analyzer(language: str) -> Analyzer:
+    """按语言获取分析器 (未知语言使用默认分析器)"""
+    return _ANALYZERS.get(language, _ANALYZERS['en'])
+
+
+if __name__ == "__main__":
+    analyzer = get_analyzer('zh')
+    print(analyzer.analyze("更改当前工作目录 cd命令"))
+    print(analyzer.query_groups("工作目录 tar"))
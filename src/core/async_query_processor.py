@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+异步查询处理器 - 供 asyncio 服务嵌入的 QueryProcessor 门面
+
+阻塞的加载与搜索放到执行器中运行，事件循环不会被文件I/O和JSON解析卡住；
+同一时刻相同的请求 (如同一个未缓存命令) 合并为一次加载；
+信号量限制同时进行的请求数，排队中的请求可以被取消，也可以设置超时。
+"""
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .query_processor import QueryProcessor
+
+
+class AsyncQueryProcessor:
+    """异步查询处理器 - 包装一个同步 QueryProcessor"""
+
+    def __init__(self, processor: QueryProcessor = None, max_concurrency: int = 4,
+                 executor: Executor = None, timeout: float = None, **processor_kwargs):
+        # 创建同步处理器会读取快照，请在启动阶段 (事件循环开始处理请求前) 构造
+        self.processor = processor or QueryProcessor(**processor_kwargs)
+        self.max_concurrency = max(1, max_concurrency)
+        # 默认超时 (秒)，None 表示不限时；各方法也可单独指定
+        self.timeout = timeout
+        # QueryProcessor 可在线程间共享，默认每个并发名额一个工作线程
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                        thread_name_prefix='clever-query')
+        # 信号量在首次使用时创建，绑定到实际运行的事件循环
+        self._semaphore = None
+        # 进行中的请求: (方法名, 参数) -> 共享的任务
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._waiters: Dict[Tuple, int] = {}
+        self.stats = {'requests': 0, 'coalesced': 0, 'cancelled': 0, 'timeouts': 0}
+
+    async def __aenter__(self) -> 'AsyncQueryProcessor':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """关闭自行创建的执行器 (不等待仍在运行的加载)"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def _run(self, func: Callable, *args) -> Any:
+        """在执行器中运行阻塞调用，同时进行的调用数受信号量限制"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            future = self._executor.submit(func, *args)
+            waiter = asyncio.wrap_future(future)
+            try:
+                return await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                # 尚未开始的调用直接撤销；已经开始的阻塞调用无法中断，等它结束后再释放并发名额
+                if not future.cancel():
+                    await asyncio.wait([waiter])
+                raise
+
+    async def _call(self, name: str, func: Callable, *args, timeout: float = None) -> Any:
+        """执行一次请求: 相同的进行中请求共享同一个任务，单个等待者取消或超时不影响其他等待者，
+        全部等待者都离开时撤销该任务"""
+        self.stats['requests'] += 1
+        key = (name,) + args
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(func, *args))
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.stats['coalesced'] += 1
+
+        self._waiters[key] += 1
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise
+        except asyncio.CancelledError:
+            self.stats['cancelled'] += 1
+            raise
+        finally:
+            if self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+                if not self._waiters[key] and not task.done():
+                    self._forget(key, task)
+                    task.cancel()
+
+    def _forget(self, key: Tuple, task: asyncio.Future):
+        """移出进行中的请求表 (任务已被新的同名请求替换时不动)"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+
+    async def query_command(self, command_name: str, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """查询单个命令的详细信息"""
+        return await self._call('query_command', self.processor.query_command, command_name, timeout=timeout)
+
+    async def search_commands(self, query: str, search_type: str = 'enhanced', top_k: int = None,
+                              timeout: float = None) -> Dict[str, Any]:
+        """搜索命令"""
+        return await self._call('search_commands', self.processor.search_commands,
+                                query, search_type, top_k, timeout=timeout)
+
+    async def get_category_commands(self, category: str, timeout: float = None) -> Dict[str, Any]:
+        """获取分类下的所有命令"""
+        return await self._call('get_category_commands', self.processor.get_category_commands,
+                                category, timeout=timeout)
+
+    async def find_similar_commands(self, command: str, threshold: float = 0.6,
+                                    timeout: float = None) -> List[Dict[str, Any]]:
+        """查找相似命令"""
+        return await self._call('find_similar_commands', self.processor.find_similar_commands,
+                                command, threshold, timeout=timeout)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取请求统计 (总数/合并/取消/超时) 及当前进行中的请求数"""
+        return dict(self.stats, inflight=len(self._inflight))
+
+
+if __name__ == "__main__":
+    # 测试异步查询处理器
+    async def main():
+        async with AsyncQueryProcessor(max_concurrency=2) as processor:
+            # 五个并发的相同查询只加载一次
+            results = await asyncio.gather(*(processor.query_command('tar') for _ in range(5)))
+            print(f"tar: {results[0]['description'] if results[0] else '未找到'}")
+
+            search = await processor.search_commands('压缩', top_k=5)
+            print(f"搜索'压缩': {[name for names in search.values() for name in names][:5]}")
+
+            category = await processor.get_category_commands('compression')
+            print(f"compression 分类: {list(category['commands'])}")
+
+            similar = await processor.find_similar_commands('gerp')
+            print(f"相似命令: {[item['command'] for item in similar]}")
+            print(f"统计: {processor.get_stats()}")
+
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+批量查询 - 逐行读取 lookup/search/category/similar 请求，每个请求输出一行JSON结果
+"""
+
+import json
+import multiprocessing
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .query_processor import QueryProcessor
+
+BATCH_OPERATIONS = ('lookup', 'search', 'category', 'similar')
+SUPPORTED_LANGUAGES = ('zh', 'en')
+# 每批预取的请求数: 批内的查找请求合并为一次按文件分组的加载
+DEFAULT_CHUNK_SIZE = 256
+
+# 进程池子进程使用的处理器 (fork 前在父进程中预热，子进程以写时复制方式共享只读索引)
+_worker_batch = None
+
+
+def parse_request(line: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """解析一行请求: "ls" / "search 压缩" / {"op": "similar", "query": "gti", "lang": "en"}，空行和注释返回None"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    if line.startswith('{'):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return ('invalid', line, None)
+        if not isinstance(request, dict):
+            return ('invalid', line, None)
+        op = str(request.get('op', 'lookup'))
+        query = request.get('query', request.get('command', ''))
+        # 可选的 lang 字段: 该请求查询的知识库语言
+        language = request.get('lang')
+        if language is not None and language not in SUPPORTED_LANGUAGES:
+            return ('invalid', line, None)
+        return (op if op in BATCH_OPERATIONS else 'invalid', str(query), language)
+
+    op, _, rest = line.partition(' ')
+    if op in BATCH_OPERATIONS and rest.strip():
+        return (op, rest.strip(), None)
+    return ('lookup', line, None)
+
+
+class BatchProcessor:
+    """批量查询执行器 - 所有请求共用一个 QueryProcessor"""
+
+    def __init__(self, processor: QueryProcessor = None):
+        self.processor = processor or QueryProcessor()
+
+    def warm_up(self, languages: Iterable[Optional[str]] = ()):
+        """预先加载默认语言及 languages 中各语言的知识库与搜索索引 (在 fork 进程池之前调用)"""
+        for language in {None} | set(languages):
+            processor = self.processor.for_language(language)
+            processor.data_manager.get_location_index()
+            processor.search_engine.warm_up()
+
+    def execute(self, op: str, query: str, preloaded: Dict[str, Dict[str, Any]] = None,
+                language: str = None) -> Dict[str, Any]:
+        """执行单个请求并返回可序列化的结果 (language 指定时查询该语言的常驻处理器)"""
+        result = {'op': op, 'query': query}
+        if language:
+            result['lang'] = language
+        processor = self.processor.for_language(language)
+        try:
+            if op == 'lookup':
+                command_data = (preloaded or {}).get(query) or processor.query_command(query)
+                result['found'] = command_data is not None
+                if command_data is not None:
+                    result['result'] = command_data
+                else:
+                    result['suggestions'] = [item['command'] for item in processor.find_similar_commands(query)]
+            elif op == 'search':
+                result['result'] = processor.search_commands(query)
+                result['found'] = any(result['result'].values())
+            elif op == 'category':
+                names = processor.data_manager.get_commands_by_category(query)
+                result['found'] = bool(names)
+                result['result'] = names
+            elif op == 'similar':
+                result['result'] = processor.find_similar_commands(query)
+                result['found'] = bool(result['result'])
+            else:
+                result['error'] = f"invalid request: {query}"
+        except Exception as e:
+            result['error'] = str(e)
+        return result
+
+    def execute_chunk(self, requests: List[Tuple[int, str, str, Optional[str]]]) -> List[str]:
+        """执行一批请求，返回JSON行 (批内查找请求按语言和源文件分组一次加载)"""
+        lookups = {}
+        for _, op, query, language in requests:
+            if op == 'lookup':
+                lookups.setdefault(language, []).append(query)
+        preloaded = {language: self.processor.for_language(language).query_commands(names)
+                     for language, names in lookups.items()}
+        lines = []
+        for line_no, op, query, language in requests:
+            result = {'line': line_no}
+            result.update(self.execute(op, query, preloaded.get(language), language))
+            lines.append(json.dumps(result, ensure_ascii=False))
+        return lines
+
+    def run(self, lines: Iterable[str], workers: int = 1,
+            chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+        """按输入顺序产出结果行；workers>1 时使用进程池并行执行"""
+        chunks = _chunk_requests(lines, chunk_size)
+        if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            for chunk in chunks:
+                yield from self.execute_chunk(chunk)
+            return
+
+        # 进程池会提前读完全部请求; 这里先收集请求，fork 前预热其中出现的每种语言，子进程不必各自加载
+        chunks = list(chunks)
+        global _worker_batch
+        self.warm_up(request[3] for chunk in chunks for request in chunk)
+        _worker_batch = self
+        try:
+            context = multiprocessing.get_context('fork')
+            with context.Pool(workers) as pool:
+                for result_lines in pool.imap(_execute_in_worker, chunks):
+                    yield from result_lines
+        finally:
+            _worker_batch = None
+
+
+def _chunk_requests(lines: Iterable[str], chunk_size: int) -> Iterator[List[Tuple[int, str, str, Optional[str]]]]:
+    chunk = []
+    for line_no, line in enumerate(lines, 1):
+        request = parse_request(line)
+        if request is None:
+            continue
+        chunk.append((line_no,) + request)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _execute_in_worker(chunk: List[Tuple[int, str, str, Optional[str]]]) -> List[str]:
+    return _worker_batch.execute_chunk(chunk)
+
+
+if __name__ == "__main__":
+    batch = BatchProcessor()
+    for output_line in batch.run(["ls", "search 压缩", "category compression", "similar gti", "nosuchcmd",
+                                  '{"op": "search", "query": "compress", "lang": "en"}']):
+        print(output_line)
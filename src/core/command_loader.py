@@ -6,33 +6,32 @@
 import os
 import json
 from typing import Dict, List, Optional, Any
-from ..data.data_manager import DataManager, CacheManager
+from ..data.data_manager import DataManager
+from ..utils.counters import ThreadLocalCounters
 
 class CommandLoader:
     """命令加载器 - 实现懒加载和缓存管理"""
     
     def __init__(self, data_manager: DataManager = None):
         self.data_manager = data_manager or DataManager()
-        self.cache_manager = CacheManager(max_size=50)  # 缓存最多50个命令
-        self.load_stats = {
-            'cache_hits': 0,
-            'cache_misses': 0,
-            'total_loads': 0
-        }
+        # 与数据管理器共享同一缓存层，避免同一记录被缓存两次
+        self.cache_manager = self.data_manager.commands_cache
+        # 按线程计数，多线程查询时无需加锁
+        self.load_stats = ThreadLocalCounters(('cache_hits', 'cache_misses', 'total_loads'))
     
     def load_command(self, command_name: str) -> Optional[Dict[str, Any]]:
         """加载单个命令，优先从缓存获取"""
-        self.load_stats['total_loads'] += 1
+        self.load_stats.add('total_loads')
         
         # 尝试从缓存获取
         cached_command = self.cache_manager.get(command_name)
-        if cached_command:
-            self.load_stats['cache_hits'] += 1
+        if cached_command is not None:
+            self.load_stats.add('cache_hits')
             return cached_command
         
-        # 从数据管理器加载
-        self.load_stats['cache_misses'] += 1
-        command_data = self.data_manager.load_command(command_name)
+        # 从数据源加载
+        self.load_stats.add('cache_misses')
+        command_data = self.data_manager.fetch_command(command_name)
         
         if command_data:
             # 添加到缓存
@@ -42,14 +41,29 @@ class CommandLoader:
         return None
     
     def load_commands_batch(self, command_names: List[str]) -> Dict[str, Dict[str, Any]]:
-        """批量加载命令"""
-        results = {}
+        """批量加载命令: 先查缓存，未命中的按源文件分组一次读取"""
+        cached = {}
+        missing = []
+        for command_name in dict.fromkeys(command_names):
+            self.load_stats.add('total_loads')
+            command_data = self.cache_manager.get(command_name)
+            if command_data is not None:
+                self.load_stats.add('cache_hits')
+                cached[command_name] = command_data
+            else:
+                self.load_stats.add('cache_misses')
+                missing.append(command_name)
+        
+        fetched = self.data_manager.fetch_commands(missing) if missing else {}
+        for command_name, command_data in fetched.items():
+            self.cache_manager.put(command_name, command_data)
         
+        # 保持请求顺序
+        results = {}
         for command_name in command_names:
-            command_data = self.load_command(command_name)
+            command_data = cached.get(command_name) or fetched.get(command_name)
             if command_data:
                 results[command_name] = command_data
-        
         return results
     
     def load_category_commands(self, category: str) -> Dict[str, Dict[str, Any]]:
@@ -77,22 +91,20 @@ class CommandLoader:
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
-        stats = self.load_stats.copy()
+        stats = self.load_stats.totals()
         stats['cache_size'] = self.cache_manager.size()
+        stats['cache_bytes'] = self.cache_manager.current_bytes
         stats['cache_hit_rate'] = (
             stats['cache_hits'] / stats['total_loads'] * 100 
             if stats['total_loads'] > 0 else 0
         )
+        stats['tiers'] = self.data_manager.get_cache_stats()
         return stats
     
     def clear_cache(self):
         """清空缓存"""
         self.cache_manager.clear()
-        self.load_stats = {
-            'cache_hits': 0,
-            'cache_misses': 0,
-            'total_loads': 0
-        }
+        self.load_stats.reset()
     
     def get_available_commands(self) -> List[str]:
         """获取所有可用命令列表"""
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+模糊匹配索引 - 二元组(bigram)候选过滤 + 长度剪枝 + SequenceMatcher精确打分 + 堆选取top-k
+"""
+
+import heapq
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 首尾填充字符，使首/尾字符也参与bigram匹配
+_PAD = '\x00'
+
+
+def _bigrams(text: str) -> set:
+    padded = f"{_PAD}{text}{_PAD}"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class FuzzyIndex:
+    """模糊匹配索引 - 只对与查询共享bigram且长度可能达到阈值的候选计算相似度"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        """entries: (匹配文本, 结果键) 序列，同一结果键可以对应多个文本"""
+        self.texts = []
+        self.keys = []
+        self.grams = {}
+        for text, key in entries:
+            if not text:
+                continue
+            text_id = len(self.texts)
+            text = text.lower()
+            self.texts.append(text)
+            self.keys.append(key)
+            for gram in _bigrams(text):
+                self.grams.setdefault(gram, []).append(text_id)
+
+    @classmethod
+    def from_terms(cls, terms: Iterable[str]) -> 'FuzzyIndex':
+        """以术语本身作为结果键构建索引"""
+        return cls((term, term) for term in terms)
+
+    def _candidates(self, query: str, threshold: float) -> Dict[int, int]:
+        """收集共享bigram的候选，并按长度上界剪枝 (ratio <= 2*min(la,lb)/(la+lb))"""
+        la = len(query)
+        min_len = la * threshold / (2 - threshold)
+        max_len = la * (2 - threshold) / threshold if threshold > 0 else float('inf')
+
+        counts = {}
+        for gram in _bigrams(query):
+            for text_id in self.grams.get(gram, ()):
+                counts[text_id] = counts.get(text_id, 0) + 1
+        return {
+            text_id: count for text_id, count in counts.items()
+            if min_len <= len(self.texts[text_id]) <= max_len
+        }
+
+    def search(self, query: str, threshold: float = 0.6,
+               limit: Optional[int] = 10) -> List[Tuple[str, float]]:
+        """返回相似度不低于阈值的结果键及相似度，按相似度降序 (同一键取最高分)"""
+        query = query.lower()
+        if not query:
+            return []
+
+        best = {}
+        # quick_ratio 是对称的字符多重集上界；把查询放在seq2可复用其字符计数
+        bound = SequenceMatcher(None, '', query)
+        matcher = SequenceMatcher(None, query)
+        for text_id in self._candidates(query, threshold):
+            text = self.texts[text_id]
+            bound.set_seq1(text)
+            if bound.quick_ratio() < threshold:
+                continue
+            # 精确相似度与 SequenceMatcher(None, query, text).ratio() 一致
+            matcher.set_seq2(text)
+            score = matcher.ratio()
+            if score >= threshold:
+                key = self.keys[text_id]
+                if score > best.get(key, -1.0):
+                    best[key] = score
+
+        # 相似度降序，同分按键名排序保证结果稳定
+        order = lambda item: (-item[1], item[0])
+        if limit is None:
+            return sorted(best.items(), key=order)
+        return heapq.nsmallest(limit, best.items(), key=order)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+并行建索引 - 每个分类分片独立分词并生成局部倒排索引，再确定性地合并
+
+合并结果与按文档ID顺序逐个建索引完全一致 (包括字典的插入顺序)，因此持久化的索引文件逐字节相同:
+局部索引为每个词项、(词项, 字段)、标签和字段长度记录首次出现的位置 (文档ID, 调用序号, 词序)，
+合并时按首次出现位置排序。
+"""
+
+import sys
+from typing import Any, Dict, List, Tuple
+from .analyzer import get_analyzer
+from ..utils.parallel import parallel_map, resolve_workers
+
+# 一个分片的建索引任务: (相对路径, [(命令名, 分片内的键, 文档ID)])
+ShardTask = Tuple[str, List[Tuple[str, str, int]]]
+
+# 进程池子进程读取分片所用的数据管理器 (fork 前设置，子进程继承)
+_worker_source = None
+
+
+class _ShardIndexer:
+    """单个分片的局部索引"""
+
+    def __init__(self, language: str):
+        self.analyze = get_analyzer(language).analyze
+        self.search_index: Dict[str, Dict[str, Dict[int, int]]] = {}
+        self.tag_index: Dict[str, List[int]] = {}
+        self.doc_lengths: Dict[str, Dict[int, int]] = {}
+        # 首次出现位置
+        self.word_first: Dict[str, tuple] = {}
+        self.source_first: Dict[Tuple[str, str], tuple] = {}
+        self.tag_first: Dict[str, tuple] = {}
+        self.length_first: Dict[str, tuple] = {}
+        self._doc_id = 0
+        self._seq = 0
+
+    def add_text(self, text: str, source: str):
+        if not text:
+            return
+        self._seq += 1
+        doc_id, seq = self._doc_id, self._seq
+        words = self.analyze(text)
+        for position, word in enumerate(words):
+            sources = self.search_index.get(word)
+            if sources is None:
+                sources = self.search_index[word] = {}
+                self.word_first[word] = (doc_id, seq, position)
+            postings = sources.get(source)
+            if postings is None:
+                postings = sources[source] = {}
+                self.source_first[(word, source)] = (doc_id, seq, position)
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+
+        lengths = self.doc_lengths.get(source)
+        if lengths is None:
+            lengths = self.doc_lengths[source] = {}
+            self.length_first[source] = (doc_id, seq)
+        lengths[doc_id] = lengths.get(doc_id, 0) + len(words)
+
+    def add_tag(self, tag: str):
+        self._seq += 1
+        doc_ids = self.tag_index.get(tag)
+        if doc_ids is None:
+            doc_ids = self.tag_index[tag] = []
+            self.tag_first[tag] = (self._doc_id, self._seq)
+        if not doc_ids or doc_ids[-1] != self._doc_id:
+            doc_ids.append(self._doc_id)
+
+    def add_command(self, doc_id: int, command_name: str, command_data: Dict[str, Any]):
+        """按与串行构建相同的字段顺序索引一个命令"""
+        self._doc_id = doc_id
+        self._seq = 0
+        self.add_text(command_name, 'name')
+        self.add_text(command_data.get('description', ''), 'description')
+        self.add_text(command_data.get('category', ''), 'category')
+        for option in command_data.get('options', []):
+            self.add_text(option.get('description', ''), 'option')
+        for example in command_data.get('examples', []):
+            self.add_text(example.get('description', ''), 'example')
+        for tag in command_data.get('tags', []):
+            self.add_tag(tag)
+            self.add_text(tag, 'tag')
+
+    def to_partial(self) -> tuple:
+        return (self.search_index, self.tag_index, self.doc_lengths,
+                self.word_first, self.source_first, self.tag_first, self.length_first)
+
+
+def index_shard(records: Dict[str, Dict[str, Any]], entries: List[Tuple[str, str, int]], language: str) -> tuple:
+    """为一个分片中的命令生成局部索引 (entries 须按文档ID升序)"""
+    indexer = _ShardIndexer(language)
+    for command_name, key, doc_id in entries:
+        command_data = records.get(key)
+        if command_data is not None:
+            indexer.add_command(doc_id, command_name, command_data)
+    return indexer.to_partial()
+
+
+def _index_task(task: Tuple[str, ShardTask]) -> tuple:
+    language, (rel_path, entries) = task
+    return index_shard(_worker_source.load_shard(rel_path), entries, language)
+
+
+def merge_partials(partials: List[tuple]) -> Tuple[Dict[str, Any], Dict[str, set], Dict[str, Dict[int, int]]]:
+    """合并局部索引，键的顺序按首次出现位置排列 (与串行构建一致)"""
+    search_index: Dict[str, Dict[str, Dict[int, int]]] = {}
+    word_first: Dict[str, tuple] = {}
+    source_first: Dict[Tuple[str, str], tuple] = {}
+    tag_index: Dict[str, set] = {}
+    tag_first: Dict[str, tuple] = {}
+    doc_lengths: Dict[str, Dict[int, int]] = {}
+    length_first: Dict[str, tuple] = {}
+
+    if len(partials) == 1:
+        # 串行构建只有一个局部索引，无需复制倒排表，只需重排键的顺序
+        search_index, tag_index, doc_lengths, word_first, source_first, tag_first, length_first = partials[0]
+        partials = []
+
+    for part_index, part_tags, part_lengths, part_word, part_source, part_tag, part_length in partials:
+        # 子进程回传的字段名是各自独立的字符串对象，驻留后与串行构建共享同一对象，
+        # marshal 写出的对象引用才会完全相同
+        for word, sources in part_index.items():
+            merged = search_index.setdefault(word, {})
+            for source, postings in sources.items():
+                merged.setdefault(sys.intern(source), {}).update(postings)
+        for tag, doc_ids in part_tags.items():
+            tag_index.setdefault(tag, set()).update(doc_ids)
+        for source, lengths in part_lengths.items():
+            doc_lengths.setdefault(sys.intern(source), {}).update(lengths)
+        _keep_first(word_first, part_word)
+        _keep_first(source_first, part_source)
+        _keep_first(tag_first, part_tag)
+        _keep_first(length_first, part_length)
+
+    ordered_index = {}
+    for word in sorted(search_index, key=word_first.__getitem__):
+        sources = search_index[word]
+        ordered_index[word] = {
+            source: sources[source]
+            for source in sorted(sources, key=lambda source: source_first[(word, source)])
+        }
+    ordered_tags = {tag: tag_index[tag] for tag in sorted(tag_index, key=tag_first.__getitem__)}
+    ordered_lengths = {source: doc_lengths[source] for source in sorted(doc_lengths, key=length_first.__getitem__)}
+    return ordered_index, ordered_tags, ordered_lengths
+
+
+def _keep_first(target: Dict[Any, tuple], positions: Dict[Any, tuple]):
+    for key, position in positions.items():
+        current = target.get(key)
+        if current is None or position < current:
+            target[key] = position
+
+
+def build_partials(data_source, language: str, tasks: List[ShardTask], total_bytes: int) -> List[tuple]:
+    """为每个分片生成局部索引；知识库足够大时分发到进程池 (data_source 需提供 load_shard)"""
+    global _worker_source
+    workers = resolve_workers(total_bytes, len(tasks))
+    if workers <= 1:
+        # 串行时按文档ID顺序写入同一个局部索引，首次出现位置即为最小位置
+        indexer = _ShardIndexer(language)
+        shards = {rel_path: data_source.load_shard(rel_path) for rel_path, _ in tasks}
+        entries = sorted(((doc_id, rel_path, command_name, key)
+                          for rel_path, shard_entries in tasks
+                          for command_name, key, doc_id in shard_entries))
+        for doc_id, rel_path, command_name, key in entries:
+            command_data = shards[rel_path].get(key)
+            if command_data is not None:
+                indexer.add_command(doc_id, command_name, command_data)
+        return [indexer.to_partial()]
+
+    _worker_source = data_source
+    try:
+        return parallel_map(_index_task, [(language, task) for task in tasks], workers)
+    finally:
+        _worker_source = None
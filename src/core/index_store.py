@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+搜索索引持久化 - 将倒排索引与标签索引保存为与知识库内容绑定的版本化文件
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+from ..data.snapshot import dump_artifact, read_artifact
+from ..utils.file_utils import atomic_write_bytes
+from .postings import from_bytes, to_bytes
+
+INDEX_MAGIC = b'CLVRIDX\x00'
+INDEX_VERSION = 4
+COMPLETION_MAGIC = b'CLVRCMPL'
+COMPLETION_VERSION = 1
+
+
+def save_search_index(path: str, content_digest: str, doc_names: List[str], search_index: Dict[str, Any],
+                      tag_index: Dict[str, Any], doc_lengths: Dict[str, Any]) -> bool:
+    """原子写入搜索索引，并发调用者永远不会读到半写的文件 (倒排表以原始字节存储)"""
+    payload = (
+        content_digest,
+        doc_names,
+        {word: {source: (to_bytes(ids), to_bytes(tfs)) for source, (ids, tfs) in sources.items()}
+         for word, sources in search_index.items()},
+        {tag: to_bytes(ids) for tag, ids in tag_index.items()},
+        {source: to_bytes(lengths) for source, lengths in doc_lengths.items()},
+    )
+    return atomic_write_bytes(path, dump_artifact(INDEX_MAGIC, INDEX_VERSION, payload))
+
+
+def load_search_index(path: str, content_digest: str) -> Optional[Tuple[Any, ...]]:
+    """加载搜索索引 (命令名表, 倒排索引, 标签索引, 字段长度)，仅当其对应的知识库内容摘要一致时返回"""
+    payload = read_artifact(path, INDEX_MAGIC, INDEX_VERSION)
+    if not isinstance(payload, tuple) or len(payload) != 5:
+        return None
+    stored_digest, doc_names, search_index, tag_index, doc_lengths = payload
+    if stored_digest != content_digest:
+        return None
+    search_index = {
+        word: {source: (from_bytes(ids), from_bytes(tfs)) for source, (ids, tfs) in sources.items()}
+        for word, sources in search_index.items()
+    }
+    tag_index = {tag: from_bytes(ids) for tag, ids in tag_index.items()}
+    doc_lengths = {source: from_bytes(lengths) for source, lengths in doc_lengths.items()}
+    return doc_names, search_index, tag_index, doc_lengths
+
+
+def save_completion_index(path: str, content_digest: str, payload: tuple) -> bool:
+    """原子写入补全索引"""
+    return atomic_write_bytes(path, dump_artifact(COMPLETION_MAGIC, COMPLETION_VERSION, (content_digest, payload)))
+
+
+def load_completion_index(path: str, content_digest: str) -> Optional[tuple]:
+    """加载补全索引，仅当其对应的知识库内容摘要一致时返回"""
+    stored = read_artifact(path, COMPLETION_MAGIC, COMPLETION_VERSION)
+    if not isinstance(stored, tuple) or len(stored) != 2 or stored[0] != content_digest:
+        return None
+    return stored[1]
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+倒排表 - 以升序 array('I') 存储的整数文档ID，线性归并求交集/并集
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence
+
+# 两个倒排表长度相差超过该倍数时改为逐个二分查找 (跳跃式交集)
+_GALLOP_RATIO = 16
+
+
+def new_postings(ids: Iterable[int] = ()) -> array:
+    """创建倒排表"""
+    return array('I', ids)
+
+
+def intersect(a: Sequence[int], b: Sequence[int]) -> array:
+    """两个升序倒排表的交集"""
+    if len(a) > len(b):
+        a, b = b, a
+    result = array('I')
+    if not a:
+        return result
+
+    if len(a) * _GALLOP_RATIO < len(b):
+        lo, hi = 0, len(b)
+        for doc in a:
+            lo = bisect_left(b, doc, lo, hi)
+            if lo == hi:
+                break
+            if b[lo] == doc:
+                result.append(doc)
+        return result
+
+    i = j = 0
+    len_a, len_b = len(a), len(b)
+    while i < len_a and j < len_b:
+        x, y = a[i], b[j]
+        if x == y:
+            result.append(x)
+            i += 1
+            j += 1
+        elif x < y:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def intersect_all(lists: List[Sequence[int]]) -> array:
+    """多个倒排表的交集 (从最短的开始，结果只会越来越短)"""
+    if not lists:
+        return array('I')
+    lists = sorted(lists, key=len)
+    result = array('I', lists[0])
+    for other in lists[1:]:
+        if not result:
+            break
+        result = intersect(result, other)
+    return result
+
+
+def difference(a: Sequence[int], b: Sequence[int]) -> array:
+    """a 中不在 b 里的文档 (线性归并)"""
+    result = array('I')
+    j, len_b = 0, len(b)
+    for doc in a:
+        while j < len_b and b[j] < doc:
+            j += 1
+        if j == len_b or b[j] != doc:
+            result.append(doc)
+    return result
+
+
+def union_all(lists: Iterable[Sequence[int]]) -> array:
+    """多个倒排表的并集 (k路归并去重)"""
+    result = array('I')
+    last = -1
+    for doc in heapq.merge(*lists):
+        if doc != last:
+            result.append(doc)
+            last = doc
+    return result
+
+
+def remove_doc(ids: array, doc_id: int, tfs: array = None) -> bool:
+    """从倒排表中删除一个文档 (就地修改，词频数组同步删除)"""
+    i = bisect_left(ids, doc_id)
+    if i == len(ids) or ids[i] != doc_id:
+        return False
+    del ids[i]
+    if tfs is not None:
+        del tfs[i]
+    return True
+
+
+def insert_doc(ids: array, doc_id: int, tfs: array = None, tf: int = 0):
+    """向倒排表中插入一个文档并保持升序 (已存在时更新词频)"""
+    i = bisect_left(ids, doc_id)
+    if i < len(ids) and ids[i] == doc_id:
+        if tfs is not None:
+            tfs[i] = tf
+        return
+    ids.insert(i, doc_id)
+    if tfs is not None:
+        tfs.insert(i, tf)
+
+
+def freeze(postings: Dict[int, int]) -> tuple:
+    """把构建期的 {文档ID: 词频} 转换为 (升序ID数组, 对应词频数组)"""
+    ids = array('I', sorted(postings))
+    return ids, array('I', (postings[doc] for doc in ids))
+
+
+def to_bytes(postings: array) -> bytes:
+    """序列化倒排表 (本机字节序，仅用于本机缓存文件)"""
+    return postings.tobytes()
+
+
+def from_bytes(data: bytes) -> array:
+    """反序列化倒排表"""
+    postings = array('I')
+    postings.frombytes(data)
+    return postings
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+前缀索引 - 基于排序数组+二分查找的前缀匹配，以及基于拼接串的子串匹配
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+# 子串索引中键之间的分隔符 (不会出现在命令名/标签中)
+_SEPARATOR = '\x00'
+
+
+class PrefixIndex:
+    """前缀/子串索引 - 术语按小写排序存储，前缀查询 O(log n + k)"""
+
+    def __init__(self, terms: Iterable[str]):
+        pairs = sorted({(term.lower(), term) for term in terms if term})
+        self.keys = [key for key, _ in pairs]
+        self.terms = [term for _, term in pairs]
+        self._haystack = None
+        self._offsets = None
+
+    @classmethod
+    def from_sorted(cls, keys: List[str], terms: List[str]) -> 'PrefixIndex':
+        """由已排序的键/术语数组直接构造 (加载持久化数据时跳过排序)"""
+        index = cls(())
+        index.keys = keys
+        index.terms = terms
+        return index
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __contains__(self, term: str) -> bool:
+        key = term.lower()
+        pos = bisect_left(self.keys, key)
+        return pos < len(self.keys) and self.keys[pos] == key
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """以prefix开头的术语在排序数组中的区间 [lo, hi)"""
+        key = prefix.lower()
+        lo = bisect_left(self.keys, key)
+        hi = bisect_left(self.keys, key + '\U0010ffff', lo)
+        return lo, hi
+
+    def prefix(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """返回以prefix开头的术语 (按字典序)"""
+        lo, hi = self.prefix_range(prefix)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self.terms[lo:hi]
+
+    def shortest_with_prefix(self, prefix: str, limit: int) -> List[str]:
+        """返回以prefix开头的最短的limit个术语 (堆选择，不排序整个区间)"""
+        lo, hi = self.prefix_range(prefix)
+        keys = self.keys
+        ids = heapq.nsmallest(limit, range(lo, hi), key=lambda i: (len(keys[i]), keys[i]))
+        return [self.terms[i] for i in ids]
+
+    def _build_haystack(self):
+        """把所有键用分隔符拼接成一个字符串，并记录每个键的起始偏移"""
+        offsets = []
+        pos = 0
+        for key in self.keys:
+            offsets.append(pos)
+            pos += len(key) + 1
+        self._haystack = _SEPARATOR.join(self.keys)
+        self._offsets = offsets
+
+    def contains(self, substring: str) -> List[str]:
+        """返回包含substring的术语，按匹配位置和长度排序"""
+        key = substring.lower()
+        if not key or _SEPARATOR in key:
+            return []
+        if self._haystack is None:
+            self._build_haystack()
+
+        # 在拼接串上用C实现的 str.find 定位，再二分映射回术语编号
+        haystack, offsets = self._haystack, self._offsets
+        matches = []
+        last_id = -1
+        pos = haystack.find(key)
+        while pos >= 0:
+            term_id = bisect_right(offsets, pos) - 1
+            if term_id != last_id:
+                matches.append((pos - offsets[term_id], len(self.keys[term_id]), self.keys[term_id], term_id))
+                last_id = term_id
+            pos = haystack.find(key, pos + 1)
+        matches.sort()
+        return [self.terms[term_id] for _, _, _, term_id in matches]
+
+
+class CompletionIndex:
+    """补全索引 - 命令名、分类键和标签三组前缀索引"""
+
+    def __init__(self, commands: Iterable[str], categories: Iterable[str], tags: Iterable[str]):
+        self.commands = PrefixIndex(commands)
+        self.categories = PrefixIndex(categories)
+        self.tags = PrefixIndex(tags)
+
+    def complete(self, prefix: str, limit: int = 20) -> List[str]:
+        """按相关性返回补全候选: 命令名 > 分类 > 标签(#前缀)，同组内短者优先"""
+        if not prefix:
+            return self.commands.prefix('', limit)
+        if prefix.startswith('#'):
+            return [f"#{tag}" for tag in self.tags.shortest_with_prefix(prefix[1:], limit)]
+
+        results = []
+        for group, fmt in ((self.commands, '{}'), (self.categories, '{}'), (self.tags, '#{}')):
+            # 完全匹配的术语长度最短，自然排在最前
+            for term in group.shortest_with_prefix(prefix, limit - len(results)):
+                candidate = fmt.format(term)
+                if candidate not in results:
+                    results.append(candidate)
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def to_payload(self) -> tuple:
+        """转换为可序列化的数据"""
+        return tuple((group.keys, group.terms) for group in (self.commands, self.categories, self.tags))
+
+    @classmethod
+    def from_payload(cls, payload: tuple) -> 'CompletionIndex':
+        """从序列化数据恢复"""
+        index = cls((), (), ())
+        index.commands, index.categories, index.tags = (
+            PrefixIndex.from_sorted(keys, terms) for keys, terms in payload
+        )
+        return index
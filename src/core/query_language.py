@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+结构化查询 - 支持 AND/OR/NOT、括号和字段限定 (tag:network) 的查询解析与执行计划
+"""
+
+import re
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from .postings import difference, intersect, intersect_all, union_all
+
+# 字段限定符 -> 索引字段 (别名归一)
+FIELD_ALIASES = {
+    'name': 'name',
+    'description': 'description',
+    'desc': 'description',
+    'category': 'category',
+    'cat': 'category',
+    'option': 'option',
+    'example': 'example',
+    'mapping': 'mapping',
+    'tag': 'tag',
+}
+
+# 字段限定的引号短语 (tag:"文件 管理") 作为一个词元
+_TOKEN = re.compile(r'\(|\)|(?:[A-Za-z]+:)?"[^"]*"|[^\s()]+')
+_FIELD_TERM = re.compile(r'^([A-Za-z]+):(.+)$')
+_OPERATORS = ('AND', 'OR', 'NOT')
+
+
+class QuerySyntaxError(ValueError):
+    """查询语法错误"""
+
+
+class Term:
+    """查询词 (field为None时匹配所有字段)"""
+
+    def __init__(self, text: str, field: Optional[str] = None):
+        self.text = text
+        self.field = field
+
+    def __repr__(self):
+        return f"{self.field}:{self.text}" if self.field else repr(self.text)
+
+
+class And:
+    def __init__(self, children: List):
+        self.children = children
+
+    def __repr__(self):
+        return f"AND{self.children}"
+
+
+class Or:
+    def __init__(self, children: List):
+        self.children = children
+
+    def __repr__(self):
+        return f"OR{self.children}"
+
+
+class Not:
+    def __init__(self, child):
+        self.child = child
+
+    def __repr__(self):
+        return f"NOT({self.child})"
+
+
+def _split_field(token: str) -> Tuple[Optional[str], str]:
+    match = _FIELD_TERM.match(token)
+    if match and match.group(1).lower() in FIELD_ALIASES:
+        return FIELD_ALIASES[match.group(1).lower()], match.group(2)
+    return None, token
+
+
+def is_structured_query(query: str) -> bool:
+    """查询是否使用了布尔运算符、括号、引号或字段限定符"""
+    for token in _TOKEN.findall(query):
+        if token in _OPERATORS or token in '()' or token.startswith('"'):
+            return True
+        if _split_field(token)[0]:
+            return True
+    return False
+
+
+class QueryParser:
+    """递归下降解析器: or := and (OR and)*; and := unary ([AND] unary)*; unary := NOT unary | primary"""
+
+    def __init__(self, query: str):
+        self.tokens = _TOKEN.findall(query)
+        self.pos = 0
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> str:
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise QuerySyntaxError("查询为空")
+        node = self._parse_or()
+        if self._peek() is not None:
+            raise QuerySyntaxError(f"意外的 '{self._peek()}'")
+        return node
+
+    def _parse_or(self):
+        children = [self._parse_and()]
+        while self._peek() == 'OR':
+            self._next()
+            children.append(self._parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def _parse_and(self):
+        children = [self._parse_unary()]
+        while self._peek() not in (None, ')', 'OR'):
+            if self._peek() == 'AND':
+                self._next()
+            children.append(self._parse_unary())
+        return children[0] if len(children) == 1 else And(children)
+
+    def _parse_unary(self):
+        if self._peek() == 'NOT':
+            self._next()
+            return Not(self._parse_unary())
+        return self._parse_primary()
+
+    def _parse_primary(self):
+        token = self._next()
+        if token is None:
+            raise QuerySyntaxError("查询意外结束")
+        if token == '(':
+            node = self._parse_or()
+            if self._next() != ')':
+                raise QuerySyntaxError("缺少 ')'")
+            return node
+        if token in (')', 'AND', 'OR'):
+            raise QuerySyntaxError(f"意外的 '{token}'")
+
+        field, text = _split_field(token)
+        if text.startswith('"') and text.endswith('"') and len(text) >= 2:
+            text = text[1:-1]
+        if not text:
+            raise QuerySyntaxError(f"空查询词 '{token}'")
+        return Term(text, field)
+
+
+def parse_query(query: str):
+    """解析结构化查询为语法树"""
+    return QueryParser(query).parse()
+
+
+class QueryPlanner:
+    """执行计划 - 按估计的倒排表大小从小到大求交集，NOT 最后做差集"""
+
+    def __init__(self, search_engine):
+        self.engine = search_engine
+        self._term_cache: Dict[Tuple[Optional[str], str], array] = {}
+
+    def estimate(self, node) -> int:
+        """估计结果集大小 (只看倒排表长度，不做集合运算)"""
+        num_docs = len(self.engine.doc_names)
+        if isinstance(node, Term):
+            return self._estimate_term(node)
+        if isinstance(node, Or):
+            return min(num_docs, sum(self.estimate(child) for child in node.children))
+        if isinstance(node, And):
+            positives = [self.estimate(child) for child in node.children if not isinstance(child, Not)]
+            return min(positives) if positives else num_docs
+        if isinstance(node, Not):
+            return num_docs - self.estimate(node.child)
+        return 0
+
+    def _estimate_term(self, term: Term) -> int:
+        tag_index = self.engine.tag_index
+        if term.field == 'tag' and term.text in tag_index:
+            return len(tag_index[term.text])
+        if term.field == 'category':
+            return len(self._category_postings(term.text))
+
+        search_index = self.engine.search_index
+        estimate = None
+        for group in self.engine.get_analyzer().query_groups(term.text):
+            for word in group:
+                sources = search_index.get(word, {})
+                if term.field:
+                    entry = sources.get(term.field)
+                    size = len(entry[0]) if entry else 0
+                else:
+                    size = sum(len(ids) for ids, _ in sources.values())
+                estimate = size if estimate is None else min(estimate, size)
+        if term.field is None and term.text in tag_index:
+            estimate = (estimate or 0) + len(tag_index[term.text])
+        return estimate or 0
+
+    def _category_postings(self, text: str) -> array:
+        """分类限定: 匹配以该值开头的分类键或包含该值的分类名 (以分类表为准)"""
+        key = ('category', text)
+        if key not in self._term_cache:
+            prefix = text.lower()
+            doc_names = self.engine.doc_names
+            doc_ids = set()
+            for category, info in self.engine.data_manager.get_all_categories().items():
+                if not (category.lower().startswith(prefix) or text in info.get('name', '')):
+                    continue
+                for command in info.get('commands', []):
+                    # doc_names 按命令名排序，二分查找即得ID
+                    pos = bisect_left(doc_names, command)
+                    if pos < len(doc_names) and doc_names[pos] == command:
+                        doc_ids.add(pos)
+            self._term_cache[key] = array('I', sorted(doc_ids))
+        return self._term_cache[key]
+
+    def _evaluate_term(self, term: Term) -> array:
+        tag_index = self.engine.tag_index
+        if term.field == 'tag' and term.text in tag_index:
+            return tag_index[term.text]
+        if term.field == 'category':
+            return self._category_postings(term.text)
+
+        key = (term.field, term.text)
+        if key in self._term_cache:
+            return self._term_cache[key]
+
+        # 每个分析分组内的词项须命中同一字段，分组之间取交集
+        group_results = []
+        for group in self.engine.get_analyzer().query_groups(term.text):
+            matches = self.engine._match_group_ids(group)
+            if term.field:
+                group_results.append(matches.get(term.field, array('I')))
+            else:
+                group_results.append(union_all(matches.values()))
+        result = intersect_all(group_results)
+        if term.field is None and term.text in tag_index:
+            result = union_all([result, tag_index[term.text]])
+
+        self._term_cache[key] = result
+        return result
+
+    def execute(self, node) -> array:
+        """执行语法树，返回升序文档ID数组"""
+        if isinstance(node, Term):
+            return self._evaluate_term(node)
+        if isinstance(node, Or):
+            return union_all([self.execute(child) for child in node.children])
+        if isinstance(node, Not):
+            return difference(self._universe(), self.execute(node.child))
+        if isinstance(node, And):
+            positives = [child for child in node.children if not isinstance(child, Not)]
+            negatives = [child.child for child in node.children if isinstance(child, Not)]
+            # 最小的倒排表优先，结果为空时立即停止
+            positives.sort(key=self.estimate)
+            result = self.execute(positives[0]) if positives else self._universe()
+            for child in positives[1:]:
+                if not result:
+                    return result
+                result = intersect(result, self.execute(child))
+            for child in negatives:
+                if not result:
+                    break
+                result = difference(result, self.execute(child))
+            return result
+        raise QuerySyntaxError(f"未知的查询节点 {node!r}")
+
+    def _universe(self) -> array:
+        return array('I', range(len(self.engine.doc_names)))
+
+
+def positive_terms(node) -> List[Term]:
+    """语法树中不在 NOT 之下的查询词 (用于结果排序)"""
+    if isinstance(node, Term):
+        return [node]
+    if isinstance(node, Not):
+        return []
+    return [term for child in node.children for term in positive_terms(child)]
@@ -4,43 +4,149 @@
 """
 
 import json
+import threading
 from typing import Dict, List, Optional, Any, Tuple
 from ..data.data_manager import DataManager
 from ..core.command_loader import CommandLoader
-from ..core.search_engine import SearchEngine
+from ..core.query_language import is_structured_query
+from ..utils.i18n import I18nManager
+
+class QueryState:
+    """查询状态 - 一次加载得到的数据管理器、命令加载器与搜索引擎
+    
+    发布给读者后不再替换其中的数据 (刷新与增量更新都构建新的状态再整体替换引用)，
+    读者取得引用后无需加锁；命令加载器与搜索引擎在首次使用时创建，只有创建过程加锁。
+    """
+    
+    def __init__(self, data_manager: DataManager):
+        self.data_manager = data_manager
+        self._command_loader = None
+        self._search_engine = None
+        self._category_fuzzy_index = None
+        self._category_fuzzy_source = None
+        self._init_lock = threading.Lock()
+    
+    @property
+    def command_loader(self) -> CommandLoader:
+        """命令加载器 (首次使用时创建)"""
+        if self._command_loader is None:
+            with self._init_lock:
+                if self._command_loader is None:
+                    self._command_loader = CommandLoader(self.data_manager)
+        return self._command_loader
+    
+    @property
+    def search_engine(self):
+        """搜索引擎 (首次搜索时才导入并创建)"""
+        if self._search_engine is None:
+            command_loader = self.command_loader
+            with self._init_lock:
+                if self._search_engine is None:
+                    if self.data_manager.sqlite_store is not None:
+                        from ..core.sqlite_search import SqliteSearchEngine as SearchEngine
+                    else:
+                        from ..core.search_engine import SearchEngine
+                    self._search_engine = SearchEngine(self.data_manager, command_loader)
+        return self._search_engine
+    
+    def has_search_engine(self) -> bool:
+        """搜索引擎是否已经创建 (即已有过搜索)"""
+        return self._search_engine is not None
+
 
 class QueryProcessor:
-    """查询处理器 - 统一处理各种查询请求"""
+    """查询处理器 - 统一处理各种查询请求，可在多个线程间共享"""
+    
+    def __init__(self, i18n_manager: I18nManager = None, data_dir: str = None, language: str = None,
+                 _residents: Dict[str, 'QueryProcessor'] = None):
+        shared_strings = None
+        if _residents:
+            shared_strings = next(iter(_residents.values())).data_manager.shared_strings
+        # 当前发布的查询状态，刷新时整体替换引用 (读者每次请求只读取一次)
+        self._state = QueryState(DataManager(data_dir=data_dir, i18n_manager=i18n_manager,
+                                             language=language, shared_strings=shared_strings))
+        # 只串行化刷新与增量更新，读者从不获取
+        self._update_lock = threading.Lock()
+        # 同一进程中常驻的各语言处理器 (互相共享，按语言索引)
+        self._residents = _residents if _residents is not None else {}
+        self._residents[self.data_manager.language] = self
     
-    def __init__(self):
-        self.data_manager = DataManager()
-        self.command_loader = CommandLoader(self.data_manager)
-        self.search_engine = SearchEngine(self.data_manager, self.command_loader)
+    @property
+    def state(self) -> QueryState:
+        """当前的查询状态 (需要多次调用看到同一份数据时，取一次后直接使用)"""
+        return self._state
+    
+    @property
+    def data_manager(self) -> DataManager:
+        return self._state.data_manager
+    
+    @property
+    def language(self) -> str:
+        """本处理器查询的知识库语言"""
+        return self.data_manager.language
+    
+    def for_language(self, language: str) -> 'QueryProcessor':
+        """获取指定语言的处理器 (首次使用时创建并常驻，之后切换语言无需重新加载)"""
+        if language is None or language == self.language:
+            return self
+        processor = self._residents.get(language)
+        if processor is None or processor.language != language:
+            data_manager = self.data_manager
+            processor = QueryProcessor(data_manager.i18n, data_manager.data_dir, language, self._residents)
+        return processor
+    
+    def get_resident_processors(self) -> List['QueryProcessor']:
+        """获取所有已常驻的语言处理器"""
+        return list(self._residents.values())
+    
+    @property
+    def command_loader(self) -> CommandLoader:
+        """当前状态的命令加载器"""
+        return self._state.command_loader
+    
+    @property
+    def search_engine(self):
+        """当前状态的搜索引擎"""
+        return self._state.search_engine
     
     def query_command(self, command_name: str) -> Optional[Dict[str, Any]]:
         """查询单个命令的详细信息"""
         return self.command_loader.load_command(command_name)
     
-    def search_commands(self, query: str, search_type: str = 'enhanced') -> Dict[str, Any]:
+    def query_commands(self, command_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量查询命令 (按源文件分组加载)"""
+        return self.command_loader.load_commands_batch(command_names)
+    
+    def get_command_summaries(self, command_names: List[str]) -> Dict[str, Dict[str, str]]:
+        """批量获取命令摘要 (描述/分类)"""
+        return self.data_manager.get_command_summaries(command_names)
+    
+    def search_commands(self, query: str, search_type: str = 'enhanced', top_k: int = None) -> Dict[str, Any]:
         """搜索命令"""
-        if search_type == 'enhanced':
-            return self.search_engine.enhanced_search(query)
+        search_engine = self.search_engine
+        if search_type == 'query' or (search_type == 'enhanced' and is_structured_query(query)):
+            return {'query_matches': search_engine.query_search(query, top_k)}
+        elif search_type == 'enhanced':
+            return search_engine.enhanced_search(query, top_k)
         elif search_type == 'name':
-            return {'name_matches': self.search_engine.search_by_name(query)}
+            return {'name_matches': search_engine.search_by_name(query)}
         elif search_type == 'keyword':
-            return self.search_engine.search_by_keyword(query)
+            return search_engine.search_by_keyword(query)
+        elif search_type == 'ranked':
+            return {'ranked_matches': search_engine.ranked_search(query, top_k or 20)}
         else:
-            return self.search_engine.enhanced_search(query)
+            return search_engine.enhanced_search(query, top_k)
     
     def get_category_commands(self, category: str) -> Dict[str, Any]:
         """获取分类下的所有命令"""
-        command_names = self.data_manager.get_commands_by_category(category)
-        commands = {}
-        
-        for command_name in command_names:
-            command_data = self.command_loader.load_command(command_name)
-            if command_data:
-                commands[command_name] = command_data
+        state = self._state
+        if state.data_manager.sqlite_store is not None:
+            # SQLite 后端: 分类成员与命令记录一次联表查询
+            commands = state.data_manager.fetch_category_commands(category)
+        else:
+            # 按分片分组批量加载，只读取该分类命令所在的分片
+            command_names = state.data_manager.get_commands_by_category(category)
+            commands = state.command_loader.load_commands_batch(command_names)
         
         return {
             'category': category,
@@ -60,47 +166,38 @@ class QueryProcessor:
         """获取搜索建议"""
         return self.search_engine.get_search_suggestions(partial_query)
     
+    def complete(self, prefix: str, limit: int = 20) -> List[str]:
+        """获取命令名/分类/标签补全候选"""
+        return self.search_engine.complete(prefix, limit)
+    
     def find_similar_categories(self, category: str, threshold: float = 0.4) -> List[Tuple[str, float]]:
-        """查找相似分类，支持中英文搜索"""
-        all_categories = self.data_manager.get_all_categories()
+        """查找相似分类，支持中英文搜索 (匹配键名、本地化名称和描述，取最高相似度)"""
+        state = self._state
+        all_categories = state.data_manager.get_all_categories()
         
-        # 计算相似度
-        from difflib import SequenceMatcher
-        similarities = []
-        
-        for cat_key, cat_data in all_categories.items():
-            # 计算与键名的相似度
-            key_similarity = SequenceMatcher(None, category.lower(), cat_key.lower()).ratio()
-            
-            # 计算与本地化名称的相似度（如果存在）
-            name_similarity = 0.0
-            if 'name' in cat_data:
-                name_similarity = SequenceMatcher(None, category.lower(), cat_data['name'].lower()).ratio()
-            
-            # 计算与描述的相似度
-            desc_similarity = 0.0
-            if 'description' in cat_data:
-                desc_similarity = SequenceMatcher(None, category.lower(), cat_data['description'].lower()).ratio()
-            
-            # 取最高的相似度
-            max_similarity = max(key_similarity, name_similarity, desc_similarity)
-            
-            # 如果相似度足够高，添加到结果中
-            if max_similarity >= threshold:
-                similarities.append((cat_key, max_similarity))
+        fuzzy_index = state._category_fuzzy_index
+        if fuzzy_index is None or state._category_fuzzy_source is not all_categories:
+            from ..core.fuzzy_index import FuzzyIndex
+            entries = []
+            for cat_key, cat_data in all_categories.items():
+                entries.append((cat_key, cat_key))
+                for field in ('name', 'description'):
+                    if field in cat_data:
+                        entries.append((cat_data[field], cat_key))
+            fuzzy_index = state._category_fuzzy_index = FuzzyIndex(entries)
+            state._category_fuzzy_source = all_categories
         
         # 按相似度降序排序
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        
-        return similarities
+        return fuzzy_index.search(category, threshold, limit=None)
     
     def find_similar_commands(self, command: str, threshold: float = 0.6) -> List[Dict[str, Any]]:
         """查找相似命令"""
-        similar_results = self.search_engine.find_similar_commands(command, threshold)
+        state = self._state
+        similar_results = state.search_engine.find_similar_commands(command, threshold)
         
         results = []
         for cmd_name, similarity in similar_results:
-            command_data = self.command_loader.load_command(cmd_name)
+            command_data = state.command_loader.load_command(cmd_name)
             if command_data:
                 results.append({
                     'command': cmd_name,
@@ -117,18 +214,65 @@ class QueryProcessor:
     
     def get_system_stats(self) -> Dict[str, Any]:
         """获取系统统计信息"""
+        state = self._state
         return {
-            'data_manager': self.data_manager.get_meta_info(),
-            'command_loader': self.command_loader.get_cache_stats(),
-            'search_engine': self.search_engine.get_index_stats(),
-            'total_commands': len(self.get_command_list())
+            'data_manager': state.data_manager.get_meta_info(),
+            'command_loader': state.command_loader.get_cache_stats(),
+            'search_engine': state.search_engine.get_index_stats(),
+            'total_commands': len(state.data_manager.get_command_list())
         }
     
-    def refresh_data(self):
-        """刷新数据"""
-        self.data_manager.refresh_cache()
-        self.command_loader.clear_cache()
-        self.search_engine.rebuild_index()
+    def refresh_data(self, background: bool = False) -> Optional[threading.Thread]:
+        """刷新数据: 在新的状态上强制重新编译快照并完整重建索引，完成后整体替换当前状态
+        
+        构建期间读者继续使用旧状态，不会被阻塞；background=True 时在后台线程中刷新并返回该线程。
+        """
+        if background:
+            thread = threading.Thread(target=self.refresh_data, name='clever-refresh', daemon=True)
+            thread.start()
+            return thread
+        
+        with self._update_lock:
+            data_manager = self._state.data_manager.fork()
+            data_manager.refresh_cache()
+            state = QueryState(data_manager)
+            state.search_engine.rebuild_index()
+            self._state = state
+        return None
+    
+    def update_data(self) -> Optional[Dict[str, Any]]:
+        """增量应用知识库源文件的改动，源文件未变化时返回None
+        
+        改动应用在当前状态的副本上，完成后整体替换，正在进行的查询继续使用旧状态。
+        只修改了已有命令内容时，新索引与旧索引共享未变化的部分，仅复制并改写这些命令涉及的倒排项和标签；
+        其他改动 (增删文件/命令、分类或映射变化) 重新加载快照 (未变化的文件沿用旧分片)，
+        旧状态已经用过搜索时在替换前加载好新索引，否则索引在下次搜索时加载。
+        """
+        with self._update_lock:
+            state = self._state
+            if not state.data_manager.sources_changed():
+                return None
+            previous_digest = state.data_manager.get_content_digest()
+            data_manager = state.data_manager.fork()
+            updates = data_manager.update_changed_files()
+            new_state = QueryState(data_manager)
+            if updates is None:
+                data_manager.reload()
+                if state.has_search_engine():
+                    new_state.search_engine._ensure_indexes()
+                self._state = new_state
+                return {'incremental': False, 'commands': []}
+            if state.has_search_engine():
+                new_state._search_engine = state.search_engine.fork(data_manager, new_state.command_loader)
+            if data_manager.get_content_digest() == previous_digest:
+                # 只有时间戳变化: 发布记录了新清单的副本，数据与索引沿用旧状态
+                self._state = new_state
+                return None
+            
+            # 搜索引擎尚未创建时也更新磁盘上的索引，避免下次启动完整重建
+            new_state.search_engine.apply_changes(updates, previous_digest)
+            self._state = new_state
+            return {'incremental': True, 'commands': sorted(updates)}
     
     def export_command_data(self, command_name: str, format_type: str = 'json') -> str:
         """导出命令数据"""
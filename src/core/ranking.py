@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+排序检索 - 带字段权重的BM25打分与MaxScore提前终止的top-k选取
+"""
+
+import heapq
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 默认字段权重: 命中命令名比命中示例描述重要得多
+DEFAULT_FIELD_WEIGHTS = {
+    'name': 3.0,
+    'tag': 2.0,
+    'mapping': 2.0,
+    'description': 1.5,
+    'category': 1.0,
+    'option': 0.5,
+    'example': 0.5,
+}
+
+
+class BM25Ranker:
+    """字段加权BM25 - 每个字段单独做长度归一化，再按字段权重求和"""
+
+    def __init__(self, search_index: Dict[str, Dict[str, Tuple[Sequence[int], Sequence[int]]]],
+                 doc_lengths: Dict[str, Sequence[int]], num_docs: int,
+                 field_weights: Dict[str, float] = None, k1: float = 1.2, b: float = 0.75):
+        """search_index: 词项 -> 字段 -> (升序文档ID, 词频)；doc_lengths: 字段 -> 按文档ID排列的词项数"""
+        self.search_index = search_index
+        self.doc_lengths = doc_lengths
+        self.field_weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        self.k1 = k1
+        self.b = b
+        self.num_docs = max(num_docs, 1)
+        self.avg_lengths = {
+            field: (sum(lengths) / self.num_docs) or 1.0 for field, lengths in doc_lengths.items()
+        }
+
+    def _idf(self, sources: Dict[str, Tuple[Sequence[int], Sequence[int]]]) -> float:
+        if len(sources) == 1:
+            doc_freq = len(next(iter(sources.values()))[0])
+        else:
+            doc_freq = len({doc for ids, _ in sources.values() for doc in ids})
+        return math.log(1 + (self.num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def _term_upper_bound(self, idf: float, sources: Dict[str, Tuple[Sequence[int], Sequence[int]]]) -> float:
+        # tf饱和项 tf*(k1+1)/(tf+...) 的上界是 k1+1
+        return idf * (self.k1 + 1) * sum(self.field_weights.get(field, 0.0) for field in sources)
+
+    def rank(self, terms: List[str], top_k: Optional[int] = 20) -> List[Tuple[int, float]]:
+        """对查询词项打分并返回top-k (文档ID, 得分)，按得分降序"""
+        if top_k is not None and top_k <= 0:
+            return []
+        term_data = []
+        for term in dict.fromkeys(terms):
+            sources = self.search_index.get(term)
+            if sources:
+                idf = self._idf(sources)
+                term_data.append((self._term_upper_bound(idf, sources), idf, sources))
+        if not term_data:
+            return []
+
+        # MaxScore: 按上界从大到小处理词项，剩余词项上界之和不足以进入top-k时不再接纳新文档
+        term_data.sort(key=lambda item: item[0], reverse=True)
+        remaining = sum(item[0] for item in term_data)
+        scores = {}
+        kth_score = None
+        k1, b = self.k1, self.b
+        for upper_bound, idf, sources in term_data:
+            remaining -= upper_bound
+            accept_new = kth_score is None or kth_score < remaining + upper_bound
+            for field, (ids, tfs) in sources.items():
+                weight = self.field_weights.get(field, 0.0)
+                if not weight:
+                    continue
+                lengths = self.doc_lengths.get(field)
+                avg_len = self.avg_lengths.get(field) or 1.0
+                factor = idf * weight * (k1 + 1)
+                for doc, tf in zip(ids, tfs):
+                    if not accept_new and doc not in scores:
+                        continue
+                    norm = 1 - b + b * lengths[doc] / avg_len
+                    scores[doc] = scores.get(doc, 0.0) + factor * tf / (tf + k1 * norm)
+            if top_k is not None and len(scores) >= top_k:
+                kth_score = heapq.nlargest(top_k, scores.values())[-1]
+
+        order = lambda item: (-item[1], item[0])
+        if top_k is None:
+            return sorted(scores.items(), key=order)
+        return heapq.nsmallest(top_k, scores.items(), key=order)
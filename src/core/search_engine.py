@@ -3,13 +3,21 @@
 搜索引擎模块 - 实现智能搜索和索引
 """
 
-import re
+import copy
+import threading
+from bisect import bisect_left
 from typing import Dict, List, Optional, Any, Tuple
-from collections import defaultdict
-import difflib
 from ..data.data_manager import DataManager
 from ..core.command_loader import CommandLoader
-from ..utils.search_utils import calculate_similarity, extract_keywords, text_contains_any
+from ..core.index_builder import build_partials, index_shard, merge_partials
+from ..core.index_store import (load_search_index, save_search_index,
+                                load_completion_index, save_completion_index)
+from ..core.prefix_index import CompletionIndex
+from ..core.fuzzy_index import FuzzyIndex
+from ..core.ranking import BM25Ranker
+from ..core.analyzer import Analyzer, get_analyzer
+from ..core.postings import freeze, insert_doc, intersect_all, new_postings, remove_doc
+from ..core.query_language import QueryPlanner, parse_query, positive_terms
 
 class SearchEngine:
     """搜索引擎 - 实现多种搜索策略"""
@@ -17,102 +25,203 @@ class SearchEngine:
     def __init__(self, data_manager: DataManager = None, command_loader: CommandLoader = None):
         self.data_manager = data_manager or DataManager()
         self.command_loader = command_loader or CommandLoader(self.data_manager)
+        # 命令名按字典序分配稠密整数ID，倒排表只存ID
+        self.doc_names = []
+        # 词项 -> 字段 -> (升序ID数组, 词频数组)
         self.search_index = {}
         self.keyword_index = {}
+        # 标签 -> 升序ID数组
         self.tag_index = {}
+        # 字段 -> 按ID排列的词项数，用于BM25长度归一化
+        self.doc_lengths = {}
+        self._ranker = None
+        self._index_digest = None
+        self._completion_index = None
+        self._completion_digest = None
+        self._fuzzy_index = None
+        self._fuzzy_source = None
+        # 懒加载/构建索引时加锁，多个线程首次搜索时只构建一次；已加载后的查询不加锁
+        self._init_lock = threading.RLock()
+    
+    def fork(self, data_manager: DataManager, command_loader: CommandLoader) -> 'SearchEngine':
+        """创建与本引擎共享索引的新引擎，供新的数据管理器增量更新 (apply_changes 写时复制，不改动共享的索引)"""
+        engine = copy.copy(self)
+        engine.data_manager = data_manager
+        engine.command_loader = command_loader
+        engine._init_lock = threading.RLock()
+        return engine
+    
+    def get_completion_index(self) -> CompletionIndex:
+        """获取补全索引 (命令名/分类/标签的前缀与子串索引)，知识库变化时重建"""
+        digest = self.data_manager.get_content_digest()
+        if self._completion_index is not None and digest == self._completion_digest:
+            return self._completion_index
+        
+        with self._init_lock:
+            if self._completion_index is not None and digest == self._completion_digest:
+                return self._completion_index
+            path = self.data_manager.get_cache_path('cmpl')
+            payload = load_completion_index(path, digest)
+            if payload is not None:
+                self._completion_index = CompletionIndex.from_payload(payload)
+            else:
+                self._completion_index = CompletionIndex(*self._completion_terms())
+                save_completion_index(path, digest, self._completion_index.to_payload())
+            self._completion_digest = digest
+            return self._completion_index
+    
+    def _completion_terms(self) -> Tuple[List[str], Any, set]:
+        """补全索引的来源: (命令名, 分类键, 标签集合)"""
+        tags = set()
+        for command_data in self.data_manager.load_all_commands().values():
+            tags.update(command_data.get('tags', []))
+        return (self.data_manager.get_location_index().names(),
+                self.data_manager.get_all_categories().keys(), tags)
+    
+    def _ensure_indexes(self):
+        """首次搜索时懒加载索引：优先读取磁盘上的持久化索引，知识库变化时才重建"""
+        digest = self.data_manager.get_content_digest()
+        if digest == self._index_digest:
+            return
+        
+        with self._init_lock:
+            # 摘要最后赋值，其他线程看到摘要一致时索引已完整就位
+            if digest == self._index_digest:
+                return
+            stored = load_search_index(self.data_manager.get_cache_path('idx'), digest)
+            if stored is not None:
+                self.doc_names, self.search_index, self.tag_index, self.doc_lengths = stored
+                self.keyword_index = {}
+                self._ranker = None
+                self._index_digest = digest
+                return
+            
+            self._rebuild_and_save(digest)
+    
+    def _rebuild_and_save(self, digest: str):
+        """从知识库重建索引并原子写回磁盘"""
+        self.doc_names = []
+        self.search_index = {}
+        self.keyword_index = {}
+        self.tag_index = {}
+        self.doc_lengths = {}
+        self._ranker = None
         self._build_indexes()
+        self._index_digest = digest
+        save_search_index(self.data_manager.get_cache_path('idx'), digest, self.doc_names,
+                          self.search_index, self.tag_index, self.doc_lengths)
     
     def _build_indexes(self):
-        """构建搜索索引"""
-        # print("正在构建搜索索引...")
+        """构建搜索索引 (按分片生成局部索引后合并，大知识库时并行)"""
+        # 文档ID按命令名排序分配，位置索引给出每个命令所在的分片，无需先加载全部命令
+        location_index = self.data_manager.get_location_index()
+        self.doc_names = sorted(location_index.names())
+        doc_ids = {name: doc_id for doc_id, name in enumerate(self.doc_names)}
         
-        # 获取所有命令
-        all_commands = self.data_manager.get_command_list()
+        by_file = {}
+        for doc_id, command_name in enumerate(self.doc_names):
+            rel_path, key = location_index.lookup(command_name)
+            by_file.setdefault(rel_path, []).append((command_name, key, doc_id))
+        tasks = sorted(by_file.items())
+        total_bytes = sum(location_index.manifest.get(rel_path, [0, 0])[1] for rel_path, _ in tasks)
         
-        # 构建关键词索引
-        for command_name in all_commands:
-            command_data = self.data_manager.load_command(command_name)
-            if not command_data:
-                continue
-            
-            # 索引命令名
-            self._add_to_index(command_name, command_name, 'name')
-            
-            # 索引描述
-            self._add_to_index(command_data.get('description', ''), command_name, 'description')
-            
-            # 索引分类
-            self._add_to_index(command_data.get('category', ''), command_name, 'category')
-            
-            # 索引选项
-            for option in command_data.get('options', []):
-                self._add_to_index(option.get('description', ''), command_name, 'option')
-            
-            # 索引示例
-            for example in command_data.get('examples', []):
-                self._add_to_index(example.get('description', ''), command_name, 'example')
-            
-            # 索引标签
-            for tag in command_data.get('tags', []):
-                self._add_to_tag_index(tag, command_name)
+        partials = build_partials(self.data_manager, self.data_manager.language, tasks, total_bytes)
+        self.search_index, self.tag_index, self.doc_lengths = merge_partials(partials)
         
         # 构建文本搜索映射索引
         search_mappings = self.data_manager.get_search_mappings()
         for keyword, commands in search_mappings.items():
             for command in commands:
-                if command in all_commands:
-                    self._add_to_index(keyword, command, 'mapping')
+                if command in doc_ids:
+                    self._add_to_index(keyword, doc_ids[command], 'mapping')
         
-        # print(f"搜索索引构建完成，索引了 {len(all_commands)} 个命令")
+        self._freeze_indexes()
     
-    def _add_to_index(self, text: str, command_name: str, source: str):
+    def _add_to_index(self, text: str, doc_id: int, source: str):
         """添加文本到搜索索引"""
         if not text:
             return
         
-        # 分词并添加到索引
+        # 分词并添加到索引: 词项 -> 字段 -> {ID: 词频}
         words = self._tokenize(text)
         for word in words:
-            if word not in self.search_index:
-                self.search_index[word] = defaultdict(list)
-            
-            if command_name not in self.search_index[word][source]:
-                self.search_index[word][source].append(command_name)
-    
-    def _add_to_tag_index(self, tag: str, command_name: str):
-        """添加标签到标签索引"""
-        if tag not in self.tag_index:
-            self.tag_index[tag] = []
+            postings = self.search_index.setdefault(word, {}).setdefault(source, {})
+            postings[doc_id] = postings.get(doc_id, 0) + 1
         
-        if command_name not in self.tag_index[tag]:
-            self.tag_index[tag].append(command_name)
+        lengths = self.doc_lengths.setdefault(source, {})
+        lengths[doc_id] = lengths.get(doc_id, 0) + len(words)
+    
+    def _freeze_indexes(self):
+        """把构建期的字典/集合转换为紧凑的升序 array('I') 倒排表"""
+        for sources in self.search_index.values():
+            for source, postings in sources.items():
+                sources[source] = freeze(postings)
+        for tag, doc_ids in self.tag_index.items():
+            self.tag_index[tag] = new_postings(sorted(doc_ids))
+        num_docs = len(self.doc_names)
+        for source, lengths in self.doc_lengths.items():
+            self.doc_lengths[source] = new_postings(lengths.get(doc_id, 0) for doc_id in range(num_docs))
+    
+    def get_analyzer(self) -> Analyzer:
+        """当前语言的文本分析器"""
+        return get_analyzer(self.data_manager.language)
     
     def _tokenize(self, text: str) -> List[str]:
-        """文本分词"""
-        # 简单的分词实现
-        words = re.findall(r'\w+', text.lower())
-        return [word for word in words if len(word) > 1]
+        """文本分词 (中文切分为单字与二元组)"""
+        return self.get_analyzer().analyze(text)
+    
+    def _query_terms(self, query: str) -> List[str]:
+        """查询词项 (各查询分组展开后去重)"""
+        groups = self.get_analyzer().query_groups(query)
+        return list(dict.fromkeys(term for group in groups for term in group))
+    
+    def _match_group_ids(self, group: List[str]) -> Dict[str, Any]:
+        """返回每个字段中同时包含组内全部词项的命令ID (从最短的倒排表开始求交集)"""
+        entries = [self.search_index.get(term) for term in group]
+        if not entries or not all(entries):
+            return {}
+        
+        matches = {}
+        for source in entries[0]:
+            postings = [entry.get(source) for entry in entries]
+            if not all(postings):
+                continue
+            doc_ids = intersect_all([ids for ids, _ in postings])
+            if doc_ids:
+                matches[source] = doc_ids
+        return matches
+    
+    def _match_group(self, group: List[str]) -> Dict[str, List[str]]:
+        """返回每个字段中同时包含组内全部词项的命令"""
+        return {
+            source: [self.doc_names[doc_id] for doc_id in doc_ids]
+            for source, doc_ids in self._match_group_ids(group).items()
+        }
     
     def search_by_name(self, query: str) -> List[str]:
-        """按命令名搜索"""
-        results = []
+        """按命令名搜索: 精确 > 前缀 > 包含"""
+        commands = self.get_completion_index().commands
         query_lower = query.lower()
         
-        all_commands = self.data_manager.get_command_list()
+        results = []
+        seen = set()
         
         # 精确匹配
-        if query_lower in all_commands:
+        if query_lower in commands:
             results.append(query_lower)
+            seen.add(query_lower)
         
-        # 前缀匹配
-        for command in all_commands:
-            if command.startswith(query_lower) and command not in results:
+        # 前缀匹配 (短者优先)
+        for command in sorted(commands.prefix(query_lower), key=lambda c: (len(c), c)):
+            if command not in seen:
                 results.append(command)
+                seen.add(command)
         
-        # 包含匹配
-        for command in all_commands:
-            if query_lower in command and command not in results:
+        # 包含匹配 (在分隔符拼接的命令名串上 str.find 扫描)
+        for command in commands.contains(query_lower):
+            if command not in seen:
                 results.append(command)
+                seen.add(command)
         
         return results
     
@@ -124,19 +233,17 @@ class SearchEngine:
             'related': []
         }
         
-        query_lower = query.lower()
-        words = self._tokenize(query)
+        self._ensure_indexes()
         
-        # 搜索索引
-        for word in words:
-            if word in self.search_index:
-                for source, commands in self.search_index[word].items():
-                    if source == 'name':
-                        results['exact'].extend(commands)
-                    elif source in ['description', 'category']:
-                        results['partial'].extend(commands)
-                    else:
-                        results['related'].extend(commands)
+        # 搜索索引: 多字中文查询的各二元组须命中同一字段
+        for group in self.get_analyzer().query_groups(query):
+            for source, commands in self._match_group(group).items():
+                if source == 'name':
+                    results['exact'].extend(commands)
+                elif source in ['description', 'category']:
+                    results['partial'].extend(commands)
+                else:
+                    results['related'].extend(commands)
         
         # 去重并保持顺序
         for key in results:
@@ -144,39 +251,80 @@ class SearchEngine:
         
         return results
     
+    def get_ranker(self) -> BM25Ranker:
+        """获取BM25打分器 (索引变化时重建)"""
+        self._ensure_indexes()
+        if self._ranker is None:
+            self._ranker = BM25Ranker(self.search_index, self.doc_lengths, len(self.doc_names))
+        return self._ranker
+    
+    def _rank(self, terms: List[str], top_k: Optional[int],
+              field_weights: Dict[str, float] = None) -> List[Tuple[int, float]]:
+        """对查询词项打分，返回得分最高的top_k个 (文档ID, 得分)"""
+        if field_weights:
+            self._ensure_indexes()
+            ranker = BM25Ranker(self.search_index, self.doc_lengths, len(self.doc_names), field_weights)
+        else:
+            ranker = self.get_ranker()
+        return ranker.rank(terms, top_k)
+    
+    def ranked_search(self, query: str, top_k: Optional[int] = 20,
+                      field_weights: Dict[str, float] = None) -> List[Tuple[str, float]]:
+        """按字段加权BM25打分检索，返回得分最高的top_k个 (命令, 得分)"""
+        return [(self.doc_names[doc_id], score)
+                for doc_id, score in self._rank(self._query_terms(query), top_k, field_weights)]
+    
     def search_by_tags(self, tags: List[str]) -> List[str]:
         """按标签搜索"""
         if not tags:
             return []
         
-        results = set()
-        
-        for tag in tags:
-            if tag in self.tag_index:
-                if not results:
-                    results.update(self.tag_index[tag])
-                else:
-                    # 取交集
-                    results = results.intersection(set(self.tag_index[tag]))
-        
-        return list(results)
+        self._ensure_indexes()
+        # 忽略不存在的标签，其余标签的倒排表取交集
+        postings = [self.tag_index[tag] for tag in tags if tag in self.tag_index]
+        return [self.doc_names[doc_id] for doc_id in intersect_all(postings)]
     
     def find_similar_commands(self, command: str, threshold: float = 0.6) -> List[Tuple[str, float]]:
-        """查找相似命令"""
-        all_commands = self.data_manager.get_command_list()
-        similarities = []
-        
-        for cmd in all_commands:
-            similarity = difflib.SequenceMatcher(None, command.lower(), cmd.lower()).ratio()
-            if similarity >= threshold:
-                similarities.append((cmd, similarity))
+        """查找相似命令 (返回前10个最相似的命令)"""
+        return self.get_fuzzy_index().search(command, threshold, limit=10)
+    
+    def get_fuzzy_index(self) -> FuzzyIndex:
+        """获取命令名模糊匹配索引，随补全索引一起失效重建"""
+        commands = self.get_completion_index().commands
+        fuzzy_index = self._fuzzy_index
+        if fuzzy_index is not None and self._fuzzy_source is commands:
+            return fuzzy_index
+        with self._init_lock:
+            if self._fuzzy_index is None or self._fuzzy_source is not commands:
+                self._fuzzy_index = FuzzyIndex.from_terms(commands.terms)
+                self._fuzzy_source = commands
+            return self._fuzzy_index
+    
+    def warm_up(self):
+        """预先加载搜索、补全与模糊匹配索引，之后的查询无需等待懒加载"""
+        self._ensure_indexes()
+        self.get_fuzzy_index()
+    
+    def query_search(self, query: str, top_k: Optional[int] = None) -> List[str]:
+        """结构化查询 (AND/OR/NOT/括号/字段限定)，按倒排表集合运算求值，结果按BM25得分排序"""
+        tree = parse_query(query)
+        self._ensure_indexes()
+        doc_ids = QueryPlanner(self).execute(tree)
+        if not doc_ids:
+            return []
         
-        # 按相似度排序
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:10]  # 返回前10个最相似的命令
+        # 用非NOT查询词打分排序，未得分的按命令名排在最后
+        matched = set(doc_ids)
+        terms = [word for term in positive_terms(tree) for word in self._query_terms(term.text)]
+        ranked = [doc_id for doc_id, _ in self._rank(terms, None) if doc_id in matched]
+        ranked_set = set(ranked)
+        ranked.extend(doc_id for doc_id in doc_ids if doc_id not in ranked_set)
+        if top_k is not None:
+            ranked = ranked[:top_k]
+        return [self.doc_names[doc_id] for doc_id in ranked]
     
-    def enhanced_search(self, query: str) -> Dict[str, List[str]]:
-        """增强搜索 - 综合多种搜索策略"""
+    def enhanced_search(self, query: str, top_k: Optional[int] = None) -> Dict[str, List[str]]:
+        """增强搜索 - 综合多种搜索策略，关键词匹配按BM25得分排序，top_k限制每类结果数量"""
         results = {
             'exact_matches': [],
             'name_matches': [],
@@ -191,9 +339,10 @@ class SearchEngine:
             results['exact_matches'] = [name_results[0]]  # 只取第一个精确匹配
             results['name_matches'] = name_results[1:]  # 其他名称匹配
         
-        # 2. 关键词搜索
-        keyword_results = self.search_by_keyword(query)
-        results['keyword_matches'] = keyword_results['exact'] + keyword_results['partial']
+        # 2. 关键词搜索: 直接取BM25得分最高的结果 (限定top_k时打分器提前终止)；
+        # 多取已出现在名称匹配中的个数，去重后仍有top_k个
+        limit = top_k + len(name_results) if top_k is not None else None
+        results['keyword_matches'] = [cmd for cmd, _ in self.ranked_search(query, limit)]
         
         # 3. 标签搜索
         query_tags = self._tokenize(query)
@@ -220,39 +369,154 @@ class SearchEngine:
             if cmd not in all_found
         ]
         
+        if top_k is not None:
+            for category in results:
+                results[category] = results[category][:top_k]
+        
         return results
     
     def get_search_suggestions(self, partial_query: str) -> List[str]:
         """获取搜索建议"""
-        suggestions = []
-        
-        # 命令名建议
-        all_commands = self.data_manager.get_command_list()
-        for command in all_commands:
-            if command.startswith(partial_query.lower()):
-                suggestions.append(command)
+        completion = self.get_completion_index()
         
-        # 标签建议
-        for tag in self.tag_index.keys():
-            if tag.startswith(partial_query.lower()):
-                suggestions.append(f"#{tag}")
+        # 命令名建议 + 标签建议
+        suggestions = completion.commands.prefix(partial_query, limit=10)
+        suggestions += [f"#{tag}" for tag in completion.tags.prefix(partial_query, limit=10)]
         
         return suggestions[:10]  # 返回前10个建议
     
+    def complete(self, prefix: str, limit: int = 20) -> List[str]:
+        """按相关性排序的补全候选 (供shell补全调用)"""
+        return self.get_completion_index().complete(prefix, limit)
+    
     def rebuild_index(self):
-        """重建搜索索引"""
-        self.search_index.clear()
-        self.keyword_index.clear()
-        self.tag_index.clear()
-        self._build_indexes()
+        """重建搜索索引并原子替换磁盘上的索引文件"""
+        self._rebuild_and_save(self.data_manager.get_content_digest())
+    
+    def apply_changes(self, updates: Dict[str, tuple], previous_digest: str) -> bool:
+        """增量更新索引: 撤回变更命令的旧倒排项、标签与字段长度，再加入新内容并写回磁盘
+        
+        updates 为 {命令名: (旧记录, 新记录)}，previous_digest 为变更前的知识库摘要；
+        对应的旧索引不在内存也不在磁盘上时返回False (下次搜索时会完整重建)。
+        写时复制: 顶层表与被修改的词项条目、倒排表在修改前复制，fork() 出的引擎不会改动原引擎的索引。
+        """
+        if self._index_digest != previous_digest:
+            stored = load_search_index(self.data_manager.get_cache_path('idx'), previous_digest)
+            if stored is None:
+                return False
+            self.doc_names, self.search_index, self.tag_index, self.doc_lengths = stored
+        
+        self.search_index = dict(self.search_index)
+        self.tag_index = dict(self.tag_index)
+        self.doc_lengths = {source: lengths[:] for source, lengths in self.doc_lengths.items()}
+        # 本次已复制的词项与标签
+        copied = (set(), set())
+        language = self.data_manager.language
+        tags_before = set(self.tag_index)
+        for command_name, (old_data, new_data) in updates.items():
+            doc_id = bisect_left(self.doc_names, command_name)
+            if doc_id == len(self.doc_names) or self.doc_names[doc_id] != command_name:
+                continue
+            old_index, old_tags, _, _, _, _, _ = index_shard({command_name: old_data},
+                                                             [(command_name, command_name, doc_id)], language)
+            new_index, new_tags, new_lengths, _, _, _, _ = index_shard({command_name: new_data},
+                                                                      [(command_name, command_name, doc_id)],
+                                                                      language)
+            self._retract_postings(old_index, old_tags, doc_id, copied)
+            self._insert_postings(new_index, new_tags, new_lengths, doc_id, copied)
+        
+        self.keyword_index = {}
+        self._ranker = None
+        self._index_digest = self.data_manager.get_content_digest()
+        save_search_index(self.data_manager.get_cache_path('idx'), self._index_digest, self.doc_names,
+                          self.search_index, self.tag_index, self.doc_lengths)
+        
+        # 命令名与分类未变，补全索引只需在标签集合变化时重建
+        if set(self.tag_index) != tags_before or self._completion_digest != previous_digest:
+            self._completion_index = CompletionIndex(self.doc_names,
+                                                     self.data_manager.get_all_categories().keys(),
+                                                     self.tag_index.keys())
+        self._completion_digest = self._index_digest
+        save_completion_index(self.data_manager.get_cache_path('cmpl'), self._index_digest,
+                              self._completion_index.to_payload())
+        return True
+    
+    def _own_entry(self, word: str, copied: Tuple[set, set]) -> Optional[Dict[str, tuple]]:
+        """取得词项条目的私有副本 (每次增量更新中每个词项只复制一次)，不存在时返回None"""
+        entry = self.search_index.get(word)
+        if entry is not None and word not in copied[0]:
+            entry = self.search_index[word] = {source: (ids[:], tfs[:]) for source, (ids, tfs) in entry.items()}
+            copied[0].add(word)
+        return entry
+    
+    def _own_tag(self, tag: str, copied: Tuple[set, set]) -> Optional[Any]:
+        """取得标签倒排表的私有副本，不存在时返回None"""
+        postings = self.tag_index.get(tag)
+        if postings is not None and tag not in copied[1]:
+            postings = self.tag_index[tag] = postings[:]
+            copied[1].add(tag)
+        return postings
+    
+    def _retract_postings(self, index: Dict[str, Any], tags: Dict[str, Any], doc_id: int,
+                          copied: Tuple[set, set]):
+        """从倒排表与标签索引中删除一个命令的旧内容"""
+        for word, sources in index.items():
+            entry = self._own_entry(word, copied)
+            if entry is None:
+                continue
+            for source in sources:
+                postings = entry.get(source)
+                if postings is not None and remove_doc(postings[0], doc_id, postings[1]) and not postings[0]:
+                    del entry[source]
+            if not entry:
+                del self.search_index[word]
+        for tag in tags:
+            postings = self._own_tag(tag, copied)
+            if postings is not None and remove_doc(postings, doc_id) and not postings:
+                del self.tag_index[tag]
+    
+    def _insert_postings(self, index: Dict[str, Any], tags: Dict[str, Any],
+                         lengths: Dict[str, Dict[int, int]], doc_id: int, copied: Tuple[set, set]):
+        """把一个命令的新内容加入倒排表、标签索引与字段长度"""
+        for word, sources in index.items():
+            entry = self._own_entry(word, copied)
+            if entry is None:
+                entry = self.search_index[word] = {}
+                copied[0].add(word)
+            for source, postings in sources.items():
+                if source not in entry:
+                    entry[source] = (new_postings(), new_postings())
+                insert_doc(entry[source][0], doc_id, entry[source][1], postings[doc_id])
+        for tag in tags:
+            postings = self._own_tag(tag, copied)
+            if postings is None:
+                postings = self.tag_index[tag] = new_postings()
+                copied[1].add(tag)
+            insert_doc(postings, doc_id)
+        
+        num_docs = len(self.doc_names)
+        for source in set(self.doc_lengths) | set(lengths):
+            if source == 'mapping':
+                continue
+            if source not in self.doc_lengths:
+                self.doc_lengths[source] = new_postings([0] * num_docs)
+            self.doc_lengths[source][doc_id] = lengths.get(source, {}).get(doc_id, 0)
     
     def get_index_stats(self) -> Dict[str, Any]:
         """获取索引统计信息"""
+        self._ensure_indexes()
+        postings = [ids for sources in self.search_index.values() for ids, _ in sources.values()]
+        tag_postings = list(self.tag_index.values())
+        # 倒排表实际占用: ID数组与等长的词频数组
+        postings_bytes = sum(2 * len(ids) * ids.itemsize for ids in postings)
+        postings_bytes += sum(len(ids) * ids.itemsize for ids in tag_postings)
+        postings_bytes += sum(len(lengths) * lengths.itemsize for lengths in self.doc_lengths.values())
         return {
             'total_words': len(self.search_index),
             'total_tags': len(self.tag_index),
-            'total_commands': len(self.data_manager.get_command_list()),
-            'index_size_bytes': len(str(self.search_index).encode('utf-8'))
+            'total_commands': len(self.doc_names),
+            'total_postings': sum(len(ids) for ids in postings),
+            'index_size_bytes': postings_bytes
         }
 
 if __name__ == "__main__":
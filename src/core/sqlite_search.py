@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+SQLite 搜索引擎 - 在 SQLite FTS5 知识库上实现与内存索引相同的搜索接口
+
+倒排表、标签索引和文档名表换成按需查询数据库的只读视图，关键词、标签和结构化查询沿用
+SearchEngine 的逻辑；排序改用 FTS5 的 bm25()，字段权重与内存索引相同。
+"""
+
+import os
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from ..data.sqlite_store import FTS_FIELDS, SqliteStore
+from .ranking import DEFAULT_FIELD_WEIGHTS
+from .search_engine import SearchEngine
+
+
+class _DocNames:
+    """文档ID -> 命令名 (按命令名排序，支持 len/下标)，首次取名时一次读出整列，避免逐个ID查询"""
+
+    def __init__(self, store: SqliteStore):
+        self.store = store
+        self._names = None
+
+    def __len__(self) -> int:
+        return self.store.count
+
+    def __getitem__(self, doc_id: int) -> str:
+        if self._names is None:
+            self._names = self.store.names_by_id()
+        return self._names[doc_id]
+
+
+class _TagIndex:
+    """标签 -> 升序命令ID (按需查询 tags 表)"""
+
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def __contains__(self, tag: str) -> bool:
+        return self.store.has_tag(tag)
+
+    def __getitem__(self, tag: str) -> array:
+        doc_ids = self.store.tag_ids(tag)
+        if not doc_ids:
+            raise KeyError(tag)
+        return doc_ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.tags())
+
+    def __len__(self) -> int:
+        return self.store.stats['total_tags']
+
+
+class _TermIndex:
+    """词项 -> 字段 -> (升序命令ID, 空词频) (按需查询 FTS5，供结构化查询估计结果集大小)"""
+
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def get(self, term: str, default: Any = None) -> Any:
+        sources = {}
+        for field in FTS_FIELDS:
+            doc_ids = self.store.match_ids(field, [term])
+            if doc_ids:
+                sources[field] = (doc_ids, ())
+        return sources or default
+
+    def __len__(self) -> int:
+        return self.store.stats['total_words']
+
+
+class SqliteSearchEngine(SearchEngine):
+    """基于 SQLite FTS5 的搜索引擎 (启动时不加载任何索引)"""
+
+    @property
+    def store(self) -> SqliteStore:
+        return self.data_manager.sqlite_store
+
+    def _completion_terms(self) -> Tuple[List[str], Any, set]:
+        return self.store.names(), self.data_manager.get_all_categories().keys(), set(self.store.tags())
+
+    def _ensure_indexes(self):
+        """知识库变化或数据库被重新打开时换上新数据库的视图"""
+        digest = self.data_manager.get_content_digest()
+        if digest != self._index_digest or getattr(self.doc_names, 'store', None) is not self.store:
+            with self._init_lock:
+                self._rebuild_and_save(digest)
+
+    def _rebuild_and_save(self, digest: str):
+        # 数据库由 DataManager 构建，这里只需换上视图
+        store = self.store
+        self.search_index = _TermIndex(store)
+        self.tag_index = _TagIndex(store)
+        self.keyword_index = {}
+        self.doc_lengths = {}
+        self._ranker = None
+        # 文档名视图与摘要最后赋值，其他线程据此判断视图已就位
+        self.doc_names = _DocNames(store)
+        self._index_digest = digest
+
+    def _match_group_ids(self, group: List[str]) -> Dict[str, Any]:
+        """每个字段中同时包含组内全部词项的命令ID (每个字段一次 FTS5 查询)"""
+        if not group:
+            return {}
+        self._ensure_indexes()
+        matches = {}
+        for field in FTS_FIELDS:
+            doc_ids = self.store.match_ids(field, group)
+            if doc_ids:
+                matches[field] = doc_ids
+        return matches
+
+    def _rank(self, terms: List[str], top_k: Optional[int],
+              field_weights: Dict[str, float] = None) -> List[Tuple[int, float]]:
+        """FTS5 bm25() 打分"""
+        self._ensure_indexes()
+        return self.store.rank(terms, field_weights or DEFAULT_FIELD_WEIGHTS, top_k)
+
+    def apply_changes(self, updates: Dict[str, tuple], previous_digest: str) -> bool:
+        # 数据库随 DataManager 重新加载时整体重建，不做增量更新
+        return False
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        """获取索引统计信息 (构建数据库时记录)"""
+        self._ensure_indexes()
+        stats = dict(self.store.stats)
+        try:
+            stats['index_size_bytes'] = os.path.getsize(self.store.path)
+        except OSError:
+            stats['index_size_bytes'] = 0
+        return stats
@@ -0,0 +1,4 @@
+#!/usr/bin/env python3
+"""
+常驻守护进程模块 - 通过本地Unix套接字提供预热的查询服务
+"""
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+守护进程客户端 - 优先通过套接字执行查询，守护进程不可用时返回None以回退到进程内执行
+"""
+
+import os
+import sys
+import socket
+from typing import List, Optional
+from .protocol import PROTOCOL_VERSION, get_socket_path, send_message, recv_message
+
+# 会修改本地状态或管理守护进程本身的选项始终在进程内执行 (--lang 由守护进程中常驻的两种语言直接处理)
+LOCAL_ONLY_OPTIONS = {'--daemon', '--refresh', '--idle-timeout', '--batch', '--workers',
+                      '--profile', '--profile-memory', '--watch'}
+CONNECT_TIMEOUT = 2.0
+
+
+def run_via_daemon(argv: List[str]) -> Optional[int]:
+    """尝试由守护进程执行，成功时返回退出码，否则返回None"""
+    if os.environ.get('CLEVER_NO_DAEMON') or not hasattr(socket, 'AF_UNIX'):
+        return None
+    if any(arg.split('=', 1)[0] in LOCAL_ONLY_OPTIONS for arg in argv):
+        return None
+
+    socket_path = get_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(socket_path)
+            sock.settimeout(None)
+            send_message(sock, {
+                'v': PROTOCOL_VERSION,
+                'op': 'run',
+                'argv': argv,
+                'interactive': sys.stdin.isatty(),
+                'color': sys.stdout.isatty() and 'NO_COLOR' not in os.environ,
+            })
+            response = recv_message(sock)
+    except OSError:
+        return None
+
+    if not response or response.get('status') != 'ok':
+        return None
+
+    sys.stdout.write(response.get('stdout', ''))
+    sys.stdout.flush()
+    if response.get('stderr'):
+        sys.stderr.write(response['stderr'])
+        sys.stderr.flush()
+    return int(response.get('exit', 0))
+
+
+def request_daemon(op: str, timeout: float = CONNECT_TIMEOUT) -> Optional[dict]:
+    """向守护进程发送控制请求 (status/shutdown)"""
+    socket_path = get_socket_path()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            send_message(sock, {'v': PROTOCOL_VERSION, 'op': op})
+            return recv_message(sock)
+    except OSError:
+        return None
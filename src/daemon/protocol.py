@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+守护进程通信协议 - 4字节长度前缀 + UTF-8 JSON 消息
+"""
+
+import os
+import json
+import struct
+import hashlib
+from typing import Dict, Any, Optional
+from ..utils.file_utils import get_cache_dir
+
+PROTOCOL_VERSION = 1
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+_LENGTH = struct.Struct('>I')
+
+
+def get_default_kb_dir() -> str:
+    """获取默认知识库目录"""
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(src_dir, 'knowledge_base')
+
+
+def get_socket_path(kb_dir: str = None) -> str:
+    """获取守护进程套接字路径 (按用户缓存目录和知识库目录区分)"""
+    kb_dir = kb_dir or get_default_kb_dir()
+    dir_key = hashlib.sha1(os.path.abspath(kb_dir).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(get_cache_dir(), f'daemon-{dir_key}.sock')
+
+
+def send_message(sock, message: Dict[str, Any]):
+    """发送一条消息"""
+    data = json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def _recv_exact(sock, size: int) -> Optional[bytes]:
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock) -> Optional[Dict[str, Any]]:
+    """接收一条消息，连接关闭或数据非法时返回None"""
+    header = _recv_exact(sock, _LENGTH.size)
+    if header is None:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    if length > MAX_MESSAGE_SIZE:
+        return None
+    data = _recv_exact(sock, length)
+    if data is None:
+        return None
+    try:
+        message = json.loads(data.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return message if isinstance(message, dict) else None
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+守护进程服务端 - 在本地Unix套接字后保持预热的 CleverCLI/QueryProcessor
+"""
+
+import io
+import os
+import sys
+import time
+import socket
+from contextlib import redirect_stdout, redirect_stderr
+from typing import Dict, Any, Optional
+from ..cli.interface import CleverCLI
+from ..cli.parser import create_parser
+from .protocol import PROTOCOL_VERSION, get_socket_path, send_message, recv_message
+from .client import request_daemon
+
+DEFAULT_IDLE_TIMEOUT = 900
+
+
+class InteractiveRequired(Exception):
+    """需要与终端交互，守护进程无法代为执行"""
+
+
+class DaemonCLI(CleverCLI):
+    """守护进程中使用的CLI - 需要交互输入时交由客户端在进程内执行"""
+
+    def __init__(self):
+        super().__init__()
+        self.interactive = False
+
+    def _is_interactive(self) -> bool:
+        return self.interactive
+
+    def _prompt(self, text: str) -> str:
+        raise InteractiveRequired()
+
+
+class CleverDaemon:
+    """常驻查询服务 - 知识库变化时自动重载，空闲超时后退出"""
+
+    def __init__(self, socket_path: str = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 cli: DaemonCLI = None):
+        self.socket_path = socket_path or get_socket_path()
+        self.idle_timeout = idle_timeout
+        self.cli = cli or DaemonCLI()
+        self.parser = None
+        self.parser_lang = None
+        self.config_mtime = self._get_config_mtime()
+        self.started_at = time.time()
+        self.requests_served = 0
+        self.running = False
+
+    def _get_config_mtime(self) -> Optional[int]:
+        """语言配置文件的修改时间 (其他进程执行 --lang 时会改变)"""
+        try:
+            return os.stat(self.cli.i18n.config_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def _ensure_fresh(self):
+        """知识库源文件或语言配置变化时重建查询组件"""
+        config_mtime = self._get_config_mtime()
+        if config_mtime != self.config_mtime:
+            # 界面语言变化: 重新读取配置，沿用已常驻的各语言处理器
+            processor = self.cli._processor
+            self.cli = DaemonCLI()
+            if processor is not None:
+                self.cli._processor = processor.for_language(self.cli.i18n.get_language())
+            self.config_mtime = config_mtime
+        processor = self.cli._processor
+        if processor is None:
+            return
+        # 只修改了命令内容时增量更新，其他改动时重新加载快照
+        for resident in processor.get_resident_processors():
+            resident.update_data()
+
+    def _get_parser(self):
+        lang = self.cli.i18n.get_language()
+        if self.parser is None or self.parser_lang != lang:
+            self.parser = create_parser()
+            self.parser_lang = lang
+        return self.parser
+
+    def execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """执行一次命令行请求，返回捕获的输出"""
+        self._ensure_fresh()
+        self.cli.interactive = bool(request.get('interactive'))
+        self.cli.formatter.use_color = bool(request.get('color'))
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        exit_code = 0
+        try:
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    args = self._get_parser().parse_args(request.get('argv', []))
+                    self.cli.run(args, self.parser)
+                except SystemExit as e:
+                    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except InteractiveRequired:
+                    raise
+                except Exception as e:
+                    self.cli.formatter.display_error(str(e))
+                    exit_code = 1
+        except InteractiveRequired:
+            return {'status': 'fallback'}
+
+        return {'status': 'ok', 'exit': exit_code,
+                'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+    def _handle_connection(self, conn: socket.socket):
+        request = recv_message(conn)
+        if not request or request.get('v') != PROTOCOL_VERSION:
+            send_message(conn, {'status': 'fallback'})
+            return
+
+        op = request.get('op')
+        if op == 'run':
+            response = self.execute(request)
+            self.requests_served += 1
+        elif op == 'status':
+            response = {'status': 'ok', 'pid': os.getpid(), 'socket': self.socket_path,
+                        'uptime': time.time() - self.started_at,
+                        'requests': self.requests_served, 'idle_timeout': self.idle_timeout}
+        elif op == 'shutdown':
+            response = {'status': 'ok'}
+            self.running = False
+        else:
+            response = {'status': 'fallback'}
+        send_message(conn, response)
+
+    def serve_forever(self):
+        """监听套接字并处理请求，空闲超时后退出"""
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        old_umask = os.umask(0o077)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        server.listen(16)
+        server.settimeout(self.idle_timeout)
+        self.running = True
+
+        try:
+            while self.running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    break
+                with conn:
+                    conn.settimeout(30)
+                    try:
+                        self._handle_connection(conn)
+                    except OSError:
+                        pass
+        finally:
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+def is_daemon_running(socket_path: str = None) -> bool:
+    """检查守护进程是否在运行"""
+    if not os.path.exists(socket_path or get_socket_path()):
+        return False
+    response = request_daemon('status')
+    return bool(response and response.get('status') == 'ok')
+
+
+def start_daemon(idle_timeout: float = DEFAULT_IDLE_TIMEOUT, cli: DaemonCLI = None,
+                 foreground: bool = False) -> Optional[int]:
+    """启动守护进程 (默认脱离终端在后台运行)，返回后台进程的pid"""
+    daemon = CleverDaemon(idle_timeout=idle_timeout, cli=cli)
+    if foreground:
+        daemon.serve_forever()
+        return os.getpid()
+
+    pid = os.fork()
+    if pid > 0:
+        os.waitpid(pid, 0)
+        # 等待孙进程开始监听
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            response = request_daemon('status') if os.path.exists(daemon.socket_path) else None
+            if response and response.get('status') == 'ok':
+                return response.get('pid')
+            time.sleep(0.01)
+        return None
+
+    # 两次fork脱离会话与控制终端
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    sys.stdout = open(os.devnull, 'w')
+    sys.stderr = open(os.devnull, 'w')
+    try:
+        daemon.serve_forever()
+    finally:
+        os._exit(0)
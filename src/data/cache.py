@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+缓存管理模块 - O(1)操作、按字节预算淘汰、支持TTL与可插拔淘汰策略，可在多个线程间共享
+"""
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+def estimate_size(value: Any) -> int:
+    """估算对象占用的内存字节数 (递归统计容器内容)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+class LRUPolicy:
+    """最近最少使用淘汰策略"""
+
+    name = 'lru'
+
+    def __init__(self):
+        self.order = OrderedDict()
+
+    def record(self, key: str):
+        """记录一次访问请求 (含未命中)"""
+
+    def on_insert(self, key: str):
+        self.order[key] = None
+
+    def on_access(self, key: str):
+        self.order.move_to_end(key)
+
+    def on_remove(self, key: str):
+        self.order.pop(key, None)
+
+    def victim(self) -> Optional[str]:
+        return next(iter(self.order), None)
+
+    def admit(self, candidate: str, victim: str) -> bool:
+        return True
+
+
+class LFUPolicy:
+    """最不经常使用淘汰策略 (频次分桶，同频次内按LRU)"""
+
+    name = 'lfu'
+
+    def __init__(self):
+        self.freqs = {}
+        self.buckets = {}
+        self.min_freq = 0
+
+    def record(self, key: str):
+        pass
+
+    def on_insert(self, key: str):
+        self.freqs[key] = 1
+        self.buckets.setdefault(1, OrderedDict())[key] = None
+        self.min_freq = 1
+
+    def on_access(self, key: str):
+        freq = self.freqs[key]
+        bucket = self.buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+        self.freqs[key] = freq + 1
+        self.buckets.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def on_remove(self, key: str):
+        freq = self.freqs.pop(key, None)
+        if freq is None:
+            return
+        bucket = self.buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[freq]
+
+    def victim(self) -> Optional[str]:
+        if not self.buckets:
+            return None
+        if self.min_freq not in self.buckets:
+            self.min_freq = min(self.buckets)
+        return next(iter(self.buckets[self.min_freq]))
+
+    def admit(self, candidate: str, victim: str) -> bool:
+        return True
+
+
+class CountMinSketch:
+    """Count-Min频率估计 (4位饱和计数，定期减半实现老化)"""
+
+    def __init__(self, width: int = 1024, depth: int = 4, sample_size: int = None):
+        self.width = width
+        self.depth = depth
+        self.table = [bytearray(width) for _ in range(depth)]
+        self.sample_size = sample_size or width * 10
+        self.additions = 0
+
+    def _indexes(self, key: str):
+        h = hash(key)
+        for i in range(self.depth):
+            yield i, (h ^ (h >> (i * 8 + 7)) ^ (i * 0x9E3779B1)) % self.width
+
+    def increment(self, key: str):
+        for row, col in self._indexes(key):
+            if self.table[row][col] < 15:
+                self.table[row][col] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._reset()
+
+    def estimate(self, key: str) -> int:
+        return min(self.table[row][col] for row, col in self._indexes(key))
+
+    def _reset(self):
+        for row in self.table:
+            for col in range(self.width):
+                row[col] >>= 1
+        self.additions //= 2
+
+
+class TinyLFUPolicy(LRUPolicy):
+    """TinyLFU准入策略 - 按LRU选出淘汰候选，仅当新项历史频率更高时才准入"""
+
+    name = 'tinylfu'
+
+    def __init__(self, sketch_width: int = 1024):
+        super().__init__()
+        self.sketch = CountMinSketch(sketch_width)
+
+    def record(self, key: str):
+        self.sketch.increment(key)
+
+    def admit(self, candidate: str, victim: str) -> bool:
+        return self.sketch.estimate(candidate) > self.sketch.estimate(victim)
+
+
+EVICTION_POLICIES = {
+    'lru': LRUPolicy,
+    'lfu': LFUPolicy,
+    'tinylfu': TinyLFUPolicy,
+}
+
+
+class CacheManager:
+    """缓存管理器 - 按字节预算淘汰，所有操作O(1)"""
+
+    def __init__(self, max_size: int = None, max_bytes: int = 4 * 1024 * 1024,
+                 ttl: float = None, policy: str = 'lru', name: str = 'default',
+                 size_func: Callable[[Any], int] = estimate_size):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.name = name
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_func = size_func
+        self.policy = EVICTION_POLICIES[policy]()
+        # key -> (value, size, expires_at)
+        self.cache = {}
+        self.current_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'rejections': 0}
+        # 保护缓存表、淘汰策略状态与统计 (临界区都是O(1)操作)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存项"""
+        with self._lock:
+            self.policy.record(key)
+            entry = self.cache.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            value, _, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self.policy.on_access(key)
+            self.stats['hits'] += 1
+            return value
+
+    def put(self, key: str, value: Any) -> bool:
+        """添加缓存项，超出预算时按策略淘汰；返回是否被缓存"""
+        # 估算大小可能较慢，放在锁外进行
+        size = self.size_func(value)
+        if size > self.max_bytes:
+            with self._lock:
+                self.stats['rejections'] += 1
+            return False
+
+        with self._lock:
+            # 更新已缓存的键视为已准入，不参与准入比较，避免被拒绝时连旧值一起丢失
+            admitted = key in self.cache
+            if admitted:
+                self._remove(key)
+
+            while self._over_budget(size):
+                victim = self.policy.victim()
+                if victim is None:
+                    break
+                if not admitted and not self.policy.admit(key, victim):
+                    self.stats['rejections'] += 1
+                    return False
+                admitted = True
+                self._remove(victim)
+                self.stats['evictions'] += 1
+
+            expires_at = time.monotonic() + self.ttl if self.ttl else None
+            self.cache[key] = (value, size, expires_at)
+            self.current_bytes += size
+            self.policy.on_insert(key)
+            return True
+
+    def _over_budget(self, incoming_size: int) -> bool:
+        if self.current_bytes + incoming_size > self.max_bytes:
+            return True
+        return self.max_size is not None and len(self.cache) >= self.max_size
+
+    def _remove(self, key: str):
+        _, size, _ = self.cache.pop(key)
+        self.current_bytes -= size
+        self.policy.on_remove(key)
+
+    def invalidate(self, key: str) -> bool:
+        """移除指定缓存项"""
+        with self._lock:
+            if key not in self.cache:
+                return False
+            self._remove(key)
+            return True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.cache
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for key in list(self.cache):
+                self._remove(key)
+            self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'rejections': 0}
+
+    def size(self) -> int:
+        """获取缓存项数量"""
+        return len(self.cache)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            stats = self.stats.copy()
+            entries, current_bytes = len(self.cache), self.current_bytes
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'policy': self.policy.name,
+            'entries': entries,
+            'bytes': current_bytes,
+            'max_bytes': self.max_bytes,
+            'hit_rate': stats['hits'] / lookups * 100 if lookups else 0,
+        })
+        return stats
@@ -4,16 +4,26 @@
 """
 
 import os
+import copy
 import glob
 from typing import Dict, List, Optional, Any
 from pathlib import Path
-from ..utils.file_utils import load_json_file, list_json_files
+from ..utils.file_utils import load_json_file, list_json_files, atomic_write_bytes
 from ..utils.i18n import I18nManager
+from .snapshot import (load_or_compile, manifest_digest, get_artifact_path, get_snapshot_path,
+                       get_shard_path, diff_manifest, read_shard, save_shard)
+from .location_index import CommandLocationIndex, load_or_build_location_index
+from .record_store import RecordStore, load_or_build_record_store
+from .sqlite_store import SqliteStore, load_or_build_sqlite_store
+from .cache import CacheManager
 
 class DataManager:
     """数据管理器 - 负责JSON数据的加载、缓存和管理"""
     
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, i18n_manager: I18nManager = None,
+                 use_snapshot: bool = True, cache_bytes: int = 4 * 1024 * 1024, cache_policy: str = 'lru',
+                 cache_ttl: float = None, language: str = None, shared_strings: Dict[str, str] = None,
+                 backend: str = None):
         if data_dir:
             self.data_dir = data_dir
         else:
@@ -22,63 +32,221 @@ class DataManager:
             src_dir = os.path.dirname(current_dir)
             self.data_dir = os.path.join(src_dir, 'knowledge_base')
         
-        # 初始化国际化管理器
-        self.i18n = I18nManager(self.data_dir)
+        # 初始化国际化管理器 (可与CLI共享同一实例，避免重复读取配置)
+        self.i18n = i18n_manager or I18nManager(self.data_dir)
+        # 数据语言在创建时确定，与界面语言配置解耦，多种语言可以各自常驻
+        self.language = language or self.i18n.get_language()
+        # 同一进程中各语言共享的字符串表 (命令名、选项标志、示例命令在中英文知识库中相同)
+        self.shared_strings = shared_strings if shared_strings is not None else {}
         
-        self.commands_cache = {}
+        self.use_snapshot = use_snapshot
+        self.snapshot = None
+        # 存储后端: json (默认，预编译快照) 或 sqlite (SQLite FTS5 数据库，不可用时回退到快照)
+        self.backend = (backend or os.environ.get('CLEVER_BACKEND') or 'json').lower()
+        self.sqlite_store = None
+        self.location_index = None
+        # 内存映射的命令记录库 (快照模式下使用)，None 表示尚未打开
+        self.record_store = None
+        self._record_store_opened = False
+        # 唯一的命令记录缓存层，CommandLoader 共享同一实例
+        self.commands_cache = CacheManager(max_bytes=cache_bytes, ttl=cache_ttl,
+                                           policy=cache_policy, name='commands')
+        # 已加载的命令分片: 分类文件相对路径 -> 该文件中的命令记录
+        self.file_cache = CacheManager(max_bytes=cache_bytes, ttl=cache_ttl,
+                                       policy=cache_policy, name='files')
+        self._all_commands = None
         self.categories = {}
         self.search_mappings = {}
         self.meta = {}
         self._load_meta_data()
     
-    def _load_meta_data(self):
+    def _load_meta_data(self, force_compile: bool = False):
         """加载元数据"""
-        current_lang = self.i18n.get_language()
+        current_lang = self.language
+        self.location_index = None
+        if self.sqlite_store is not None:
+            self.sqlite_store.close()
+            self.sqlite_store = None
+        if self.backend == 'sqlite':
+            from ..core.analyzer import get_analyzer
+            self.sqlite_store = load_or_build_sqlite_store(self.data_dir, current_lang,
+                                                           get_analyzer(current_lang).analyze, force=force_compile)
+            if self.sqlite_store is not None:
+                self.snapshot = None
+                self.meta = self.sqlite_store.meta
+                self.categories = self.sqlite_store.categories
+                self.search_mappings = self.sqlite_store.search_mappings
+                return
+        if self.use_snapshot:
+            # 一次读取预编译快照，过期时自动重新编译
+            self.snapshot = load_or_compile(self.data_dir, current_lang, force=force_compile)
+            self.meta = self.snapshot.meta
+            self.categories = self.snapshot.categories
+            self.search_mappings = self.snapshot.search_mappings
+            return
+        
         self.meta = load_json_file(os.path.join(self.data_dir, f'meta_{current_lang}.json')) or {}
         self.categories = load_json_file(os.path.join(self.data_dir, f'categories_{current_lang}.json')) or {}
         self.search_mappings = load_json_file(os.path.join(self.data_dir, f'search_mappings_{current_lang}.json')) or {}
     
     def load_command(self, command_name: str) -> Optional[Dict[str, Any]]:
         """懒加载单个命令数据"""
-        if command_name in self.commands_cache:
-            return self.commands_cache[command_name]
+        command_data = self.commands_cache.get(command_name)
+        if command_data is not None:
+            return command_data
         
-        # 获取当前语言的命令目录
-        current_lang = self.i18n.get_language()
-        commands_dir = os.path.join(self.data_dir, f'commands_{current_lang}')
+        command_data = self.fetch_command(command_name)
+        if command_data:
+            self.commands_cache.put(command_name, command_data)
+        return command_data
+    
+    def fetch_command(self, command_name: str) -> Optional[Dict[str, Any]]:
+        """从数据源读取单个命令 (不经过命令缓存)"""
+        if self._all_commands is not None:
+            return self._all_commands.get(command_name)
         
-        # 搜索所有分类文件
-        category_files = glob.glob(os.path.join(commands_dir, '*.json'))
-        for category_file in category_files:
-            category_data = load_json_file(category_file)
-            if category_data and 'commands' in category_data:
-                commands = category_data['commands']
-                if command_name in commands:
-                    command_data = commands[command_name]
-                    self.commands_cache[command_name] = command_data
-                    return command_data
+        if self.sqlite_store is not None:
+            command_data = self.sqlite_store.get(command_name)
+            return self._share_record(command_data) if command_data is not None else None
+        
+        # 记录库中二分查找，只解码这一条记录
+        store = self.get_record_store()
+        if store is not None:
+            command_data = store.get(command_name)
+            return self._share_record(command_data) if command_data is not None else None
+        
+        # 通过位置索引定位，未知命令直接返回，无需文件I/O；已知命令只加载其所在分片
+        location = self.get_location_index().lookup(command_name)
+        if location is None:
+            return None
+        
+        rel_path, key = location
+        return self.load_shard(rel_path).get(key)
+    
+    def fetch_commands(self, command_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量读取命令 (不经过命令缓存)，按分片分组，每个分片只加载一次"""
+        records = self._all_commands
+        if records is not None:
+            return {name: records[name] for name in command_names if name in records}
+        
+        if self.sqlite_store is not None:
+            return {name: self._share_record(command_data)
+                    for name, command_data in self.sqlite_store.get_many(command_names).items()}
+        
+        store = self.get_record_store()
+        if store is not None:
+            results = {}
+            for command_name in command_names:
+                command_data = store.get(command_name)
+                if command_data is not None:
+                    results[command_name] = self._share_record(command_data)
+            return results
+        
+        location_index = self.get_location_index()
+        by_file = {}
+        for command_name in command_names:
+            location = location_index.lookup(command_name)
+            if location is not None:
+                by_file.setdefault(location[0], []).append((command_name, location[1]))
         
-        return None
+        results = {}
+        for rel_path, entries in by_file.items():
+            commands = self.load_shard(rel_path)
+            for command_name, key in entries:
+                if key in commands:
+                    results[command_name] = commands[key]
+        return results
+    
+    def load_shard(self, rel_path: str) -> Dict[str, Dict[str, Any]]:
+        """加载一个分类文件中的全部命令记录 (快照模式下读取预编译分片)"""
+        commands = self.file_cache.get(rel_path)
+        if commands is not None:
+            return commands
+        
+        if self.snapshot is not None:
+            commands = self.snapshot.load_shard(self.data_dir, rel_path)
+        else:
+            category_data = load_json_file(os.path.join(self.data_dir, rel_path)) or {}
+            commands = category_data.get('commands', {})
+        commands = self._share_strings(commands)
+        self.file_cache.put(rel_path, commands)
+        return commands
+    
+    def _share_strings(self, commands: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """把命令名、分类键、选项标志、示例命令和相关命令替换为跨语言共享的字符串对象，两种语言常驻时不重复占用内存"""
+        shared = self.shared_strings.setdefault
+        return {shared(key, key): self._share_record(command_data) for key, command_data in commands.items()}
+    
+    def _share_record(self, command_data: Dict[str, Any]) -> Dict[str, Any]:
+        """原地替换单条记录中可跨语言共享的字符串"""
+        if not isinstance(command_data, dict):
+            return command_data
+        shared = self.shared_strings.setdefault
+        for field in ('command', 'name', 'category'):
+            value = command_data.get(field)
+            if isinstance(value, str):
+                command_data[field] = shared(value, value)
+        for field, item_key in (('options', 'option'), ('examples', 'command')):
+            for item in command_data.get(field) or ():
+                value = item.get(item_key) if isinstance(item, dict) else None
+                if isinstance(value, str):
+                    item[item_key] = shared(value, value)
+        related = command_data.get('related_commands')
+        if isinstance(related, list):
+            command_data['related_commands'] = [shared(name, name) if isinstance(name, str) else name
+                                                 for name in related]
+        return command_data
+    
+    def get_command_summaries(self, command_names: List[str]) -> Dict[str, Dict[str, str]]:
+        """批量获取命令摘要 (描述/分类)，用于列表与搜索结果展示，不占用命令缓存"""
+        summaries = {}
+        for command_name, command_data in self.fetch_commands(list(dict.fromkeys(command_names))).items():
+            summaries[command_name] = {
+                'description': command_data.get('description', ''),
+                'category': command_data.get('category', ''),
+            }
+        return summaries
     
     def load_all_commands(self) -> Dict[str, Dict[str, Any]]:
-        """加载所有命令数据"""
-        if len(self.commands_cache) > 0:
-            return self.commands_cache
+        """加载所有命令数据 (仅供建索引等确实需要全量数据的操作使用)"""
+        if self._all_commands is not None:
+            return self._all_commands
+        
+        if self.sqlite_store is not None:
+            self._all_commands = self._share_strings(dict(self.sqlite_store.iter_records()))
+            return self._all_commands
+        
+        if self.snapshot is not None:
+            # 逐个读取分片，不放入分片缓存以免挤掉按需加载的分片
+            all_commands = {}
+            for rel_path in self.snapshot.shard_files():
+                commands = self.file_cache.get(rel_path)
+                all_commands.update(commands if commands is not None
+                                    else self._share_strings(self.snapshot.load_shard(self.data_dir, rel_path)))
+            self._all_commands = all_commands
+            return self._all_commands
         
         # 获取当前语言的命令目录
-        current_lang = self.i18n.get_language()
+        current_lang = self.language
         commands_dir = os.path.join(self.data_dir, f'commands_{current_lang}')
         
         # 加载所有分类文件
-        category_files = glob.glob(os.path.join(commands_dir, '*.json'))
+        all_commands = {}
+        category_files = sorted(glob.glob(os.path.join(commands_dir, '*.json')))
         for category_file in category_files:
             category_data = load_json_file(category_file)
             if category_data and 'commands' in category_data:
-                commands = category_data['commands']
-                for command_name, command_data in commands.items():
-                    self.commands_cache[command_name] = command_data
+                all_commands.update(self._share_strings(category_data['commands']))
         
-        return self.commands_cache
+        self._all_commands = all_commands
+        return self._all_commands
+    
+    def fetch_category_commands(self, category: str) -> Dict[str, Dict[str, Any]]:
+        """读取分类下全部命令记录 (不经过命令缓存；SQLite 后端为一次联表查询)"""
+        if self.sqlite_store is not None and self._all_commands is None:
+            return {name: self._share_record(command_data)
+                    for name, command_data in self.sqlite_store.category_commands(category).items()}
+        return self.fetch_commands(self.get_commands_by_category(category))
     
     def get_commands_by_category(self, category: str) -> List[str]:
         """根据分类获取命令列表"""
@@ -95,9 +263,15 @@ class DataManager:
         return self.search_mappings
     
     def get_command_list(self) -> List[str]:
-        """获取所有可用命令列表"""
-        self.load_all_commands()
-        return list(self.commands_cache.keys())
+        """获取所有可用命令列表 (来自位置索引，无需加载命令记录)"""
+        if self._all_commands is not None:
+            return list(self._all_commands)
+        if self.sqlite_store is not None:
+            return self.sqlite_store.names()
+        store = self.get_record_store()
+        if store is not None:
+            return store.names()
+        return self.get_location_index().names()
     
     def validate_command_data(self, command_data: Dict[str, Any]) -> bool:
         """验证命令数据格式"""
@@ -113,25 +287,205 @@ class DataManager:
         """获取元数据信息"""
         return self.meta
     
-    def refresh_cache(self):
-        """刷新缓存"""
-        self.commands_cache.clear()
+    def reload(self):
+        """清空缓存并重新加载快照 (快照过期时只重新解析内容有变化的文件)"""
+        self._clear_caches()
         self._load_meta_data()
     
+    def refresh_cache(self):
+        """刷新缓存并重新编译快照"""
+        self._clear_caches()
+        self._load_meta_data(force_compile=True)
+    
+    def sources_changed(self) -> bool:
+        """源文件是否可能与已加载的数据不一致 (先比较文件元数据；非快照模式总是返回True)"""
+        if self.sqlite_store is not None:
+            return not self.sqlite_store.is_current(self.data_dir)
+        if self.snapshot is not None:
+            return bool(diff_manifest(self.data_dir, self.language, self.snapshot.manifest))
+        return True
+    
+    def fork(self) -> 'DataManager':
+        """创建共享只读数据 (快照中的位置表、分类、映射与记录) 的副本，缓存、快照清单与打开的存储各自独立
+        
+        增量更新或重新加载在副本上进行，仍在使用本实例的读者看到的数据不变。
+        """
+        clone = copy.copy(self)
+        clone.commands_cache = CacheManager(max_bytes=self.commands_cache.max_bytes, ttl=self.commands_cache.ttl,
+                                            policy=self.commands_cache.policy.name, name=self.commands_cache.name)
+        clone.file_cache = CacheManager(max_bytes=self.file_cache.max_bytes, ttl=self.file_cache.ttl,
+                                        policy=self.file_cache.policy.name, name=self.file_cache.name)
+        if self.snapshot is not None:
+            clone.snapshot = copy.copy(self.snapshot)
+            clone.snapshot.manifest = dict(self.snapshot.manifest)
+        if self._all_commands is not None:
+            clone._all_commands = dict(self._all_commands)
+        clone.location_index = None
+        clone.record_store = None
+        clone._record_store_opened = False
+        if self.sqlite_store is not None:
+            # 副本使用自己的连接，副本重新加载时关闭连接不影响本实例
+            clone.sqlite_store = SqliteStore.open(self.sqlite_store.path)
+            if clone.sqlite_store is None:
+                clone._load_meta_data()
+        return clone
+    
+    def update_changed_files(self) -> Optional[Dict[str, tuple]]:
+        """按文件检测源文件变化并增量更新快照、分片与缓存
+        
+        返回 {命令名: (旧记录, 新记录)}，只包含内容真正改变的命令；源文件未变化时返回空字典。
+        分类/映射/元数据文件变化、分类文件增删、文件中的命令增删或旧分片缺失时无法增量更新，返回None。
+        """
+        if self.sqlite_store is not None:
+            # SQLite 后端不做增量更新，源文件变化时整体重建数据库
+            return {} if self.sqlite_store.is_current(self.data_dir) else None
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+        current_lang = self.language
+        previous_digest = snapshot.content_digest()
+        changes = diff_manifest(self.data_dir, current_lang, snapshot.manifest)
+        if not changes:
+            return {}
+        
+        prefix = f'commands_{current_lang}'
+        edited = {}
+        for rel_path, entry in changes.items():
+            old_entry = snapshot.manifest.get(rel_path)
+            if entry is None or old_entry is None:
+                return None
+            if entry[2] == old_entry[2]:
+                # 只有时间戳变化
+                continue
+            if not rel_path.startswith(prefix):
+                return None
+            edited[rel_path] = entry
+        
+        # 先读取全部新旧记录，确认可以增量更新后再修改状态
+        shard_updates = []
+        for rel_path, entry in edited.items():
+            path = get_shard_path(self.data_dir, current_lang, rel_path)
+            old_records = read_shard(path, rel_path, snapshot.manifest[rel_path][2])
+            category_data = load_json_file(os.path.join(self.data_dir, rel_path))
+            if old_records is None or not category_data or 'commands' not in category_data:
+                return None
+            new_records = category_data['commands']
+            if list(new_records) != list(old_records):
+                return None
+            shard_updates.append((rel_path, path, entry, old_records, new_records))
+        
+        updates = {}
+        for rel_path, path, entry, old_records, new_records in shard_updates:
+            save_shard(path, rel_path, entry[2], new_records)
+            new_records = self._share_strings(new_records)
+            self.file_cache.invalidate(rel_path)
+            for command_name, new_data in new_records.items():
+                old_data = old_records[command_name]
+                if old_data == new_data or snapshot.locations.get(command_name) != (rel_path, command_name):
+                    continue
+                updates[command_name] = (old_data, new_data)
+                self.commands_cache.invalidate(command_name)
+                if self._all_commands is not None:
+                    self._all_commands[command_name] = new_data
+        
+        # 清单原地更新 (位置索引与快照共享同一清单)，写回快照头
+        for rel_path, entry in changes.items():
+            snapshot.manifest[rel_path] = entry
+        snapshot.save(get_snapshot_path(self.data_dir, current_lang))
+        if edited:
+            self._patch_record_store(previous_digest, {name: new_data for name, (_, new_data) in updates.items()})
+        return updates
+    
+    def _patch_record_store(self, previous_digest: str, records: Dict[str, Dict[str, Any]]):
+        """增量更新后改写记录库: 未变化的记录直接复制原始字节 (记录库本已过期时留待下次使用时完整重建)"""
+        path = self.get_cache_path('rec')
+        store = self.record_store if self.record_store is not None else RecordStore.open(path)
+        self.record_store = None
+        self._record_store_opened = False
+        if store is None:
+            return
+        try:
+            if store.digest == previous_digest:
+                atomic_write_bytes(path, store.dumps_updated(self.snapshot.content_digest(), records))
+        finally:
+            store.close()
+    
+    def get_record_store(self) -> Optional[RecordStore]:
+        """获取内存映射的命令记录库 (仅快照模式；缺失或过期时由分片重建，缓存不可写时返回None)"""
+        if not self._record_store_opened and self.snapshot is not None:
+            self._record_store_opened = True
+            snapshot = self.snapshot
+            
+            def snapshot_records():
+                for rel_path in snapshot.shard_files():
+                    commands = self.file_cache.get(rel_path)
+                    if commands is None:
+                        commands = snapshot.load_shard(self.data_dir, rel_path)
+                    yield from commands.items()
+            
+            self.record_store = load_or_build_record_store(
+                self.get_cache_path('rec'), snapshot.content_digest(), snapshot_records
+            )
+        return self.record_store
+    
+    def _close_record_store(self):
+        """关闭记录库 (知识库变化后下次使用时重新打开并按需重建)"""
+        if self.record_store is not None:
+            self.record_store.close()
+        self.record_store = None
+        self._record_store_opened = False
+    
+    def get_location_index(self) -> CommandLocationIndex:
+        """获取命令位置索引 (快照模式下直接复用快照中的位置表)"""
+        if self.location_index is None:
+            current_lang = self.language
+            if self.sqlite_store is not None:
+                self.location_index = CommandLocationIndex(
+                    current_lang, self.sqlite_store.locations(), self.sqlite_store.manifest
+                )
+            elif self.snapshot is not None:
+                self.location_index = CommandLocationIndex(
+                    current_lang, self.snapshot.locations, self.snapshot.manifest
+                )
+            else:
+                self.location_index = load_or_build_location_index(self.data_dir, current_lang)
+        return self.location_index
+    
+    def get_content_digest(self) -> str:
+        """获取当前语言知识库的内容摘要"""
+        if self.sqlite_store is not None:
+            return self.sqlite_store.digest
+        if self.snapshot is not None:
+            return self.snapshot.content_digest()
+        return manifest_digest(self.get_location_index().manifest)
+    
+    def get_cache_path(self, suffix: str) -> str:
+        """获取当前语言缓存产物的路径"""
+        return get_artifact_path(self.data_dir, self.language, suffix)
+    
     def get_command_file_path(self, command_name: str) -> Optional[str]:
         """获取命令文件路径"""
-        current_lang = self.i18n.get_language()
-        commands_dir = os.path.join(self.data_dir, f'commands_{current_lang}')
-        
-        # 搜索所有分类文件
-        category_files = glob.glob(os.path.join(commands_dir, '*.json'))
-        for category_file in category_files:
-            category_data = load_json_file(category_file)
-            if category_data and 'commands' in category_data:
-                commands = category_data['commands']
-                if command_name in commands:
-                    return category_file
-        return None
+        if self.sqlite_store is not None:
+            location = self.sqlite_store.location(command_name)
+        else:
+            location = self.get_location_index().lookup(command_name)
+        if location is None:
+            return None
+        return os.path.join(self.data_dir, location[0])
+    
+    def _clear_caches(self):
+        """清空所有缓存层"""
+        self.commands_cache.clear()
+        self.file_cache.clear()
+        self._all_commands = None
+        self._close_record_store()
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各缓存层的统计信息"""
+        return {
+            self.commands_cache.name: self.commands_cache.get_stats(),
+            self.file_cache.name: self.file_cache.get_stats(),
+        }
     
     def get_i18n_manager(self) -> I18nManager:
         """获取国际化管理器"""
@@ -141,50 +495,12 @@ class DataManager:
         """设置语言并重新加载数据"""
         if self.i18n.set_language(language):
             # 清空缓存并重新加载元数据
-            self.commands_cache.clear()
+            self.language = language
+            self._clear_caches()
             self._load_meta_data()
             return True
         return False
 
-class CacheManager:
-    """缓存管理器 - 实现LRU缓存策略"""
-    
-    def __init__(self, max_size: int = 100):
-        self.max_size = max_size
-        self.cache = {}
-        self.access_order = []
-    
-    def get(self, key: str) -> Optional[Any]:
-        """获取缓存项"""
-        if key in self.cache:
-            # 更新访问顺序
-            self.access_order.remove(key)
-            self.access_order.append(key)
-            return self.cache[key]
-        return None
-    
-    def put(self, key: str, value: Any):
-        """添加缓存项"""
-        if key in self.cache:
-            # 更新现有项
-            self.access_order.remove(key)
-        elif len(self.cache) >= self.max_size:
-            # 移除最久未使用的项
-            oldest_key = self.access_order.pop(0)
-            del self.cache[oldest_key]
-        
-        self.cache[key] = value
-        self.access_order.append(key)
-    
-    def clear(self):
-        """清空缓存"""
-        self.cache.clear()
-        self.access_order.clear()
-    
-    def size(self) -> int:
-        """获取缓存大小"""
-        return len(self.cache)
-
 if __name__ == "__main__":
     # 测试数据管理器
     dm = DataManager()
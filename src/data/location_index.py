@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+命令位置索引 - 持久化的 命令名 -> (分类文件, 键) 映射
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+from ..utils.file_utils import load_json_file, atomic_write_bytes
+from .snapshot import (build_source_manifest, manifest_is_current, get_artifact_path,
+                       dump_artifact, read_artifact)
+
+LOCATION_INDEX_MAGIC = b'CLVRLOCX'
+LOCATION_INDEX_VERSION = 1
+
+
+class CommandLocationIndex:
+    """命令位置索引 - 单次查找只读取一个分类文件，未知命令无需任何文件I/O"""
+
+    def __init__(self, language: str, locations: Dict[str, Tuple[str, str]],
+                 manifest: Dict[str, list]):
+        self.language = language
+        self.locations = locations
+        self.manifest = manifest
+
+    @classmethod
+    def build(cls, data_dir: str, language: str) -> 'CommandLocationIndex':
+        """扫描分类文件构建位置索引"""
+        manifest = build_source_manifest(data_dir, language)
+        locations = {}
+        for rel_path in manifest:
+            if not rel_path.startswith(f'commands_{language}'):
+                continue
+            category_data = load_json_file(os.path.join(data_dir, rel_path))
+            if category_data and 'commands' in category_data:
+                for command_name in category_data['commands']:
+                    locations[command_name] = (rel_path, command_name)
+        return cls(language, locations, manifest)
+
+    def lookup(self, command_name: str) -> Optional[Tuple[str, str]]:
+        """查找命令所在的 (相对文件路径, 键)"""
+        return self.locations.get(command_name)
+
+    def __contains__(self, command_name: str) -> bool:
+        return command_name in self.locations
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def names(self) -> List[str]:
+        """所有已索引的命令名"""
+        return list(self.locations)
+
+    def is_current(self, data_dir: str) -> bool:
+        """索引是否仍与源文件一致"""
+        return manifest_is_current(data_dir, self.language, self.manifest)
+
+    def save(self, path: str) -> bool:
+        """原子写入索引文件"""
+        payload = (self.language, self.locations, self.manifest)
+        return atomic_write_bytes(path, dump_artifact(LOCATION_INDEX_MAGIC, LOCATION_INDEX_VERSION, payload))
+
+    @classmethod
+    def load(cls, path: str) -> Optional['CommandLocationIndex']:
+        """加载索引文件"""
+        payload = read_artifact(path, LOCATION_INDEX_MAGIC, LOCATION_INDEX_VERSION)
+        if not isinstance(payload, tuple) or len(payload) != 3:
+            return None
+        return cls(*payload)
+
+
+def load_or_build_location_index(data_dir: str, language: str, cache_dir: str = None,
+                                 force: bool = False) -> CommandLocationIndex:
+    """加载位置索引，缺失或过期时重建并原子写回"""
+    path = get_artifact_path(data_dir, language, 'loc', cache_dir)
+
+    if not force:
+        index = CommandLocationIndex.load(path)
+        if index and index.language == language and index.is_current(data_dir):
+            return index
+
+    index = CommandLocationIndex.build(data_dir, language)
+    index.save(path)
+    return index
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+命令记录库 - 每种语言一个内存映射文件，按命令名二分查找，只解码被查询的那一条记录
+
+文件布局 (小端):
+    文件头      _HEADER + 知识库内容摘要(40字节) + 命令数 + 名称区字节数
+    名称表      按UTF-8字节排序的定长表项 (名称偏移, 名称长度, 记录偏移)
+    原始顺序    命令数个 uint32，按知识库中的顺序给出名称表下标
+    名称区      依次拼接的UTF-8命令名
+    记录区      每条记录为 uint32 长度前缀 + marshal 数据
+
+以只读 mmap 打开，同一主机上的多个进程共享同一份页缓存，而不是各自持有一份知识库副本。
+"""
+
+import sys
+import mmap
+import struct
+import marshal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from ..utils.file_utils import atomic_write_bytes
+from .snapshot import _HEADER
+
+RECORD_STORE_MAGIC = b'CLVRRECS'
+RECORD_STORE_VERSION = 1
+# 内容摘要 + 命令数 + 名称区字节数
+_STORE_HEADER = struct.Struct('<40sIQ')
+# 名称偏移 (相对名称区) + 名称长度 + 记录偏移 (相对文件开头)
+_ENTRY = struct.Struct('<IIQ')
+_ORDER = struct.Struct('<I')
+_LENGTH = struct.Struct('<I')
+
+
+class RecordStore:
+    """内存映射的命令记录库 (只读)"""
+
+    def __init__(self, mapped: mmap.mmap, digest: str, count: int):
+        self._mm = mapped
+        self.digest = digest
+        self.count = count
+        self._table = _HEADER.size + _STORE_HEADER.size
+        self._order = self._table + _ENTRY.size * count
+        self._names = self._order + _ORDER.size * count
+
+    @classmethod
+    def open(cls, path: str) -> Optional['RecordStore']:
+        """打开记录库文件，不存在、格式或版本不匹配时返回None"""
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        header_size = _HEADER.size + _STORE_HEADER.size
+        expected = (RECORD_STORE_MAGIC, RECORD_STORE_VERSION, marshal.version,
+                    sys.version_info[0], sys.version_info[1])
+        if len(mapped) < header_size or _HEADER.unpack_from(mapped) != expected:
+            mapped.close()
+            return None
+        digest, count, names_size = _STORE_HEADER.unpack_from(mapped, _HEADER.size)
+        if len(mapped) < header_size + (_ENTRY.size + _ORDER.size) * count + names_size:
+            mapped.close()
+            return None
+        return cls(mapped, digest.decode('ascii'), count)
+
+    def close(self):
+        self._mm.close()
+
+    def _name_at(self, index: int) -> bytes:
+        name_offset, name_length, _ = _ENTRY.unpack_from(self._mm, self._table + index * _ENTRY.size)
+        start = self._names + name_offset
+        return self._mm[start:start + name_length]
+
+    def _find(self, command_name: str) -> int:
+        """二分查找命令在名称表中的下标，未找到时返回-1"""
+        try:
+            key = command_name.encode('utf-8')
+        except UnicodeEncodeError:
+            return -1
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._name_at(lo) == key:
+            return lo
+        return -1
+
+    def _record_span(self, index: int) -> Tuple[int, int]:
+        _, _, record_offset = _ENTRY.unpack_from(self._mm, self._table + index * _ENTRY.size)
+        (length,) = _LENGTH.unpack_from(self._mm, record_offset)
+        start = record_offset + _LENGTH.size
+        return start, start + length
+
+    def _record_at(self, index: int) -> Dict[str, Any]:
+        start, end = self._record_span(index)
+        # 直接在映射内存上解码，不复制记录字节
+        with memoryview(self._mm)[start:end] as blob:
+            return marshal.loads(blob)
+
+    def _ordered_indexes(self) -> List[int]:
+        mm, order = self._mm, self._order
+        return [_ORDER.unpack_from(mm, order + i * _ORDER.size)[0] for i in range(self.count)]
+
+    def get(self, command_name: str) -> Optional[Dict[str, Any]]:
+        """查找并解码单条命令记录"""
+        index = self._find(command_name)
+        return self._record_at(index) if index >= 0 else None
+
+    def __contains__(self, command_name: str) -> bool:
+        return self._find(command_name) >= 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def names(self) -> List[str]:
+        """所有命令名 (保持知识库中的顺序)"""
+        return [self._name_at(index).decode('utf-8') for index in self._ordered_indexes()]
+
+    def dumps_updated(self, digest: str, records: Dict[str, Dict[str, Any]]) -> bytes:
+        """生成替换部分记录后的记录库内容 (命令集合不变): 只重新编码变化的记录，其余直接复制原始字节"""
+        items = []
+        for index in self._ordered_indexes():
+            name = self._name_at(index)
+            command_name = name.decode('utf-8')
+            if command_name in records:
+                items.append((name, marshal.dumps(records[command_name])))
+            else:
+                start, end = self._record_span(index)
+                items.append((name, self._mm[start:end]))
+        return _encode_items(digest, items)
+
+
+def dump_record_store(digest: str, records: Iterable[Tuple[str, Dict[str, Any]]]) -> bytes:
+    """把 (命令名, 记录) 序列编码为记录库文件内容 (重名时与位置索引一致: 保留首次出现的位置、最后一条记录)"""
+    return _encode_items(digest, [(name.encode('utf-8'), marshal.dumps(record))
+                                  for name, record in dict(records).items()])
+
+
+def _encode_items(digest: str, items: List[Tuple[bytes, bytes]]) -> bytes:
+    """按文件布局拼接 (UTF-8命令名, 已编码记录) 序列"""
+    count = len(items)
+    sorted_indexes = sorted(range(count), key=lambda i: items[i][0])
+
+    names = bytearray()
+    name_offsets = []
+    for name, _ in items:
+        name_offsets.append(len(names))
+        names += name
+
+    records_start = _HEADER.size + _STORE_HEADER.size + (_ENTRY.size + _ORDER.size) * count + len(names)
+    record_offsets = []
+    blobs = bytearray()
+    for _, blob in items:
+        record_offsets.append(records_start + len(blobs))
+        blobs += _LENGTH.pack(len(blob))
+        blobs += blob
+
+    table = bytearray()
+    positions = [0] * count
+    for position, index in enumerate(sorted_indexes):
+        table += _ENTRY.pack(name_offsets[index], len(items[index][0]), record_offsets[index])
+        positions[index] = position
+
+    header = _HEADER.pack(RECORD_STORE_MAGIC, RECORD_STORE_VERSION, marshal.version,
+                          sys.version_info[0], sys.version_info[1])
+    header += _STORE_HEADER.pack(digest.encode('ascii'), count, len(names))
+    order = b''.join(_ORDER.pack(position) for position in positions)
+    return b''.join((header, bytes(table), order, bytes(names), bytes(blobs)))
+
+
+def load_or_build_record_store(path: str, digest: str,
+                               source: Callable[[], Iterable[Tuple[str, Dict[str, Any]]]]) -> Optional[RecordStore]:
+    """打开记录库，缺失或与知识库摘要不一致时由 source 提供的记录重建并原子写回 (缓存不可写时返回None)"""
+    store = RecordStore.open(path)
+    if store is not None:
+        if store.digest == digest:
+            return store
+        store.close()
+
+    if not atomic_write_bytes(path, dump_record_store(digest, source())):
+        return None
+    return RecordStore.open(path)
+
+
+if __name__ == "__main__":
+    import os
+    from .snapshot import load_or_compile, get_artifact_path
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    kb_dir = os.path.join(os.path.dirname(current_dir), 'knowledge_base')
+    snapshot = load_or_compile(kb_dir, 'zh')
+
+    def snapshot_records():
+        for rel_path in snapshot.shard_files():
+            yield from snapshot.load_shard(kb_dir, rel_path).items()
+
+    store = load_or_build_record_store(get_artifact_path(kb_dir, 'zh', 'rec'),
+                                       snapshot.content_digest(), snapshot_records)
+    print(f"{len(store)} 个命令, 前5个: {store.names()[:5]}")
+    print(store.get('tar')['description'] if 'tar' in store else '未找到 tar')
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+知识库快照 - 将每种语言的JSON知识库预编译为二进制快照
+
+快照头只包含命令位置、分类、搜索映射、元数据和源文件清单；命令记录按分类文件切分为独立的分片，
+查找命令或浏览分类时只读取用到的分片。
+"""
+
+import os
+import sys
+import json
+import glob
+import struct
+import marshal
+import hashlib
+from typing import Dict, List, Optional, Any, Tuple
+from ..utils.file_utils import load_json_file, get_cache_dir, atomic_write_bytes, file_sha1
+from ..utils.parallel import parallel_map, resolve_workers
+
+SNAPSHOT_MAGIC = b'CLVRSNAP'
+SNAPSHOT_VERSION = 3
+SHARD_MAGIC = b'CLVRSHRD'
+SHARD_VERSION = 1
+# 魔数 + 格式版本 + marshal版本 + Python主次版本 (marshal格式随解释器变化)
+_HEADER = struct.Struct('<8sHBBB')
+
+
+def dump_artifact(magic: bytes, version: int, payload: Any) -> bytes:
+    """序列化缓存产物: 版本化文件头 + marshal数据"""
+    header = _HEADER.pack(magic, version, marshal.version,
+                          sys.version_info[0], sys.version_info[1])
+    return header + marshal.dumps(payload)
+
+
+def load_artifact(magic: bytes, version: int, data: bytes) -> Optional[Any]:
+    """反序列化缓存产物，文件头不匹配或数据损坏时返回None"""
+    if len(data) < _HEADER.size:
+        return None
+    header = _HEADER.unpack_from(data)
+    if header != (magic, version, marshal.version, sys.version_info[0], sys.version_info[1]):
+        return None
+    try:
+        return marshal.loads(data[_HEADER.size:])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def read_artifact(path: str, magic: bytes, version: int) -> Optional[Any]:
+    """一次读取并反序列化缓存产物文件"""
+    try:
+        with open(path, 'rb') as f:
+            return load_artifact(magic, version, f.read())
+    except OSError:
+        return None
+
+
+def list_source_files(data_dir: str, language: str) -> List[str]:
+    """列出某语言知识库的全部源文件 (相对data_dir，已排序)"""
+    files = sorted(
+        os.path.relpath(path, data_dir)
+        for path in glob.glob(os.path.join(data_dir, f'commands_{language}', '*.json'))
+    )
+    for name in ('meta', 'categories', 'search_mappings'):
+        rel_path = f'{name}_{language}.json'
+        if os.path.exists(os.path.join(data_dir, rel_path)):
+            files.append(rel_path)
+    return sorted(files)
+
+
+def build_source_manifest(data_dir: str, language: str) -> Dict[str, List[Any]]:
+    """构建源文件清单: 相对路径 -> [mtime_ns, size, sha1]"""
+    manifest = {}
+    for rel_path in list_source_files(data_dir, language):
+        full_path = os.path.join(data_dir, rel_path)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            continue
+        manifest[rel_path] = [st.st_mtime_ns, st.st_size, file_sha1(full_path)]
+    return manifest
+
+
+def manifest_is_current(data_dir: str, language: str, manifest: Dict[str, List[Any]]) -> bool:
+    """检查清单是否与磁盘上的源文件一致 (先比较mtime/size，不一致时再比较内容哈希)"""
+    if sorted(manifest) != list_source_files(data_dir, language):
+        return False
+
+    for rel_path, (mtime_ns, size, sha1) in manifest.items():
+        full_path = os.path.join(data_dir, rel_path)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return False
+        if st.st_mtime_ns == mtime_ns and st.st_size == size:
+            continue
+        # 仅时间戳变化 (如 touch/cp) 时内容可能未变
+        if st.st_size != size or file_sha1(full_path) != sha1:
+            return False
+    return True
+
+
+def diff_manifest(data_dir: str, language: str,
+                  manifest: Dict[str, List[Any]]) -> Dict[str, Optional[List[Any]]]:
+    """逐文件比较清单与磁盘: 返回有变化的文件的新清单项 (已删除的为None)，一致时返回空字典
+
+    mtime/size 未变的文件不读取内容；只有时间戳变化的文件也会返回 (内容哈希与原清单相同)。
+    """
+    changes = {}
+    current = list_source_files(data_dir, language)
+    for rel_path in set(manifest) - set(current):
+        changes[rel_path] = None
+    for rel_path in current:
+        full_path = os.path.join(data_dir, rel_path)
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            changes[rel_path] = None
+            continue
+        entry = manifest.get(rel_path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            continue
+        changes[rel_path] = [st.st_mtime_ns, st.st_size, file_sha1(full_path)]
+    return changes
+
+
+def manifest_digest(manifest: Dict[str, List[Any]]) -> str:
+    """根据清单中的内容哈希计算知识库整体摘要"""
+    digest = hashlib.sha1()
+    for rel_path in sorted(manifest):
+        digest.update(rel_path.encode('utf-8'))
+        digest.update(str(manifest[rel_path][2]).encode('ascii'))
+    return digest.hexdigest()
+
+
+def get_artifact_path(data_dir: str, language: str, suffix: str, cache_dir: str = None) -> str:
+    """获取缓存产物路径 (按知识库目录区分，避免多个安装互相覆盖)"""
+    dir_key = hashlib.sha1(os.path.abspath(data_dir).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir or get_cache_dir(), f'kb-{language}-{dir_key}.{suffix}')
+
+
+def get_snapshot_path(data_dir: str, language: str, cache_dir: str = None) -> str:
+    """获取快照文件路径"""
+    return get_artifact_path(data_dir, language, 'snap', cache_dir)
+
+
+def get_shard_path(data_dir: str, language: str, rel_path: str, cache_dir: str = None) -> str:
+    """获取某个分类文件对应的记录分片路径"""
+    shard_key = hashlib.sha1(rel_path.encode('utf-8')).hexdigest()[:12]
+    return get_artifact_path(data_dir, language, f'shard-{shard_key}', cache_dir)
+
+
+def read_shard(path: str, rel_path: str, sha1: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """读取记录分片，不存在或与给定源文件哈希不一致时返回None"""
+    payload = read_artifact(path, SHARD_MAGIC, SHARD_VERSION)
+    if isinstance(payload, tuple) and len(payload) == 3 and payload[:2] == (rel_path, sha1):
+        return payload[2]
+    return None
+
+
+def save_shard(path: str, rel_path: str, sha1: str, records: Dict[str, Dict[str, Any]]) -> bool:
+    """原子写入记录分片 (附带源文件内容哈希，用于校验分片是否过期)"""
+    return atomic_write_bytes(path, dump_artifact(SHARD_MAGIC, SHARD_VERSION, (rel_path, sha1, records)))
+
+
+def _read_source(data_dir: str, rel_path: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """一次读取源文件，返回 (这份内容的SHA1, 解析出的JSON)，读取或解析失败时对应项为None"""
+    try:
+        with open(os.path.join(data_dir, rel_path), 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None, None
+    try:
+        data = json.loads(content.decode('utf-8'))
+    except ValueError as e:
+        print(f"加载文件 {os.path.join(data_dir, rel_path)} 失败: {e}")
+        data = None
+    return hashlib.sha1(content).hexdigest(), data
+
+
+def load_shard(data_dir: str, language: str, rel_path: str, sha1: str,
+               cache_dir: str = None) -> Dict[str, Dict[str, Any]]:
+    """加载一个分类文件的命令记录: 分片与源文件哈希一致时直接使用，否则解析JSON
+    
+    只有解析的内容与清单中的哈希一致时才写回分片；源文件已被修改时只返回记录，
+    避免把新内容存到旧哈希名下 (增量更新依赖旧分片给出修改前的记录)。
+    """
+    path = get_shard_path(data_dir, language, rel_path, cache_dir)
+    records = read_shard(path, rel_path, sha1)
+    if records is not None:
+        return records
+
+    content_sha1, category_data = _read_source(data_dir, rel_path)
+    records = (category_data or {}).get('commands', {})
+    if content_sha1 == sha1:
+        save_shard(path, rel_path, sha1, records)
+    return records
+
+
+def _ingest_file(task: Tuple[str, str, str, str, Optional[str]]) -> List[str]:
+    """解析一个分类文件并写出其记录分片，返回其中的命令名 (可在进程池中执行)"""
+    data_dir, language, rel_path, sha1, cache_dir = task
+    content_sha1, category_data = _read_source(data_dir, rel_path)
+    if not category_data or 'commands' not in category_data:
+        return []
+    records = category_data['commands']
+    # 清单生成后文件又被修改时不写分片，下次加载时按清单判定过期
+    if content_sha1 == sha1:
+        save_shard(get_shard_path(data_dir, language, rel_path, cache_dir), rel_path, sha1, records)
+    return list(records)
+
+
+class KnowledgeBaseSnapshot:
+    """知识库快照 - 包含命令位置、分类、搜索映射和元数据 (命令记录在各分片中)"""
+
+    def __init__(self, language: str, locations: Dict[str, Tuple[str, str]],
+                 categories: Dict[str, Any], search_mappings: Dict[str, List[str]],
+                 meta: Dict[str, Any], manifest: Dict[str, List[Any]]):
+        self.language = language
+        self.locations = locations
+        self.categories = categories
+        self.search_mappings = search_mappings
+        self.meta = meta
+        self.manifest = manifest
+
+    @classmethod
+    def compile(cls, data_dir: str, language: str, cache_dir: str = None,
+                previous: 'KnowledgeBaseSnapshot' = None) -> 'KnowledgeBaseSnapshot':
+        """从JSON源文件编译快照，同时写出各分类文件的记录分片 (知识库较大时并行解析)
+
+        提供过期的旧快照时，内容哈希未变的分类文件直接沿用旧快照中的命令列表，只重新解析有变化的文件。
+        """
+        manifest = build_source_manifest(data_dir, language)
+        prefix = f'commands_{language}'
+        command_files = [rel_path for rel_path in manifest if rel_path.startswith(prefix)]
+
+        reused = {}
+        if previous is not None and previous.language == language:
+            unchanged = {rel_path for rel_path in command_files
+                         if previous.manifest.get(rel_path, [None, None, None])[2] == manifest[rel_path][2]}
+            for command_name, (rel_path, _) in previous.locations.items():
+                if rel_path in unchanged:
+                    reused.setdefault(rel_path, []).append(command_name)
+
+        tasks = [(data_dir, language, rel_path, manifest[rel_path][2], cache_dir)
+                 for rel_path in command_files if rel_path not in reused]
+        workers = resolve_workers(sum(manifest[task[2]][1] for task in tasks), len(tasks))
+        parsed = dict(zip((task[2] for task in tasks), parallel_map(_ingest_file, tasks, workers)))
+
+        # 按清单顺序合并，结果与串行编译相同
+        locations = {}
+        for rel_path in command_files:
+            command_names = reused[rel_path] if rel_path in reused else parsed[rel_path]
+            for command_name in command_names:
+                locations[command_name] = (rel_path, command_name)
+
+        return cls(
+            language,
+            locations,
+            load_json_file(os.path.join(data_dir, f'categories_{language}.json')) or {},
+            load_json_file(os.path.join(data_dir, f'search_mappings_{language}.json')) or {},
+            load_json_file(os.path.join(data_dir, f'meta_{language}.json')) or {},
+            manifest
+        )
+
+    def shard_files(self) -> List[str]:
+        """全部命令分片对应的源文件 (已排序)"""
+        prefix = f'commands_{self.language}'
+        return [rel_path for rel_path in self.manifest if rel_path.startswith(prefix)]
+
+    def load_shard(self, data_dir: str, rel_path: str, cache_dir: str = None) -> Dict[str, Dict[str, Any]]:
+        """加载一个命令分片"""
+        entry = self.manifest.get(rel_path)
+        if entry is None:
+            return {}
+        return load_shard(data_dir, self.language, rel_path, entry[2], cache_dir)
+
+    def content_digest(self) -> str:
+        """知识库内容摘要"""
+        return manifest_digest(self.manifest)
+
+    def is_current(self, data_dir: str) -> bool:
+        """快照是否仍与源文件一致"""
+        return manifest_is_current(data_dir, self.language, self.manifest)
+
+    def dumps(self) -> bytes:
+        """序列化为二进制"""
+        payload = (self.language, self.locations, self.categories,
+                   self.search_mappings, self.meta, self.manifest)
+        return dump_artifact(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, payload)
+
+    @classmethod
+    def loads(cls, data: bytes) -> Optional['KnowledgeBaseSnapshot']:
+        """从二进制反序列化，格式或版本不匹配时返回None"""
+        payload = load_artifact(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, data)
+        if not isinstance(payload, tuple) or len(payload) != 6:
+            return None
+        return cls(*payload)
+
+    def save(self, path: str) -> bool:
+        """原子写入快照文件"""
+        return atomic_write_bytes(path, self.dumps())
+
+
+    @classmethod
+    def load(cls, path: str) -> Optional['KnowledgeBaseSnapshot']:
+        """一次读取加载快照文件"""
+        payload = read_artifact(path, SNAPSHOT_MAGIC, SNAPSHOT_VERSION)
+        if not isinstance(payload, tuple) or len(payload) != 6:
+            return None
+        return cls(*payload)
+
+
+def load_or_compile(data_dir: str, language: str, cache_dir: str = None,
+                    force: bool = False) -> KnowledgeBaseSnapshot:
+    """加载快照，缺失或过期时重新编译并原子写回"""
+    path = get_snapshot_path(data_dir, language, cache_dir)
+
+    previous = None
+    if not force:
+        previous = KnowledgeBaseSnapshot.load(path)
+        if previous and previous.language == language and previous.is_current(data_dir):
+            return previous
+
+    snapshot = KnowledgeBaseSnapshot.compile(data_dir, language, cache_dir, previous)
+    # 缓存目录不可写时仍可使用内存中的快照 (分片读取时回退到解析源文件)
+    snapshot.save(path)
+    return snapshot
+
+
+if __name__ == "__main__":
+    # 编译所有语言的快照
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    kb_dir = os.path.join(os.path.dirname(current_dir), 'knowledge_base')
+
+    for lang in ('zh', 'en'):
+        snap = load_or_compile(kb_dir, lang, force=True)
+        print(f"{lang}: {len(snap.locations)} 个命令, {len(snap.manifest)} 个源文件 -> "
+              f"{get_snapshot_path(kb_dir, lang)}")
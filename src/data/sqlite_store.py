@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+SQLite 知识库后端 - 命令记录、分类成员、标签和 FTS5 全文索引存放在一个本地 SQLite 文件中 (可选)
+
+设置 CLEVER_BACKEND=sqlite 时启用，默认仍使用JSON快照。启动时只读取少量元数据并校验源文件清单，
+查询命令、浏览分类、标签与关键词检索都是带索引的SQL查询，内存占用不随知识库规模增长。
+FTS5 列中存放分析器切分后的词项 (编码为十六进制词元)，分词与内存索引完全一致，排序使用 bm25()。
+"""
+
+import os
+import json
+import tempfile
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from ..utils.file_utils import load_json_file
+from .snapshot import build_source_manifest, manifest_digest, manifest_is_current, get_artifact_path
+
+try:
+    import sqlite3
+except ImportError:  # 部分精简的Python构建不带 sqlite3
+    sqlite3 = None
+
+SQLITE_SCHEMA_VERSION = 1
+# 全文索引字段 (与内存索引的字段名和顺序一致)
+FTS_FIELDS = ('name', 'description', 'category', 'option', 'example', 'tag', 'mapping')
+# 单条SQL中绑定参数的上限 (旧版SQLite为999)
+_MAX_PARAMS = 500
+
+_SCHEMA = """
+CREATE TABLE kb_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE commands (
+    id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL UNIQUE,
+    rel_path TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX commands_seq ON commands(seq);
+CREATE TABLE category_commands (
+    category TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    command_id INTEGER NOT NULL,
+    PRIMARY KEY (category, position)
+) WITHOUT ROWID;
+CREATE TABLE tags (
+    tag TEXT NOT NULL,
+    command_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, command_id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE commands_fts USING fts5(name, description, category, option, example, tag, mapping, content='');
+"""
+
+_fts5_available = None
+
+
+def sqlite_available() -> bool:
+    """当前Python的 sqlite3 是否可用且编译了 FTS5"""
+    global _fts5_available
+    if _fts5_available is None:
+        _fts5_available = False
+        if sqlite3 is not None:
+            try:
+                connection = sqlite3.connect(':memory:')
+                connection.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+                connection.close()
+                _fts5_available = True
+            except sqlite3.Error:
+                pass
+    return _fts5_available
+
+
+def encode_term(term: str) -> str:
+    """把分析器词项编码为 FTS5 词元 (十六进制，任何分词器都不会再切分)"""
+    return 't' + term.encode('utf-8').hex()
+
+
+def _field_texts(command_name: str, command_data: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """命令各字段的待索引文本 (与内存索引的字段顺序一致)"""
+    yield 'name', command_name
+    yield 'description', command_data.get('description', '')
+    yield 'category', command_data.get('category', '')
+    for option in command_data.get('options', []):
+        yield 'option', option.get('description', '')
+    for example in command_data.get('examples', []):
+        yield 'example', example.get('description', '')
+    for tag in command_data.get('tags', []):
+        yield 'tag', tag
+
+
+class SqliteStore:
+    """只读打开的 SQLite 知识库"""
+
+    def __init__(self, path: str, connection: 'sqlite3.Connection'):
+        self.path = path
+        self.connection = connection
+        meta = dict(connection.execute("SELECT key, value FROM kb_meta"))
+        self.language = meta['language']
+        self.digest = meta['digest']
+        self.manifest = json.loads(meta['manifest'])
+        self.categories = json.loads(meta['categories'])
+        self.search_mappings = json.loads(meta['search_mappings'])
+        self.meta = json.loads(meta['meta'])
+        self.stats = json.loads(meta['stats'])
+        self.count = self.stats['total_commands']
+
+    @classmethod
+    def open(cls, path: str) -> Optional['SqliteStore']:
+        """以只读方式打开数据库，不存在或版本不匹配时返回None"""
+        if not sqlite_available() or not os.path.exists(path):
+            return None
+        try:
+            # 只读连接可在线程间共享 (sqlite3 模块默认以串行化模式编译)
+            connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+            version = connection.execute("SELECT value FROM kb_meta WHERE key = 'version'").fetchone()
+            if version is None or int(version[0]) != SQLITE_SCHEMA_VERSION:
+                connection.close()
+                return None
+            return cls(path, connection)
+        except (sqlite3.Error, KeyError, ValueError):
+            return None
+
+    @classmethod
+    def build(cls, path: str, data_dir: str, language: str,
+              analyze: Callable[[str], List[str]]) -> Optional['SqliteStore']:
+        """从JSON源文件构建数据库，先写临时文件再原子替换 (缓存目录不可写时返回None)"""
+        if not sqlite_available():
+            return None
+        manifest = build_source_manifest(data_dir, language)
+        prefix = f'commands_{language}'
+        # 重名命令与位置索引一致: 保留首次出现的位置、最后一条记录
+        records = {}
+        for rel_path in manifest:
+            if not rel_path.startswith(prefix):
+                continue
+            category_data = load_json_file(os.path.join(data_dir, rel_path))
+            if category_data and 'commands' in category_data:
+                for command_name, command_data in category_data['commands'].items():
+                    records[command_name] = (rel_path, command_data)
+        categories = load_json_file(os.path.join(data_dir, f'categories_{language}.json')) or {}
+        search_mappings = load_json_file(os.path.join(data_dir, f'search_mappings_{language}.json')) or {}
+        meta = load_json_file(os.path.join(data_dir, f'meta_{language}.json')) or {}
+
+        # 命令ID按命令名排序分配，与内存索引的文档ID相同
+        ids = {command_name: doc_id for doc_id, command_name in enumerate(sorted(records))}
+        mapping_texts = {}
+        for keyword, commands in search_mappings.items():
+            for command in commands:
+                if command in ids:
+                    mapping_texts.setdefault(ids[command], []).append(keyword)
+
+        def encode(texts: List[str]) -> str:
+            return ' '.join(encode_term(term) for text in texts if text for term in analyze(text))
+
+        directory = os.path.dirname(path) or '.'
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.')
+            os.close(fd)
+            connection = sqlite3.connect(tmp_path)
+            try:
+                connection.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + _SCHEMA)
+                command_rows, tag_rows, fts_rows = [], [], []
+                for seq, (command_name, (rel_path, command_data)) in enumerate(records.items()):
+                    doc_id = ids[command_name]
+                    command_rows.append((doc_id, seq, command_name, rel_path,
+                                         json.dumps(command_data, ensure_ascii=False)))
+                    for tag in dict.fromkeys(command_data.get('tags', [])):
+                        tag_rows.append((tag, doc_id))
+                    fields = {field: [] for field in FTS_FIELDS}
+                    for field, text in _field_texts(command_name, command_data):
+                        fields[field].append(text)
+                    fields['mapping'] = mapping_texts.get(doc_id, [])
+                    fts_rows.append((doc_id,) + tuple(encode(fields[field]) for field in FTS_FIELDS))
+                connection.executemany("INSERT INTO commands VALUES (?, ?, ?, ?, ?)", command_rows)
+                connection.executemany("INSERT INTO tags VALUES (?, ?)", tag_rows)
+                connection.executemany(
+                    f"INSERT INTO commands_fts (rowid, {', '.join(FTS_FIELDS)}) VALUES (?{', ?' * len(FTS_FIELDS)})",
+                    fts_rows
+                )
+                connection.executemany("INSERT INTO category_commands VALUES (?, ?, ?)", (
+                    (category, position, ids[command])
+                    for category, info in categories.items() if isinstance(info, dict)
+                    for position, command in enumerate(info.get('commands', [])) if command in ids
+                ))
+
+                connection.execute("CREATE VIRTUAL TABLE temp.vocab USING fts5vocab(main, commands_fts, 'col')")
+                total_words, total_postings = connection.execute(
+                    "SELECT COUNT(DISTINCT term), COALESCE(SUM(doc), 0) FROM temp.vocab"
+                ).fetchone()
+                connection.commit()
+                stats = {
+                    'total_words': total_words,
+                    'total_tags': len({tag for tag, _ in tag_rows}),
+                    'total_commands': len(records),
+                    'total_postings': total_postings,
+                }
+                meta_rows = {
+                    'version': str(SQLITE_SCHEMA_VERSION),
+                    'language': language,
+                    'digest': manifest_digest(manifest),
+                    'manifest': json.dumps(manifest),
+                    'categories': json.dumps(categories, ensure_ascii=False),
+                    'search_mappings': json.dumps(search_mappings, ensure_ascii=False),
+                    'meta': json.dumps(meta, ensure_ascii=False),
+                    'stats': json.dumps(stats),
+                }
+                connection.executemany("INSERT INTO kb_meta VALUES (?, ?)", meta_rows.items())
+                connection.commit()
+            finally:
+                connection.close()
+            os.replace(tmp_path, path)
+        except (OSError, sqlite3.Error):
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return None
+        return cls.open(path)
+
+    def close(self):
+        self.connection.close()
+
+    def is_current(self, data_dir: str) -> bool:
+        """数据库是否仍与源文件一致"""
+        return manifest_is_current(data_dir, self.language, self.manifest)
+
+    def get(self, command_name: str) -> Optional[Dict[str, Any]]:
+        """按命令名读取单条记录 (唯一索引)"""
+        row = self.connection.execute("SELECT record FROM commands WHERE name = ?", (command_name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, command_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量读取记录，结果按请求顺序排列"""
+        found = {}
+        for start in range(0, len(command_names), _MAX_PARAMS):
+            chunk = command_names[start:start + _MAX_PARAMS]
+            found.update(self.connection.execute(
+                f"SELECT name, record FROM commands WHERE name IN ({', '.join('?' * len(chunk))})", chunk
+            ))
+        return {name: json.loads(found[name]) for name in command_names if name in found}
+
+    def category_commands(self, category: str) -> Dict[str, Dict[str, Any]]:
+        """分类下的全部命令记录 (按分类表中的顺序，一次联表查询)"""
+        rows = self.connection.execute(
+            "SELECT c.name, c.record FROM category_commands cc JOIN commands c ON c.id = cc.command_id "
+            "WHERE cc.category = ? ORDER BY cc.position", (category,)
+        )
+        return {name: json.loads(record) for name, record in rows}
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """按知识库顺序遍历全部记录"""
+        for name, record in self.connection.execute("SELECT name, record FROM commands ORDER BY seq"):
+            yield name, json.loads(record)
+
+    def names(self) -> List[str]:
+        """所有命令名 (保持知识库中的顺序)"""
+        return [name for (name,) in self.connection.execute("SELECT name FROM commands ORDER BY seq")]
+
+    def names_by_id(self) -> List[str]:
+        """按命令ID排列的命令名 (即按命令名排序)"""
+        return [name for (name,) in self.connection.execute("SELECT name FROM commands ORDER BY id")]
+
+    def location(self, command_name: str) -> Optional[Tuple[str, str]]:
+        """命令所在的 (相对文件路径, 键)"""
+        row = self.connection.execute("SELECT rel_path FROM commands WHERE name = ?", (command_name,)).fetchone()
+        return (row[0], command_name) if row else None
+
+    def locations(self) -> Dict[str, Tuple[str, str]]:
+        """全部命令位置 (按知识库顺序)"""
+        return {name: (rel_path, name) for name, rel_path in
+                self.connection.execute("SELECT name, rel_path FROM commands ORDER BY seq")}
+
+    def tags(self) -> List[str]:
+        """全部标签"""
+        return [tag for (tag,) in self.connection.execute("SELECT DISTINCT tag FROM tags")]
+
+    def has_tag(self, tag: str) -> bool:
+        return self.connection.execute("SELECT 1 FROM tags WHERE tag = ? LIMIT 1", (tag,)).fetchone() is not None
+
+    def tag_ids(self, tag: str) -> array:
+        """带有该标签的命令ID (升序)"""
+        return array('I', (doc_id for (doc_id,) in self.connection.execute(
+            "SELECT command_id FROM tags WHERE tag = ? ORDER BY command_id", (tag,))))
+
+    def match_ids(self, field: Optional[str], terms: List[str]) -> array:
+        """同一字段 (None 为任意字段) 中同时包含全部词项的命令ID (升序)"""
+        expression = ' AND '.join(encode_term(term) for term in terms)
+        if field:
+            expression = f'{field} : ({expression})'
+        return array('I', (doc_id for (doc_id,) in self.connection.execute(
+            "SELECT rowid FROM commands_fts WHERE commands_fts MATCH ? ORDER BY rowid", (expression,))))
+
+    def rank(self, terms: List[str], field_weights: Dict[str, float],
+             top_k: Optional[int] = 20) -> List[Tuple[int, float]]:
+        """FTS5 bm25() 打分 (词项之间为或关系)，返回 (命令ID, 得分) 按得分降序"""
+        terms = list(dict.fromkeys(terms))
+        if not terms or (top_k is not None and top_k <= 0):
+            return []
+        weights = [field_weights.get(field, 0.0) for field in FTS_FIELDS]
+        rows = self.connection.execute(
+            f"SELECT rowid, bm25(commands_fts{', ?' * len(FTS_FIELDS)}) AS score FROM commands_fts "
+            "WHERE commands_fts MATCH ? ORDER BY score, rowid LIMIT ?",
+            weights + [' OR '.join(encode_term(term) for term in terms), -1 if top_k is None else top_k]
+        )
+        # bm25() 越小越相关，取相反数使得分越大越相关
+        return [(doc_id, -score) for doc_id, score in rows]
+
+
+def get_sqlite_path(data_dir: str, language: str, cache_dir: str = None) -> str:
+    """获取某语言 SQLite 知识库的路径"""
+    return get_artifact_path(data_dir, language, 'db', cache_dir)
+
+
+def load_or_build_sqlite_store(data_dir: str, language: str, analyze: Callable[[str], List[str]],
+                               cache_dir: str = None, force: bool = False) -> Optional[SqliteStore]:
+    """打开 SQLite 知识库，缺失或过期时重新构建；不支持 FTS5 或无法写入时返回None"""
+    if not sqlite_available():
+        return None
+    path = get_sqlite_path(data_dir, language, cache_dir)
+    if not force:
+        store = SqliteStore.open(path)
+        if store is not None:
+            if store.language == language and store.is_current(data_dir):
+                return store
+            store.close()
+    return SqliteStore.build(path, data_dir, language, analyze)
+
+
+if __name__ == "__main__":
+    from ..core.analyzer import get_analyzer
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    kb_dir = os.path.join(os.path.dirname(current_dir), 'knowledge_base')
+    store = load_or_build_sqlite_store(kb_dir, 'zh', get_analyzer('zh').analyze)
+    if store is None:
+        print("当前Python的sqlite3不支持FTS5")
+    else:
+        print(f"{store.count} 个命令 -> {store.path}")
+        print(store.get('tar')['description'])
+        names = store.names_by_id()
+        print([names[doc_id] for doc_id, _ in store.rank(get_analyzer('zh').analyze('压缩'), {'name': 3.0, 'description': 1.5}, 5)])
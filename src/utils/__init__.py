@@ -3,13 +3,27 @@
 工具模块初始化
 """
 
-from .file_utils import load_json_file, list_json_files
-from .search_utils import calculate_similarity, fuzzy_match, extract_keywords, highlight_match, normalize_text, text_contains_all, text_contains_any, rank_by_relevance
-from .display_utils import get_terminal_width, format_table, truncate_text, format_list, format_size, format_duration
-
-__all__ = [
-    'load_json_file', 'list_json_files',
-    'calculate_similarity', 'fuzzy_match', 'extract_keywords', 'highlight_match', 'normalize_text', 
-    'text_contains_all', 'text_contains_any', 'rank_by_relevance',
-    'get_terminal_width', 'format_table', 'truncate_text', 'format_list', 'format_size', 'format_duration'
-]
\ No newline at end of file
+import importlib
+
+# 按需导入子模块，避免仅使用文件工具时也加载 difflib 等较重的依赖
+_EXPORTS = {
+    'file_utils': ['load_json_file', 'list_json_files', 'get_cache_dir', 'atomic_write_bytes', 'file_sha1'],
+    'search_utils': ['calculate_similarity', 'fuzzy_match', 'extract_keywords', 'highlight_match', 'normalize_text',
+                     'text_contains_all', 'text_contains_any', 'rank_by_relevance'],
+    'parallel': ['parallel_map', 'resolve_workers'],
+    'profiler': ['enable_profiling', 'finish_profiling', 'span', 'get_profiler'],
+    'display_utils': ['get_terminal_width', 'format_table', 'truncate_text', 'format_list', 'format_size',
+                      'format_duration'],
+}
+_ATTR_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = [name for names in _EXPORTS.values() for name in names]
+
+
+def __getattr__(name):
+    module = _ATTR_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
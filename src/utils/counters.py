@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+统计计数器 - 每个线程只写自己的计数表，读取时汇总，计数路径上没有锁
+"""
+
+import threading
+from typing import Dict, Iterable, List
+
+
+class ThreadLocalCounters:
+    """按线程分片的计数器组 (计数名在创建时固定)"""
+
+    def __init__(self, names: Iterable[str]):
+        self.names = tuple(names)
+        self._local = threading.local()
+        # 所有线程的计数表 (只在线程首次计数时加锁登记)
+        self._shards: List[Dict[str, int]] = []
+        self._lock = threading.Lock()
+        # reset() 时的汇总值，之后的读数减去它
+        self._base = dict.fromkeys(self.names, 0)
+
+    def _shard(self) -> Dict[str, int]:
+        shard = getattr(self._local, 'counts', None)
+        if shard is None:
+            # 键集合固定，汇总时遍历其他线程的计数表不会遇到字典大小变化
+            shard = self._local.counts = dict.fromkeys(self.names, 0)
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def add(self, name: str, amount: int = 1):
+        """当前线程的计数加 amount"""
+        self._shard()[name] += amount
+
+    def _sums(self) -> Dict[str, int]:
+        with self._lock:
+            shards = list(self._shards)
+        return {name: sum(shard[name] for shard in shards) for name in self.names}
+
+    def totals(self) -> Dict[str, int]:
+        """各计数在所有线程上的总和 (自上次 reset 起)"""
+        base = self._base
+        return {name: value - base[name] for name, value in self._sums().items()}
+
+    def reset(self):
+        """从当前读数重新开始计数 (不修改其他线程的计数表)"""
+        self._base = self._sums()
+
+    def __getitem__(self, name: str) -> int:
+        return self.totals()[name]
+
+
+if __name__ == "__main__":
+    # 测试多线程计数
+    counters = ThreadLocalCounters(('hits', 'misses'))
+
+    def work():
+        for i in range(10000):
+            counters.add('hits' if i % 4 else 'misses')
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(counters.totals())
+    counters.reset()
+    counters.add('hits')
+    print(counters.totals())
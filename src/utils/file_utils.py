@@ -5,6 +5,8 @@
 
 import os
 import json
+import hashlib
+import tempfile
 from typing import Dict, Any, Optional
 
 
@@ -34,4 +36,43 @@ def list_json_files(directory: str) -> list:
     except OSError:
         pass
     
-    return json_files
\ No newline at end of file
+    return json_files
+
+def get_cache_dir() -> str:
+    """获取本地缓存目录 (CLEVER_CACHE_DIR > XDG_CACHE_HOME/clever > ~/.cache/clever)"""
+    cache_dir = os.environ.get('CLEVER_CACHE_DIR')
+    if not cache_dir:
+        xdg_cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        cache_dir = os.path.join(xdg_cache, 'clever')
+    return cache_dir
+
+
+def atomic_write_bytes(file_path: str, data: bytes) -> bool:
+    """原子写入文件：先写临时文件再 os.replace，读者永远看不到半写的文件"""
+    directory = os.path.dirname(file_path) or '.'
+    tmp_path = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(file_path) + '.')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        return True
+    except OSError:
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        return False
+
+
+def file_sha1(file_path: str) -> Optional[str]:
+    """计算文件内容的SHA1摘要"""
+    try:
+        with open(file_path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
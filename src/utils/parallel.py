@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+并行执行工具 - 知识库导入与建索引按分类文件分发到 fork 进程池，结果按输入顺序返回
+"""
+
+import os
+import multiprocessing
+import threading
+from typing import Any, Callable, Iterable, List
+
+# 源文件总大小低于该值时串行执行 (进程池的启动与结果回传开销大于收益)
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+
+def resolve_workers(total_bytes: int, tasks: int) -> int:
+    """决定工作进程数: 环境变量 CLEVER_INDEX_WORKERS 优先，否则按数据规模和CPU数自动选择"""
+    configured = os.environ.get('CLEVER_INDEX_WORKERS')
+    if configured:
+        try:
+            workers = int(configured)
+        except ValueError:
+            workers = 1
+    elif total_bytes < PARALLEL_MIN_BYTES:
+        workers = 1
+    else:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, tasks))
+
+
+def parallel_map(func: Callable[[Any], Any], items: Iterable[Any], workers: int = 1) -> List[Any]:
+    """对每个元素调用 func，返回与输入顺序一致的结果列表 (workers<=1、不支持 fork 或进程中有多个线程时串行执行)"""
+    items = list(items)
+    # 多线程进程中 fork 出的子进程可能继承其他线程持有的锁 (如后台刷新、嵌入异步服务时)，只在单线程时使用进程池
+    if (workers <= 1 or len(items) <= 1 or 'fork' not in multiprocessing.get_all_start_methods()
+            or threading.active_count() > 1):
+        return [func(item) for item in items]
+
+    context = multiprocessing.get_context('fork')
+    with context.Pool(workers) as pool:
+        return pool.map(func, items, chunksize=1)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+轻量级分段计时器 - `--profile` 时为关键方法挂上计时包装，输出各阶段耗时、调用次数、读取文件数与解析字节数
+
+未启用时不修改任何类或函数，调用路径上没有任何额外开销；启用后才按 _TARGETS 替换为带计时的包装。
+"""
+
+import os
+import sys
+import time
+import functools
+import importlib
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+# 根包名 (src)，被插桩的模块都相对它导入
+_ROOT = __name__.rsplit('.', 2)[0]
+
+# 需要插桩的 模块 -> {类名: 方法名}；None 表示模块级函数
+_TARGETS = {
+    'utils.i18n': {'I18nManager': ('__init__', '_load_config', '_save_config')},
+    'data.snapshot': {
+        'KnowledgeBaseSnapshot': ('compile', 'load', 'save'),
+        None: ('load_or_compile', 'build_source_manifest', 'manifest_is_current'),
+    },
+    'data.location_index': {None: ('load_or_build_location_index',)},
+    'data.record_store': {'RecordStore': ('open', 'get', 'names'), None: ('load_or_build_record_store',)},
+    'data.sqlite_store': {
+        'SqliteStore': ('open', 'build', 'get', 'get_many', 'category_commands', 'match_ids', 'rank'),
+        None: ('load_or_build_sqlite_store',),
+    },
+    'data.data_manager': {
+        'DataManager': ('__init__', '_load_meta_data', 'load_command', 'fetch_command', 'fetch_commands',
+                        'get_command_summaries', 'load_shard', 'load_all_commands', 'get_location_index',
+                        'update_changed_files', 'get_record_store', 'fetch_category_commands',
+                        'fork'),
+    },
+    'core.command_loader': {'CommandLoader': ('load_command', 'load_commands_batch', 'load_category_commands')},
+    'core.index_store': {None: ('load_search_index', 'save_search_index')},
+    'core.search_engine': {
+        'SearchEngine': ('_ensure_indexes', '_build_indexes', '_rebuild_and_save', 'get_completion_index',
+                         'get_fuzzy_index', 'search_by_name', 'search_by_keyword', 'ranked_search',
+                         'search_by_tags', 'find_similar_commands', 'query_search', 'enhanced_search',
+                         'apply_changes'),
+    },
+    'core.sqlite_search': {'SqliteSearchEngine': ('_ensure_indexes', '_match_group_ids', '_rank')},
+    'core.query_processor': {
+        'QueryProcessor': ('__init__', 'command_loader', 'search_engine', 'query_command', 'query_commands',
+                           'get_command_summaries', 'search_commands', 'get_category_commands',
+                           'find_similar_commands', 'find_similar_categories', 'get_system_stats', 'update_data',
+                           'refresh_data'),
+    },
+    'cli.parser': {None: ('create_parser',)},
+    'cli.formatter': {
+        'OutputFormatter': ('display_command_info', 'display_search_results', 'display_category_commands',
+                            'display_all_commands', 'display_categories', 'display_stats',
+                            'display_similar_commands'),
+    },
+    'cli.structured': {'StructuredWriter': ('write_records', 'close')},
+    'cli.interface': {'CleverCLI': ('__init__', 'run', 'handle_fast_lookup')},
+}
+
+# 读取文件的函数: 额外统计读取次数与字节数
+_READERS = {
+    'utils.file_utils': ('load_json_file',),
+    'data.snapshot': ('read_artifact',),
+}
+
+# 当前生效的分析器，为None时表示未启用
+_profiler: Optional['Profiler'] = None
+
+
+class _Node:
+    """调用树中的一个节点 (同一父节点下同名调用合并统计)"""
+    __slots__ = ('name', 'calls', 'total', 'reads', 'bytes', 'peak', 'children')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.reads = 0
+        self.bytes = 0
+        self.peak = 0
+        self.children: Dict[str, '_Node'] = {}
+
+    def child(self, name: str) -> '_Node':
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = _Node(name)
+        return node
+
+    def inclusive(self, attr: str) -> int:
+        """包含子节点在内的计数合计"""
+        return getattr(self, attr) + sum(child.inclusive(attr) for child in self.children.values())
+
+
+class _Frame:
+    """一次进行中的调用"""
+    __slots__ = ('node', 'start', 'mem_start', 'mem_peak')
+
+    def __init__(self, node: _Node, start: float, mem_start: int = 0):
+        self.node = node
+        self.start = start
+        self.mem_start = mem_start
+        self.mem_peak = 0
+
+
+class Profiler:
+    """分段计时器 - 维护调用栈并把耗时累计到调用树上"""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.root = _Node('clever')
+        self._stack: List[_Frame] = []
+
+    def start(self):
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        self._stack = [self._open(self.root)]
+
+    def stop(self):
+        while self._stack:
+            self.exit(self._stack[-1])
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.stop()
+
+    def _open(self, node: _Node) -> _Frame:
+        node.calls += 1
+        if not self.trace_memory:
+            return _Frame(node, time.perf_counter())
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            parent = self._stack[-1]
+            parent.mem_peak = max(parent.mem_peak, peak)
+        # 重置峰值后，本段结束时读到的峰值只反映本段内的分配
+        tracemalloc.reset_peak()
+        return _Frame(node, time.perf_counter(), current)
+
+    def enter(self, name: str) -> _Frame:
+        frame = self._open(self._stack[-1].node.child(name))
+        self._stack.append(frame)
+        return frame
+
+    def exit(self, frame: _Frame):
+        elapsed = time.perf_counter() - frame.start
+        # 异常穿过多层时，内层未正常退出的帧一并结束
+        while self._stack and self._stack.pop() is not frame:
+            pass
+        node = frame.node
+        node.total += elapsed
+        if self.trace_memory:
+            import tracemalloc
+            peak = max(frame.mem_peak, tracemalloc.get_traced_memory()[1])
+            node.peak = max(node.peak, peak - frame.mem_start)
+            if self._stack:
+                parent = self._stack[-1]
+                parent.mem_peak = max(parent.mem_peak, peak)
+
+    def span(self, name: str) -> '_Span':
+        return _Span(self, name)
+
+    def count_read(self, size: int):
+        """把一次文件读取记到当前阶段"""
+        node = self._stack[-1].node
+        node.reads += 1
+        node.bytes += size
+
+    def report(self, lang: str = 'en') -> str:
+        """生成调用树报告"""
+        from .display_utils import format_size
+        root = self.root
+        if lang == 'zh':
+            title = (f"性能分析: 总耗时 {root.total * 1000:.2f} ms，读取文件 {root.inclusive('reads')} 个，"
+                     f"解析 {format_size(root.inclusive('bytes'))}")
+            header = ['阶段', '调用', '总计ms', '自身ms', '读取', '字节']
+        else:
+            title = (f"Profile: {root.total * 1000:.2f} ms total, {root.inclusive('reads')} file reads, "
+                     f"{format_size(root.inclusive('bytes'))} parsed")
+            header = ['phase', 'calls', 'total ms', 'self ms', 'reads', 'bytes']
+        if self.trace_memory:
+            header.append('peak' if lang != 'zh' else '内存峰值')
+
+        rows = []
+        self._collect(root, 0, rows, format_size)
+        width = max(len(row[0]) for row in rows) + 2
+        lines = [title, f"{header[0]:<{width}}" + ''.join(f"{column:>11}" for column in header[1:])]
+        for row in rows:
+            lines.append(f"{row[0]:<{width}}" + ''.join(f"{column:>11}" for column in row[1:]))
+        return '\n'.join(lines)
+
+    def _collect(self, node: _Node, depth: int, rows: List[List[str]], format_size: Callable):
+        children_total = sum(child.total for child in node.children.values())
+        reads = node.inclusive('reads')
+        size = node.inclusive('bytes')
+        row = [
+            '  ' * depth + node.name,
+            str(node.calls),
+            f"{node.total * 1000:.2f}",
+            f"{max(0.0, node.total - children_total) * 1000:.2f}",
+            str(reads) if reads else '',
+            format_size(size) if size else '',
+        ]
+        if self.trace_memory:
+            row.append(format_size(node.peak))
+        rows.append(row)
+        for child in node.children.values():
+            self._collect(child, depth + 1, rows, format_size)
+
+
+class _Span:
+    """with 语句形式的手动计时段"""
+    __slots__ = ('profiler', 'name', 'frame')
+
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.frame = None
+
+    def __enter__(self):
+        self.frame = self.profiler.enter(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.exit(self.frame)
+        return False
+
+
+class _NullSpan:
+    """未启用时的空计时段"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """手动标记一个阶段: `with span('import'): ...`，未启用时为空操作"""
+    return _profiler.span(name) if _profiler is not None else _NULL_SPAN
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+def _timed(func: Callable, name: str) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _profiler
+        if profiler is None:
+            return func(*args, **kwargs)
+        frame = profiler.enter(name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.exit(frame)
+    return wrapper
+
+
+def _timed_reader(func: Callable, name: str) -> Callable:
+    @functools.wraps(func)
+    def wrapper(path, *args, **kwargs):
+        profiler = _profiler
+        if profiler is None:
+            return func(path, *args, **kwargs)
+        frame = profiler.enter(name)
+        try:
+            try:
+                profiler.count_read(os.path.getsize(path))
+            except OSError:
+                pass
+            return func(path, *args, **kwargs)
+        finally:
+            profiler.exit(frame)
+    return wrapper
+
+
+def _wrap_attribute(value: Any, name: str) -> Any:
+    """包装方法/属性/类方法，保持其描述符类型不变"""
+    if isinstance(value, property):
+        return property(_timed(value.fget, name), value.fset, value.fdel, value.__doc__)
+    if isinstance(value, classmethod):
+        return classmethod(_timed(value.__func__, name))
+    if isinstance(value, staticmethod):
+        return staticmethod(_timed(value.__func__, name))
+    return _timed(value, name)
+
+
+def _replace_function(original: Callable, replacement: Callable):
+    """替换所有已导入模块中对该函数的引用 (包括 `from x import f` 得到的名字)"""
+    prefix = _ROOT + '.'
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not module_name.startswith(prefix):
+            continue
+        namespace = vars(module)
+        for attr, value in list(namespace.items()):
+            if value is original:
+                namespace[attr] = replacement
+
+
+def _install():
+    """导入并插桩全部目标"""
+    modules = {name: importlib.import_module(f'{_ROOT}.{name}') for name in set(_TARGETS) | set(_READERS)}
+    for module_name, targets in _TARGETS.items():
+        module = modules[module_name]
+        for class_name, attrs in targets.items():
+            if class_name is None:
+                for attr in attrs:
+                    original = getattr(module, attr)
+                    _replace_function(original, _timed(original, f"{module_name.rsplit('.', 1)[-1]}.{attr}"))
+                continue
+            cls = getattr(module, class_name)
+            for attr in attrs:
+                setattr(cls, attr, _wrap_attribute(cls.__dict__[attr], f"{class_name}.{attr}"))
+
+    for module_name, attrs in _READERS.items():
+        for attr in attrs:
+            original = getattr(modules[module_name], attr)
+            _replace_function(original, _timed_reader(original, attr))
+
+
+def enable_profiling(trace_memory: bool = False) -> Profiler:
+    """启用分析: 开始计时并为目标方法挂上计时包装 (导入与插桩本身记为 import 阶段)"""
+    global _profiler
+    if _profiler is not None:
+        return _profiler
+    profiler = Profiler(trace_memory)
+    profiler.start()
+    _profiler = profiler
+    with profiler.span('import'):
+        _install()
+    return profiler
+
+
+def finish_profiling(stream: TextIO = None, lang: str = None):
+    """结束分析并把报告写到 stream (默认标准错误)，lang 缺省时使用当前界面语言"""
+    global _profiler
+    profiler = _profiler
+    if profiler is None:
+        return
+    _profiler = None
+    profiler.stop()
+    if lang is None:
+        from .i18n import I18nManager
+        lang = I18nManager().get_language()
+    stream = stream or sys.stderr
+    stream.write(profiler.report(lang) + '\n')
+    stream.flush()
+
+
+if __name__ == "__main__":
+    enable_profiling(trace_memory=True)
+    from .i18n import I18nManager
+    from ..core.query_processor import QueryProcessor
+    QueryProcessor(I18nManager()).search_commands("压缩")
+    finish_profiling(lang='zh')